@@ -0,0 +1,227 @@
+"""
+Потоковое пакетное вычисление RPN выражений
+"""
+
+import os
+import sys
+import time
+from typing import IO, TYPE_CHECKING, Iterable, Iterator, Optional, Union
+from calculator import RPNCalculator
+
+if TYPE_CHECKING:
+    from persistent import ResultCache
+
+Number = Union[int, float]
+
+# Количество строк результата, накапливаемых перед записью и сбросом буфера
+FLUSH_EVERY = 4096
+
+
+def read_expressions(stream: IO[str]) -> Iterator[str]:
+    """
+    Лениво читает выражения из потока, по одному на строку
+
+    Args:
+        stream (IO[str]): Входной поток
+
+    Yields:
+        str: Выражение без символа перевода строки
+    """
+    for line in stream:
+        yield line.rstrip('\r\n')
+
+
+class BatchStats:
+    """Статистика пакетного вычисления"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        """Время работы в секундах"""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Скорость в выражениях в секунду"""
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """Возвращает сводку одной строкой"""
+        return (f"Обработано: {self.count}, ошибок: {self.errors}, "
+                f"время: {self.elapsed:.3f} с, скорость: {self.throughput:.0f} выражений/с")
+
+
+def evaluate_stream(calculator: RPNCalculator, expressions: Iterable[str]) -> Iterator[tuple[bool, Union[Number, str]]]:
+    """
+    Вычисляет выражения по одному, сохраняя порядок
+
+    Ошибки не выбрасываются (RPNCalculator.evaluate_many()), текст
+    формируется только для вывода.
+
+    Args:
+        calculator (RPNCalculator): Калькулятор
+        expressions (Iterable[str]): Выражения
+
+    Yields:
+        tuple[bool, Union[Number, str]]: (успех, результат или текст ошибки)
+    """
+    for result in calculator.evaluate_many(expressions):
+        if result.error is None:
+            yield True, result.value  # type: ignore[misc]
+        else:
+            yield False, result.message
+
+
+def format_result(ok: bool, value: Union[Number, str]) -> str:
+    """
+    Форматирует результат в строку вывода
+
+    Args:
+        ok (bool): Признак успешного вычисления
+        value (Union[Number, str]): Результат или текст ошибки
+
+    Returns:
+        str: Строка вывода без перевода строки
+    """
+    return str(value) if ok else f"Ошибка: {value}"
+
+
+def write_results(results: Iterable[tuple[bool, Union[Number, str]]], output: IO[str],
+                  stats: Optional[BatchStats] = None) -> BatchStats:
+    """
+    Пишет результаты построчно, сбрасывая буфер порциями
+
+    Args:
+        results (Iterable[tuple[bool, Union[Number, str]]]): Результаты вычисления
+        output (IO[str]): Выходной поток
+        stats (Optional[BatchStats]): Накопитель статистики
+
+    Returns:
+        BatchStats: Статистика обработки
+    """
+    if stats is None:
+        stats = BatchStats()
+    chunk: list[str] = []
+    append = chunk.append
+    for ok, value in results:
+        stats.count += 1
+        if not ok:
+            stats.errors += 1
+        append(format_result(ok, value))
+        if len(chunk) >= FLUSH_EVERY:
+            append('')
+            output.write('\n'.join(chunk))
+            output.flush()
+            chunk.clear()
+    if chunk:
+        append('')
+        output.write('\n'.join(chunk))
+    output.flush()
+    stats.finished = time.perf_counter()
+    return stats
+
+
+def write_columnar(results: Iterable[tuple[bool, Union[Number, str]]], path: str,
+                   stats: Optional[BatchStats] = None) -> BatchStats:
+    """
+    Пишет результаты в бинарный колоночный файл (columnar.ColumnarWriter)
+
+    Args:
+        results (Iterable[tuple[bool, Union[Number, str]]]): Результаты вычисления
+        path (str): Путь к файлу результатов
+        stats (Optional[BatchStats]): Накопитель статистики
+
+    Returns:
+        BatchStats: Статистика обработки
+    """
+    from columnar import ColumnarWriter
+    if stats is None:
+        stats = BatchStats()
+    with ColumnarWriter(path) as writer:
+        writer.extend(results)
+    stats.count += len(writer)
+    stats.errors += writer.errors
+    stats.finished = time.perf_counter()
+    return stats
+
+
+def run_batch_mode(source: str = '-', output: Optional[IO[str]] = None,
+                   calculator: Optional[RPNCalculator] = None,
+                   workers: Optional[int] = None, cache: Optional['ResultCache'] = None,
+                   columnar: Optional[str] = None) -> BatchStats:
+    """
+    Запускает пакетный режим: выражения из файла или stdin, результаты в stdout
+
+    Args:
+        source (str): Путь к файлу или '-' для stdin
+        output (Optional[IO[str]]): Выходной поток (по умолчанию stdout)
+        calculator (Optional[RPNCalculator]): Калькулятор
+        workers (Optional[int]): Количество процессов (None - вычисление в текущем процессе)
+        cache (Optional[ResultCache]): Постоянный кэш результатов (вычисляются только промахи)
+        columnar (Optional[str]): Путь к бинарному колоночному файлу результатов
+            (вместо текста в output)
+
+    Returns:
+        BatchStats: Статистика обработки (сводка также выводится в stderr)
+
+    Raises:
+        SystemExit: Если читатель stdout закрыл канал (выход с кодом 0 без трассировки)
+    """
+    if output is None:
+        output = sys.stdout
+    if calculator is None:
+        calculator = RPNCalculator()
+
+    def write(results: Iterable[tuple[bool, Union[Number, str]]], stats: Optional[BatchStats] = None) -> BatchStats:
+        if columnar is not None:
+            return write_columnar(results, columnar, stats)
+        return write_results(results, output, stats)
+
+    def process(stream: IO[str]) -> BatchStats:
+        expressions = read_expressions(stream)
+        if workers is None:
+            if cache is None:
+                return write(evaluate_stream(calculator, expressions))
+            from persistent import evaluate_cached
+            return write(evaluate_cached(calculator, expressions, cache))
+        from parallel import SERIAL_THRESHOLD, ParallelStats, evaluate_parallel
+        stats = ParallelStats()
+
+        def evaluate(misses: Iterable[str]) -> Iterator[tuple[bool, Union[Number, str]]]:
+            return evaluate_parallel(misses, workers, cache_size=calculator._program_cache.maxsize,
+                                     stats=stats, policy=calculator.policy, calculator=calculator)
+
+        if cache is None:
+            return write(evaluate(expressions), stats)
+        from persistent import evaluate_cached
+        # Порция промахов должна быть больше порога, иначе пул не запустится
+        results = evaluate_cached(calculator, expressions, cache, evaluate, chunk_size=4 * SERIAL_THRESHOLD)
+        return write(results, stats)
+
+    try:
+        if source == '-':
+            stats = process(sys.stdin)
+        else:
+            with open(source, encoding='utf-8') as stream:
+                stats = process(stream)
+    except BrokenPipeError:
+        if output is not sys.stdout:
+            raise
+        # Читатель закрыл канал (например, `| head`): остаток вывода не нужен.
+        # stdout перенаправляется в devnull, чтобы сброс буфера при выходе не упал снова
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        raise SystemExit(0)
+
+    print(stats.summary(), file=sys.stderr)
+    if cache is not None:
+        cache.evict()
+        print(cache.summary(), file=sys.stderr)
+    return stats
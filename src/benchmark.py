@@ -0,0 +1,462 @@
+"""
+Бенчмарки горячих путей RPN калькулятора
+
+Генерирует нагрузки (длинные плоские выражения, глубокая вложенность скобок,
+цепочки '**' над float и большими целыми, выражения с ошибками), измеряет
+_tokenize, _validate_parentheses, _apply_operator, evaluate, evaluate_many и
+функции compile_function(), выводит нс/токен и выражений/с. Нагрузка 'formula'
+сравнивает evaluate() одной формулы с разными значениями и вызов функции
+compile_function() с этими значениями. Нагрузка 'threads' измеряет
+пропускную способность одного калькулятора с общим кэшем из 1, 2, 4 и 8
+потоков. В сборке с GIL и без GIL результаты различаются, поэтому режим
+GIL записывается в каждое измерение, а измерения в другом режиме с базовой
+линией не сравниваются. Результаты сохраняются в JSON как
+базовая линия, прогон завершается с ошибкой, если он медленнее базовой линии
+больше чем на заданный процент.
+
+    python src/benchmark.py --save baseline.json
+    python src/benchmark.py --baseline baseline.json --threshold 20
+"""
+
+import argparse
+import json
+import platform
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+from cache import GIL_ENABLED
+from calculator import OPERATOR_FUNCTIONS, RPNCalculator
+from engine import evaluate_fused
+from registry import ARITIES, VARIADIC
+
+BASELINE_VERSION = 1
+
+# Допустимое замедление относительно базовой линии, в процентах
+DEFAULT_THRESHOLD = 20.0
+
+Measurement = dict[str, float]
+
+
+def flat_workload(scale: int) -> list[str]:
+    """Длинные плоские выражения: 1 2 + 3 - 4 * ..."""
+    operators = ('+', '-', '*', '+')
+    tokens = ['1']
+    for i in range(2, 1000):
+        tokens.append(str(i % 97))
+        tokens.append(operators[i % len(operators)])
+    return [' '.join(tokens)] * (10 * scale)
+
+
+def nested_workload(scale: int) -> list[str]:
+    """Глубокая вложенность скобок: (((1 1 +) 1 +) 1 +) ..."""
+    depth = 500
+    return ['(' * depth + '1' + ' 1 +)' * depth] * (10 * scale)
+
+
+def float_power_workload(scale: int) -> list[str]:
+    """Цепочки '**' над вещественными числами"""
+    return ['2.5' + ' 1.01 ** 0.99 **' * 100] * (20 * scale)
+
+
+def bigint_power_workload(scale: int) -> list[str]:
+    """Произведения больших целых степеней"""
+    return ['7 200 **' + ' 7 200 ** *' * 50] * (20 * scale)
+
+
+def error_workload(scale: int) -> list[str]:
+    """Выражения, завершающиеся ошибкой на разных этапах"""
+    expressions = ['1 0 /', '5 0 //', '3.5 2 %', '3 +', '1 2', 'abc 4 +', '(4 +) 2 *', '((3 4 +) 2 *', '() 3 4 +']
+    return expressions * (100 * scale)
+
+
+WORKLOADS: dict[str, Callable[[int], list[str]]] = {
+    'flat': flat_workload,
+    'nested': nested_workload,
+    'float_power': float_power_workload,
+    'bigint_power': bigint_power_workload,
+    'errors': error_workload,
+}
+
+# Формула нагрузки 'formula': значения переменных меняются от строки к строке
+FORMULA = 'x y + z * x 2 ** - y 1 + / z 7 % +'
+FORMULA_WORKLOAD = 'formula'
+
+# Нагрузка 'threads': один калькулятор вычисляет выражения из нескольких потоков
+THREADS_WORKLOAD = 'threads'
+THREAD_COUNTS = (1, 2, 4, 8)
+
+
+def _best_time(run: Callable[[], None], repeat: int) -> float:
+    """
+    Возвращает лучшее время одного прогона
+
+    Args:
+        run (Callable[[], None]): Измеряемая функция
+        repeat (int): Количество прогонов
+
+    Returns:
+        float: Время в наносекундах
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        run()
+        best = min(best, time.perf_counter_ns() - started)
+    return best
+
+
+def _trace_operations(expressions: list[str]) -> list[tuple[Any, ...]]:
+    """Записывает применения операторов при вычислении выражений: (символ, операнды...)"""
+    calls: list[tuple[Any, ...]] = []
+
+    def recorder(symbol: str) -> Callable[..., Any]:
+        function = OPERATOR_FUNCTIONS[symbol]
+
+        def record(*operands: Any) -> Any:
+            calls.append((symbol, *(operands[0] if ARITIES[symbol] == VARIADIC else operands)))
+            return function(*operands)
+
+        return record
+
+    operators = {symbol: recorder(symbol) for symbol in OPERATOR_FUNCTIONS}
+    parse_number = RPNCalculator()._parse_number
+    for expression in expressions:
+        try:
+            evaluate_fused(expression, operators, parse_number)
+        except (ValueError, ZeroDivisionError):
+            pass
+    return calls
+
+
+def bench_workload(expressions: list[str], repeat: int) -> dict[str, Measurement]:
+    """
+    Измеряет горячие пути на одной нагрузке
+
+    Args:
+        expressions (list[str]): Выражения нагрузки
+        repeat (int): Количество прогонов (берётся лучший)
+
+    Returns:
+        dict[str, Measurement]: Для каждого пути - нс/токен (для _apply_operator -
+        на одно применение оператора) и выражений/с
+    """
+    calculator = RPNCalculator()
+    uncached = RPNCalculator(cache_size=0)
+    tokenized = [calculator._tokenize(expression) for expression in expressions]
+    token_count = sum(len(tokens) for tokens in tokenized)
+    calls = _trace_operations(expressions)
+
+    def tokenize() -> None:
+        for expression in expressions:
+            calculator._tokenize(expression)
+
+    def validate() -> None:
+        for tokens in tokenized:
+            try:
+                calculator._validate_parentheses(tokens)
+            except ValueError:
+                pass
+
+    def apply_operator() -> None:
+        apply = calculator._apply_operator
+        for symbol, *operands in calls:
+            try:
+                apply(symbol, *operands)
+            except Exception:
+                pass
+
+    def evaluate(target: RPNCalculator) -> Callable[[], None]:
+        def run() -> None:
+            for expression in expressions:
+                try:
+                    target.evaluate(expression)
+                except (ValueError, ZeroDivisionError):
+                    pass
+        return run
+
+    def evaluate_many() -> None:
+        deque(calculator.evaluate_many(expressions), maxlen=0)
+
+    def compiled_function() -> None:
+        for expression in expressions:
+            try:
+                calculator.compile_function(expression)()
+            except (ValueError, ZeroDivisionError, TypeError):
+                # TypeError - некорректный для evaluate() токен стал параметром без значения
+                pass
+
+    paths: dict[str, tuple[Callable[[], None], int]] = {
+        '_tokenize': (tokenize, token_count),
+        '_validate_parentheses': (validate, token_count),
+        '_apply_operator': (apply_operator, len(calls)),
+        'evaluate': (evaluate(calculator), token_count),
+        'evaluate_uncached': (evaluate(uncached), token_count),
+        'evaluate_many': (evaluate_many, token_count),
+        'compile_function': (compiled_function, token_count),
+    }
+    results: dict[str, Measurement] = {}
+    for name, (run, units) in paths.items():
+        elapsed = _best_time(run, repeat)
+        results[name] = {
+            'ns_per_token': elapsed / units if units else 0.0,
+            'expressions_per_sec': len(expressions) / elapsed * 1e9 if elapsed else 0.0,
+        }
+    return results
+
+
+def bench_formula(scale: int, repeat: int) -> dict[str, Measurement]:
+    """
+    Сравнивает evaluate() формулы с подставленными значениями и сгенерированную функцию
+
+    Строк больше ёмкости кэша программ, поэтому evaluate() компилирует каждую
+    строку, а функция compile_function() компилируется один раз.
+
+    Args:
+        scale (int): Множитель количества строк
+        repeat (int): Количество прогонов (берётся лучший)
+
+    Returns:
+        dict[str, Measurement]: Результаты путей 'evaluate' и 'compile_function'
+    """
+    calculator = RPNCalculator()
+    rows = [(i, i % 7 + 1, i % 13) for i in range(2000 * scale)]
+    expressions = [FORMULA.replace('x', str(x)).replace('y', str(y)).replace('z', str(z)) for x, y, z in rows]
+    token_count = len(calculator._tokenize(FORMULA)) * len(rows)
+
+    def evaluate() -> None:
+        for expression in expressions:
+            calculator.evaluate(expression)
+
+    def compiled_function() -> None:
+        function = calculator.compile_function(FORMULA)
+        for x, y, z in rows:
+            function(x, y, z)
+
+    results: dict[str, Measurement] = {}
+    for name, run in (('evaluate', evaluate), ('compile_function', compiled_function)):
+        elapsed = _best_time(run, repeat)
+        results[name] = {
+            'ns_per_token': elapsed / token_count,
+            'expressions_per_sec': len(rows) / elapsed * 1e9 if elapsed else 0.0,
+        }
+    return results
+
+
+def bench_threads(scale: int, repeat: int, counts: tuple[int, ...] = THREAD_COUNTS) -> dict[str, Measurement]:
+    """
+    Измеряет пропускную способность одного калькулятора из нескольких потоков
+
+    Потоки берут программы из общего сегментированного кэша; общий объём
+    работы одинаков и делится между потоками поровну. В сборке с GIL
+    пропускная способность от числа потоков почти не растёт, в сборке
+    без GIL - растёт до числа ядер.
+
+    Args:
+        scale (int): Множитель количества выражений
+        repeat (int): Количество прогонов (берётся лучший)
+        counts (tuple[int, ...]): Количества потоков
+
+    Returns:
+        dict[str, Measurement]: Результаты путей 'evaluate_N' (N - количество потоков)
+    """
+    calculator = RPNCalculator(cache_stripes=16)
+    formulas = [FORMULA.replace('x', str(i)).replace('y', str(i % 7 + 1)).replace('z', str(i % 13))
+                for i in range(512)]
+    expressions = formulas * (4 * scale)
+    token_count = sum(len(calculator._tokenize(expression)) for expression in expressions)
+    for expression in formulas:
+        calculator.evaluate(expression)
+
+    def work(chunk: list[str]) -> None:
+        evaluate = calculator.evaluate
+        for expression in chunk:
+            evaluate(expression)
+
+    def run_threads(count: int) -> Callable[[], None]:
+        chunks = [expressions[index::count] for index in range(count)]
+
+        def run() -> None:
+            threads = [threading.Thread(target=work, args=(chunk,)) for chunk in chunks]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return run
+
+    results: dict[str, Measurement] = {}
+    for count in counts:
+        elapsed = _best_time(run_threads(count), repeat)
+        results[f'evaluate_{count}'] = {
+            'ns_per_token': elapsed / token_count,
+            'expressions_per_sec': len(expressions) / elapsed * 1e9 if elapsed else 0.0,
+        }
+    return results
+
+
+def run_benchmarks(scale: int = 1, repeat: int = 5,
+                   workloads: Optional[list[str]] = None) -> dict[str, Measurement]:
+    """
+    Запускает все нагрузки
+
+    Args:
+        scale (int): Множитель размера нагрузок
+        repeat (int): Количество прогонов каждого измерения
+        workloads (Optional[list[str]]): Имена нагрузок, включая 'formula' и 'threads'
+            (по умолчанию все)
+
+    Returns:
+        dict[str, Measurement]: Результаты по ключам вида 'нагрузка/путь'
+        (с признаком включённого GIL 'gil')
+    """
+    results: dict[str, Measurement] = {}
+    for name in workloads or [*WORKLOADS, FORMULA_WORKLOAD, THREADS_WORKLOAD]:
+        if name == FORMULA_WORKLOAD:
+            measurements = bench_formula(scale, repeat)
+        elif name == THREADS_WORKLOAD:
+            measurements = bench_threads(scale, repeat)
+        else:
+            measurements = bench_workload(WORKLOADS[name](scale), repeat)
+        for path, measurement in measurements.items():
+            results[f"{name}/{path}"] = {**measurement, 'gil': GIL_ENABLED}
+    return results
+
+
+def save_baseline(results: dict[str, Measurement], path: str) -> None:
+    """
+    Сохраняет результаты как базовую линию
+
+    Args:
+        results (dict[str, Measurement]): Результаты прогона
+        path (str): Путь к JSON файлу
+    """
+    document = {
+        'version': BASELINE_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> dict[str, Measurement]:
+    """
+    Загружает базовую линию
+
+    Args:
+        path (str): Путь к JSON файлу
+
+    Returns:
+        dict[str, Measurement]: Результаты базовой линии
+
+    Raises:
+        ValueError: Если версия формата не поддерживается
+    """
+    with open(path, encoding='utf-8') as file:
+        document = json.load(file)
+    if document.get('version') != BASELINE_VERSION:
+        raise ValueError(f"Неподдерживаемая версия базовой линии: {document.get('version')}")
+    return document['results']
+
+
+def _mode_differs(measurement: Measurement, reference: Measurement) -> bool:
+    """Измерение и базовая линия получены в разных режимах GIL (без режима - считаются одинаковыми)"""
+    return 'gil' in measurement and 'gil' in reference and bool(measurement['gil']) != bool(reference['gil'])
+
+
+def find_mode_mismatches(results: dict[str, Measurement], baseline: dict[str, Measurement]) -> list[str]:
+    """
+    Находит измерения, полученные в другом режиме GIL, чем базовая линия
+
+    Args:
+        results (dict[str, Measurement]): Результаты прогона
+        baseline (dict[str, Measurement]): Базовая линия
+
+    Returns:
+        list[str]: Имена измерений, которые find_regressions() не сравнивает
+    """
+    return [name for name, measurement in results.items()
+            if name in baseline and _mode_differs(measurement, baseline[name])]
+
+
+def find_regressions(results: dict[str, Measurement], baseline: dict[str, Measurement],
+                     threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+    Сравнивает прогон с базовой линией по нс/токен
+
+    Измерения в другом режиме GIL пропускаются (см. find_mode_mismatches).
+
+    Args:
+        results (dict[str, Measurement]): Результаты прогона
+        baseline (dict[str, Measurement]): Базовая линия
+        threshold (float): Допустимое замедление в процентах
+
+    Returns:
+        list[str]: Описания регрессий (пустой список - регрессий нет)
+    """
+    regressions = []
+    for name, measurement in results.items():
+        reference = baseline.get(name)
+        if not reference or not reference['ns_per_token'] or _mode_differs(measurement, reference):
+            continue
+        slowdown = (measurement['ns_per_token'] / reference['ns_per_token'] - 1) * 100
+        if slowdown > threshold:
+            regressions.append(f"{name}: {reference['ns_per_token']:.1f} → "
+                               f"{measurement['ns_per_token']:.1f} нс/токен (+{slowdown:.0f}%)")
+    return regressions
+
+
+def format_results(results: dict[str, Measurement]) -> str:
+    """Форматирует результаты таблицей"""
+    width = max(len(name) for name in results)
+    lines = [f"{'нагрузка/путь':<{width}}  {'нс/токен':>10}  {'выражений/с':>12}"]
+    for name, measurement in results.items():
+        lines.append(f"{name:<{width}}  {measurement['ns_per_token']:>10.1f}  "
+                     f"{measurement['expressions_per_sec']:>12.0f}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Точка входа бенчмарков
+
+    Returns:
+        int: Код возврата (1 - найдены регрессии)
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарки RPN калькулятора")
+    parser.add_argument('--scale', type=int, default=1, help="множитель размера нагрузок")
+    parser.add_argument('--repeat', type=int, default=5, help="количество прогонов, берётся лучший")
+    parser.add_argument('--workload', action='append', choices=[*WORKLOADS, FORMULA_WORKLOAD, THREADS_WORKLOAD],
+                        help="запустить только указанные нагрузки")
+    parser.add_argument('--save', metavar='FILE', help="сохранить результаты как базовую линию")
+    parser.add_argument('--baseline', metavar='FILE', help="сравнить с базовой линией")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимое замедление в процентах")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scale, args.repeat, args.workload)
+    print(format_results(results))
+    if any(name.startswith(f"{THREADS_WORKLOAD}/") for name in results):
+        print(f"GIL: {'включён' if GIL_ENABLED else 'выключен'}")
+    if args.save:
+        save_baseline(results, args.save)
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        mismatches = find_mode_mismatches(results, baseline)
+        if mismatches:
+            print(f"Режим GIL отличается от базовой линии, не сравниваются: {', '.join(mismatches)}",
+                  file=sys.stderr)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"Регрессии (порог {args.threshold:g}%):", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"Регрессий нет (порог {args.threshold:g}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,452 @@
+"""
+Вычисление RPN выражений без исключений
+
+RPNCalculator.evaluate_many() возвращает на каждое выражение компактную
+запись EvaluationResult: значение или ключ ERROR_MESSAGES и индекс токена,
+на котором обнаружена ошибка. Ошибки находятся без исключений: числа
+проверяются регулярным выражением до разбора, деление на ноль и нецелые
+операнды - предварительными проверками реестра операторов. Текст ошибки
+формируется только при обращении к EvaluationResult.message. Исключение
+перехватывается лишь в редких случаях (переполнение, лимиты внутри операторов).
+
+Тот же движок над байтами используется потоковым вычислением из файла (streaming).
+"""
+
+import itertools
+import re
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional, Union
+from constants import ERROR_MESSAGES, TOKEN_PATTERN
+from engine import TOKEN_RE, _NO_GROUP, _depth_after, incomplete_group_error
+from instrumentation import OPERATION_ERROR, error_key
+from limits import ResourcePolicy, limit_error
+from registry import ARITIES, OPERATORS, VARIADIC, describe_operation, required_operands
+
+if TYPE_CHECKING:
+    from calculator import RPNCalculator
+
+Number = Union[int, float]
+
+# Числа, которые принимают int() и float() (подчёркивания только между цифрами)
+_INT_PATTERN = r'[+-]?\d(?:_?\d)*'
+_FLOAT_PATTERN = r'[+-]?(?:\d(?:_?\d)*\.(?:\d(?:_?\d)*)?|\.\d(?:_?\d)*)(?:[eE][+-]?\d(?:_?\d)*)?'
+
+INT_RE = re.compile(_INT_PATTERN)
+FLOAT_RE = re.compile(_FLOAT_PATTERN)
+BYTE_TOKEN_RE = re.compile(TOKEN_PATTERN.encode())
+BYTE_INT_RE = re.compile(_INT_PATTERN.encode())
+BYTE_FLOAT_RE = re.compile(_FLOAT_PATTERN.encode())
+
+# Продолжение 'm %' после токена '**': модуль и оператор '%' отдельными токенами
+_POWER_MODULO_PATTERN = r'\s+([^\s()]+)\s+%(?![^\s()])'
+POWER_MODULO_RE = re.compile(_POWER_MODULO_PATTERN)
+BYTE_POWER_MODULO_RE = re.compile(_POWER_MODULO_PATTERN.encode())
+
+
+def parse_number(token: str) -> Optional[Number]:
+    """
+    Разбирает число без исключений (как RPNCalculator._parse_number)
+
+    Args:
+        token (str): Токен
+
+    Returns:
+        Optional[Number]: Число или None, если токен не число
+    """
+    if '.' in token:
+        return float(token) if FLOAT_RE.fullmatch(token) is not None else None
+    if token.isdecimal() or INT_RE.fullmatch(token) is not None:
+        try:
+            return int(token)
+        except ValueError:
+            # Длина сверх sys.get_int_max_str_digits()
+            return None
+    return None
+
+
+def parse_bytes(token: bytes) -> Optional[Number]:
+    """
+    Разбирает число из байтов без исключений (цифры ASCII)
+
+    Args:
+        token (bytes): Токен
+
+    Returns:
+        Optional[Number]: Число или None, если токен не число
+    """
+    if b'.' in token:
+        return float(token) if BYTE_FLOAT_RE.fullmatch(token) is not None else None
+    if token.isdigit() or BYTE_INT_RE.fullmatch(token) is not None:
+        try:
+            return int(token)
+        except ValueError:
+            return None
+    return None
+
+
+class EvaluationResult:
+    """
+    Результат вычисления выражения: значение или ключ ошибки с индексом токена
+    """
+
+    __slots__ = ('value', 'error', 'index', 'detail', 'source')
+
+    def __init__(self, value: Optional[Number] = None, error: Optional[str] = None, index: int = -1,
+                 detail: Any = None, source: Any = None) -> None:
+        """
+        Инициализация результата
+
+        Args:
+            value (Optional[Number]): Результат (None при ошибке)
+            error (Optional[str]): Ключ ERROR_MESSAGES или OPERATION_ERROR (None при успехе)
+            index (int): Индекс токена, на котором обнаружена ошибка
+                (число токенов - в конце выражения, -1 - для пустого выражения)
+            detail (Any): Данные для текста ошибки: токен, символ оператора, размер стека,
+                позиции скобок группы или готовое исключение
+            source (Any): Выражение (для текста ошибки в скобках)
+        """
+        self.value = value
+        self.error = error
+        self.index = index
+        self.detail = detail
+        self.source = source
+
+    @property
+    def ok(self) -> bool:
+        """Вычислено ли выражение без ошибки"""
+        return self.error is None
+
+    @property
+    def message(self) -> str:
+        """Текст ошибки, как у исключения evaluate() (пустая строка при успехе)"""
+        if self.error is None:
+            return ''
+        detail = self.detail
+        if isinstance(detail, BaseException):
+            return str(detail)
+        text = ERROR_MESSAGES[self.error]
+        if self.error == 'invalid_token':
+            return f"{text}: {_text(detail)}"
+        if self.error == 'insufficient_operands':
+            return f"{text} '{detail}'"
+        if self.error == 'invalid_expression':
+            return f"{text}. В стеке осталось {detail} элементов"
+        if self.error == 'incomplete_expression_in_parentheses':
+            start, end = detail
+            return str(incomplete_group_error(_text(self.source[start + 1:end])))
+        return text
+
+    def exception(self) -> Union[ValueError, ZeroDivisionError]:
+        """
+        Возвращает исключение, которое выбросил бы evaluate()
+
+        Raises:
+            ValueError: Если результат успешный
+        """
+        if self.error is None:
+            raise ValueError("Результат без ошибки")
+        if isinstance(self.detail, (ValueError, ZeroDivisionError)):
+            return self.detail
+        if self.error == 'division_by_zero':
+            return ZeroDivisionError(self.message)
+        return ValueError(self.message)
+
+    def __repr__(self) -> str:
+        if self.error is None:
+            return f"EvaluationResult({self.value!r})"
+        return f"EvaluationResult(error={self.error!r}, index={self.index})"
+
+
+def _text(value: Any) -> str:
+    """Текст токена или фрагмента выражения (байты декодируются)"""
+    return value if isinstance(value, str) else bytes(value).decode('utf-8', 'replace')
+
+
+def _literal_error(policy: ResourcePolicy, depth: int, value: Number) -> Optional[ValueError]:
+    """Проверка литерала при компиляции: глубина стека и размер целого"""
+    error = policy.check_depth(depth)
+    if error is None and policy.max_bits is not None and isinstance(value, int) \
+            and value.bit_length() > policy.max_bits:
+        error = limit_error(f"результат больше {policy.max_bits} бит")
+    return error
+
+
+def _close_group(groups: list[list[Any]], depth: int, last_open: bool,
+                 end: int) -> Optional[tuple[str, Optional[tuple[int, int]]]]:
+    """
+    Проверяет группу, закрываемую скобкой
+
+    Args:
+        groups (list[list[Any]]): Открытые группы [база глубины, позиция '(', признак ошибки]
+        depth (int): Текущая структурная глубина стека
+        last_open (bool): Был ли предыдущий токен открывающей скобкой
+        end (int): Позиция закрывающей скобки
+
+    Returns:
+        Optional[tuple[str, Optional[tuple[int, int]]]]: Ключ ошибки и позиции скобок группы или None
+    """
+    if not groups:
+        return 'unmatched_parentheses', None
+    base, start, failed = groups.pop()
+    if last_open:
+        return 'empty_parentheses', None
+    if failed or depth - base != 1:
+        return 'incomplete_expression_in_parentheses', (start, end)
+    return None
+
+
+class RecordEvaluator:
+    """
+    Однопроходный движок, возвращающий EvaluationResult вместо исключений
+
+    Порядок ошибок совпадает с RPNCalculator.evaluate(): пустое выражение,
+    лимит токенов (отдельный проход до max_tokens + 1 токена), скобки, лимиты
+    литералов до первой ошибки компиляции, затем ошибки в порядке вычисления.
+    """
+
+    __slots__ = ('table', 'policy', 'parse', 'token_re', 'opening', 'closing', 'max_tokens', 'limited', 'time_budget',
+                 'power_modulo')
+
+    def __init__(self, operators: dict[str, Callable[..., Any]], policy: Optional[ResourcePolicy] = None,
+                 binary: bool = False) -> None:
+        """
+        Инициализация движка
+
+        Args:
+            operators (dict[str, Callable[..., Any]]): Функции операторов с проверками
+            policy (Optional[ResourcePolicy]): Лимиты ресурсов (None - без ограничений)
+            binary (bool): Выражения - байтовые буферы (bytes, mmap), а не строки
+        """
+        encode: Callable[[str], Any] = str.encode if binary else str
+        # Токен оператора -> (символ, функция, арность, минимум операндов в группе, проверка операндов)
+        self.table = {encode(symbol): (symbol, function, ARITIES[symbol], required_operands(ARITIES[symbol]),
+                                       OPERATORS[symbol].check)
+                      for symbol, function in operators.items()}
+        self.policy = policy
+        self.parse: Callable[[Any], Optional[Number]] = parse_bytes if binary else parse_number
+        self.token_re: re.Pattern[Any] = BYTE_TOKEN_RE if binary else TOKEN_RE
+        self.opening = encode('(')
+        self.closing = encode(')')
+        self.max_tokens = policy.max_tokens if policy is not None else None
+        self.limited = policy is not None and (policy.max_stack_depth is not None or policy.max_bits is not None)
+        self.time_budget = policy.time_budget if policy is not None else None
+        # 'a b ** m %' вычисляется как pow(a, b, m), если '**' и '%' - функции реестра без обёрток
+        plain = all(operators[symbol] is OPERATORS[symbol].function for symbol in ('**', '%'))
+        self.power_modulo: Optional[re.Pattern[Any]] = None
+        if plain and not self.limited:
+            self.power_modulo = BYTE_POWER_MODULO_RE if binary else POWER_MODULO_RE
+
+    def evaluate(self, source: Any) -> EvaluationResult:
+        """
+        Вычисляет одно выражение
+
+        Args:
+            source (Any): Выражение - строка или байтовый буфер
+
+        Returns:
+            EvaluationResult: Значение или ключ ошибки с индексом токена
+        """
+        token_re = self.token_re
+        policy = self.policy
+        if self.max_tokens is not None:
+            count = sum(1 for _ in itertools.islice(token_re.finditer(source), self.max_tokens + 1))
+            excess = policy.check_tokens(count)  # type: ignore[union-attr]
+            if excess is not None:
+                return EvaluationResult(error='resource_limit_exceeded', index=self.max_tokens, detail=excess)
+
+        table = self.table
+        parse = self.parse
+        opening = self.opening
+        closing = self.closing
+        limited = self.limited
+        power_modulo = self.power_modulo
+        deadline = time.perf_counter() + self.time_budget if self.time_budget is not None else None
+        clock = time.perf_counter
+
+        stack: list[Number] = []
+        push = stack.append
+        pop = stack.pop
+        groups: list[list[Any]] = []
+        base = _NO_GROUP
+        last_open = False
+        error: Optional[str] = None
+        detail: Any = None
+        where = 0
+        # До первой ошибки компиляции лимиты литералов имеют приоритет над ошибками вычисления
+        checking = limited
+        depth = 0
+        match = None
+        tokens = token_re.finditer(source)
+
+        for match in tokens:
+            token = match.group()
+            if token == opening:
+                base = len(stack)
+                groups.append([base, match.start(), False])
+                last_open = True
+                continue
+            if token == closing:
+                failure = _close_group(groups, len(stack), last_open, match.start())
+                if failure is not None:
+                    return self._failure(source, failure[0], match.start(), failure[1])
+                base = groups[-1][0] if groups else _NO_GROUP
+            elif token in table:
+                symbol, function, arity, required, check = table[token]
+                size = len(stack)
+                if size - base < required:
+                    groups[-1][2] = True
+                taken = arity if arity != VARIADIC else size - (0 if base == _NO_GROUP else base)
+                if size < arity or taken < 1:
+                    error = 'insufficient_operands'
+                    detail = symbol
+                    checking = False
+                elif deadline is not None and clock() > deadline:
+                    error = 'resource_limit_exceeded'
+                    detail = limit_error("время вычисления превысило бюджет")
+                elif arity == 2:
+                    b = pop()
+                    a = pop()
+                    if symbol == '**' and power_modulo is not None and type(a) is int and type(b) is int and b >= 0:
+                        follow = power_modulo.match(source, match.end())
+                        modulus = parse(follow.group(1)) if follow is not None else None
+                        if type(modulus) is int and modulus != 0:
+                            # Токены модуля и '%' пропускаются; группа с нехваткой операндов
+                            # уже отмечена на '**' по тому же условию
+                            next(tokens)
+                            next(tokens)
+                            push(pow(a, b, modulus))
+                            last_open = False
+                            continue
+                    if check is not None:
+                        error = check(a, b)
+                    if error is None:
+                        try:
+                            push(function(a, b))
+                        except (ValueError, ZeroDivisionError) as e:
+                            error = error_key(e)
+                            # Без трассировки: её кадр держит итератор токенов, а он - буфер
+                            # (mmap файла нельзя закрыть, пока на буфер есть ссылки)
+                            detail = e.with_traceback(None)
+                        except Exception as e:
+                            error = OPERATION_ERROR
+                            detail = ValueError(f"Ошибка при выполнении операции {a} {symbol} {b}: {str(e)}")
+                else:
+                    operands = stack[-taken:]
+                    del stack[-taken:]
+                    if check is not None:
+                        error = check(*operands)
+                    if error is None:
+                        try:
+                            push(function(operands) if arity == VARIADIC else function(*operands))
+                        except (ValueError, ZeroDivisionError) as e:
+                            error = error_key(e)
+                            detail = e.with_traceback(None)
+                        except Exception as e:
+                            error = OPERATION_ERROR
+                            detail = ValueError(
+                                f"Ошибка при выполнении операции {describe_operation(symbol, operands)}: {str(e)}")
+                if error is not None:
+                    where = match.start()
+                    depth = _depth_after(arity, size, base)
+                    break
+            else:
+                value = parse(token)
+                if value is None:
+                    error = 'invalid_token'
+                    detail = token
+                    checking = False
+                    where = match.start()
+                    depth = len(stack) + 1
+                    break
+                push(value)
+                if limited:
+                    detail = _literal_error(policy, len(stack), value)  # type: ignore[arg-type]
+                    if detail is not None:
+                        error = 'resource_limit_exceeded'
+                        checking = False
+                        where = match.start()
+                        depth = len(stack)
+                        break
+            last_open = False
+
+        if error is not None:
+            # Досканирование для проверок, которые evaluate() выполняет до вычисления
+            last_open = False
+            for match in tokens:
+                token = match.group()
+                if token == opening:
+                    groups.append([depth, match.start(), False])
+                    last_open = True
+                    continue
+                if token == closing:
+                    failure = _close_group(groups, depth, last_open, match.start())
+                    if failure is not None:
+                        return self._failure(source, failure[0], match.start(), failure[1])
+                elif token in table:
+                    _, _, arity, required, _ = table[token]
+                    base = groups[-1][0] if groups else _NO_GROUP
+                    if depth - base < required:
+                        groups[-1][2] = True
+                    if checking and (depth < arity or arity == VARIADIC and depth - (0 if base == _NO_GROUP else base) < 1):
+                        checking = False
+                    depth = _depth_after(arity, depth, base)
+                else:
+                    depth += 1
+                    if checking:
+                        value = parse(token)
+                        if value is None:
+                            checking = False
+                        else:
+                            limit = _literal_error(policy, depth, value)  # type: ignore[arg-type]
+                            if limit is not None:
+                                error = 'resource_limit_exceeded'
+                                detail = limit
+                                where = match.start()
+                                checking = False
+                last_open = False
+
+        if match is None:
+            return EvaluationResult(error='empty_expression')
+        if groups:
+            return self._failure(source, 'unmatched_parentheses', groups[-1][1])
+        if error is not None:
+            return self._failure(source, error, where, detail)
+        if len(stack) != 1:
+            return self._failure(source, 'invalid_expression', len(source), len(stack))
+        return EvaluationResult(stack[0])
+
+    def _failure(self, source: Any, error: str, position: int, detail: Any = None) -> EvaluationResult:
+        """Формирует результат с ошибкой: индекс токена считается по позиции только здесь"""
+        if isinstance(source, str):
+            index = len(self.token_re.findall(source, 0, position))
+        else:
+            # Буфер может быть огромным: токены считаются без списка
+            index = sum(1 for _ in self.token_re.finditer(source, 0, position))
+        return EvaluationResult(error=error, index=index, detail=detail, source=source)
+
+
+def evaluate_many(calculator: 'RPNCalculator', expressions: Iterable[str]) -> Iterator[EvaluationResult]:
+    """
+    Вычисляет выражения по одному без исключений
+
+    С включёнными метриками выражения вычисляются через evaluate(), чтобы
+    время фаз измерялось как обычно; индекс токена тогда не определяется (-1).
+
+    Args:
+        calculator (RPNCalculator): Калькулятор (операторы и лимиты)
+        expressions (Iterable[str]): Выражения
+
+    Yields:
+        EvaluationResult: Результат каждого выражения в порядке входа
+    """
+    if calculator.metrics is not None:
+        for expression in expressions:
+            try:
+                result = EvaluationResult(calculator.evaluate(expression))
+            except (ValueError, ZeroDivisionError) as err:
+                result = EvaluationResult(error=error_key(err), detail=err)
+            yield result
+        return
+    evaluate = RecordEvaluator(calculator._operators, calculator.policy).evaluate
+    for expression in expressions:
+        yield evaluate(expression)
@@ -0,0 +1,216 @@
+"""
+Ограниченный LRU-кэш для RPN калькулятора
+
+Кэши можно использовать из нескольких потоков, в том числе в сборках
+Python без GIL: изменения выполняются под блокировкой, чтение с GIL - без
+неё (каждая операция OrderedDict атомарна), без GIL - тоже под блокировкой.
+Счётчики попаданий и промахов при одновременных чтениях приблизительны.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+# Включён ли GIL (в сборках без GIL sys._is_gil_enabled() возвращает False)
+GIL_ENABLED = bool(getattr(sys, '_is_gil_enabled', lambda: True)())
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Кэш с вытеснением давно не использованных записей (Least Recently Used)
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """
+        Инициализация кэша
+
+        Args:
+            maxsize (int): Максимальное количество записей (0 - кэш отключен)
+
+        Raises:
+            ValueError: Если размер кэша отрицательный
+        """
+        if maxsize < 0:
+            raise ValueError("Размер кэша не может быть отрицательным")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+        # Изменение - несколько операций OrderedDict (запись, перемещение, вытеснение)
+        self._lock = threading.Lock()
+        if not GIL_ENABLED:
+            self.get = self._locked_get  # type: ignore[method-assign]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Возвращает значение по ключу и помечает запись как недавно использованную
+
+        Args:
+            key (K): Ключ записи
+
+        Returns:
+            Optional[V]: Значение или None, если записи нет
+        """
+        # Запись, вытесненная другим потоком между поиском и перемещением, всё равно возвращается
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            pass
+        self.hits += 1
+        return value
+
+    def _locked_get(self, key: K) -> Optional[V]:
+        """get() под блокировкой - для сборок без GIL"""
+        with self._lock:
+            return LRUCache.get(self, key)
+
+    def put(self, key: K, value: V) -> None:
+        """
+        Добавляет запись, вытесняя самую старую при переполнении
+
+        Args:
+            key (K): Ключ записи
+            value (V): Значение
+        """
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[K] = None) -> None:
+        """
+        Удаляет одну запись или очищает весь кэш
+
+        Args:
+            key (Optional[K]): Ключ записи (None - очистить всё)
+        """
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает статистику использования кэша
+
+        Returns:
+            dict[str, int]: Попадания, промахи, вытеснения, размер и ёмкость
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+
+class StripedLRUCache(Generic[K, V]):
+    """
+    LRU-кэш из сегментов со своими блокировками (lock striping)
+
+    Ключ попадает в сегмент по хэшу, поэтому потоки, обращающиеся к разным
+    сегментам, не ждут друг друга. Ёмкость делится между сегментами поровну,
+    вытесняется самая старая запись сегмента: порядок LRU приблизительный.
+    """
+
+    def __init__(self, maxsize: int = 1024, stripes: int = 16) -> None:
+        """
+        Инициализация кэша
+
+        Args:
+            maxsize (int): Максимальное количество записей (0 - кэш отключен)
+            stripes (int): Количество сегментов (не больше maxsize)
+
+        Raises:
+            ValueError: Если размер кэша отрицательный или сегментов меньше одного
+        """
+        if maxsize < 0:
+            raise ValueError("Размер кэша не может быть отрицательным")
+        if stripes < 1:
+            raise ValueError("Количество сегментов кэша должно быть положительным")
+        self.maxsize = maxsize
+        count = max(1, min(stripes, maxsize))
+        self._stripes: list[LRUCache[K, V]] = [
+            LRUCache(maxsize // count + (index < maxsize % count)) for index in range(count)]
+
+    def _stripe(self, key: K) -> LRUCache[K, V]:
+        """Сегмент ключа"""
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def __len__(self) -> int:
+        return sum(len(stripe) for stripe in self._stripes)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._stripes[hash(key) % len(self._stripes)]
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Возвращает значение по ключу и помечает запись как недавно использованную
+
+        Args:
+            key (K): Ключ записи
+
+        Returns:
+            Optional[V]: Значение или None, если записи нет
+        """
+        return self._stripe(key).get(key)
+
+    def put(self, key: K, value: V) -> None:
+        """
+        Добавляет запись, вытесняя самую старую запись сегмента при его переполнении
+
+        Args:
+            key (K): Ключ записи
+            value (V): Значение
+        """
+        self._stripe(key).put(key, value)
+
+    def invalidate(self, key: Optional[K] = None) -> None:
+        """
+        Удаляет одну запись или очищает весь кэш
+
+        Args:
+            key (Optional[K]): Ключ записи (None - очистить всё)
+        """
+        if key is None:
+            for stripe in self._stripes:
+                stripe.invalidate()
+        else:
+            self._stripe(key).invalidate(key)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает статистику использования кэша (сумму по сегментам)
+
+        Returns:
+            dict[str, int]: Попадания, промахи, вытеснения, размер и ёмкость
+        """
+        total = {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0}
+        for stripe in self._stripes:
+            for name, value in stripe.stats().items():
+                if name in total:
+                    total[name] += value
+        total['maxsize'] = self.maxsize
+        return total
@@ -2,59 +2,205 @@
 Модуль вычисления калькулятора обратной польской нотации (RPN)
 """
 
-from typing import Union
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional, Union
+from cache import LRUCache, StripedLRUCache
 from constants import SUPPORTED_OPERATORS, ERROR_MESSAGES
+from engine import TOKEN_RE, evaluate_fused
+from limits import ResourcePolicy, limit_error
+from registry import ARITIES, OPERATOR_FUNCTIONS, VARIADIC, describe_operation, required_operands
+
+if TYPE_CHECKING:
+    from bulk import EvaluationResult
+    from dag import DagOptimizer
+    from instrumentation import Instrumentation
+
+Number = Union[int, float]
+
+OP_PUSH = 0
+OP_APPLY = 1
+OP_FAIL = 2
+OP_CALL = 3
+
+
+class CompiledExpression:
+    """
+    Скомпилированное RPN выражение: разобранные константы и разрешённые операторы
+
+    Программа состоит из инструкций (код, аргумент):
+    OP_PUSH - положить константу в стек,
+    OP_APPLY - применить бинарный оператор (аргумент - пара (символ, функция)),
+    OP_CALL - применить оператор другой арности к n верхним элементам стека
+    (аргумент - (символ, функция, n, свёртка списка)),
+    OP_FAIL - выбросить ошибку (аргумент - пара (тип исключения, сообщение)).
+    Ошибки, обнаруженные при компиляции (некорректный токен, нехватка операндов),
+    записываются в программу и выбрасываются в той же точке, что и при обычном
+    вычислении, поэтому арифметические ошибки до них сохраняют приоритет.
+    """
+
+    __slots__ = ('expression', 'code')
+
+    def __init__(self, expression: str, code: tuple[tuple[int, Any], ...]) -> None:
+        """
+        Инициализация скомпилированного выражения
+
+        Args:
+            expression (str): Исходное выражение
+            code (tuple[tuple[int, Any], ...]): Инструкции программы
+        """
+        self.expression = expression
+        self.code = code
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.expression!r}, {len(self.code)} инструкций)"
+
+    def run(self, deadline: Optional[float] = None) -> Number:
+        """
+        Выполняет программу
+
+        Args:
+            deadline (Optional[float]): Момент time.perf_counter(), после которого
+                вычисление прерывается (проверяется перед каждым оператором)
+
+        Returns:
+            Number: Результат вычисления
+
+        Raises:
+            ValueError: При ошибках в выражении, вычислении или превышении бюджета времени
+            ZeroDivisionError: При делении на ноль
+        """
+        stack: list[Number] = []
+        push = stack.append
+        pop = stack.pop
+        clock = time.perf_counter
+        a: Any = None
+        b: Any = None
+        operands: list[Number] = []
+        opcode = OP_PUSH
+        symbol = ''
+        try:
+            for opcode, arg in self.code:
+                if opcode == OP_PUSH:
+                    push(arg)
+                elif opcode == OP_APPLY:
+                    if deadline is not None and clock() > deadline:
+                        raise limit_error("время вычисления превысило бюджет")
+                    b = pop()
+                    a = pop()
+                    symbol, function = arg
+                    push(function(a, b))
+                elif opcode == OP_CALL:
+                    if deadline is not None and clock() > deadline:
+                        raise limit_error("время вычисления превысило бюджет")
+                    symbol, function, count, reduce = arg
+                    operands = stack[-count:]
+                    del stack[-count:]
+                    push(function(operands) if reduce else function(*operands))
+                else:
+                    error_type, message = arg
+                    raise error_type(message)
+        except (ValueError, ZeroDivisionError):
+            raise
+        except Exception as e:
+            operation = describe_operation(symbol, [a, b] if opcode == OP_APPLY else operands)
+            raise ValueError(f"Ошибка при выполнении операции {operation}: {str(e)}")
+        return stack[0]
 
 
 class RPNCalculator:
     """
     Калькулятор для вычисления выражений в обратной польской нотации (RPN)
+
+    Один экземпляр можно использовать из нескольких потоков: evaluate(),
+    evaluate_many(), get_compiled(), compile_function(), evaluate_file() и
+    статистика кэшей потокобезопасны, кэш программ (с разобранными числовыми
+    литералами) и кэш функций общие для всех потоков. Скомпилированные
+    программы неизменяемы, стек вычисления у каждого вызова свой. При
+    одновременном промахе по одному выражению оно компилируется в каждом
+    потоке, в кэше остаётся одна из равноценных программ. Для многих потоков
+    cache_stripes > 1 делит кэши на сегменты со своими блокировками.
+    Настройка экземпляра (enable_instrumentation, disable_instrumentation)
+    не должна выполняться одновременно с вычислениями, а счётчики метрик и
+    статистики мемоизации при вычислениях из нескольких потоков приблизительны.
     """
 
-    def __init__(self) -> None:
-        """Инициализация калькулятора с поддержкой операторов"""
+    def __init__(self, cache_size: int = 1024, policy: Optional[ResourcePolicy] = None,
+                 memo_size: int = 0, peephole: bool = True, cache_stripes: int = 1) -> None:
+        """
+        Инициализация калькулятора с поддержкой операторов
+
+        Args:
+            cache_size (int): Размер LRU-кэша скомпилированных выражений (0 - без кэша)
+            policy (Optional[ResourcePolicy]): Лимиты ресурсов на выражение (None - без ограничений)
+            memo_size (int): Размер таблицы мемоизации общих подвыражений (0 - без мемоизации)
+            peephole (bool): Оптимизировать скомпилированные программы: свёртка констант,
+                'a b ** m %' как pow(a, b, m), тождества (при memo_size не применяется)
+            cache_stripes (int): Количество сегментов кэшей программ и функций со своими
+                блокировками (1 - один сегмент с точным порядком LRU; больше 1 - для
+                вычислений из многих потоков, особенно в сборках Python без GIL)
+        """
         self.supported_operators = SUPPORTED_OPERATORS
+        self.policy = policy
+        self._operators = policy.guard_operators(OPERATOR_FUNCTIONS) if policy is not None else OPERATOR_FUNCTIONS
+        self.metrics: Optional['Instrumentation'] = None
+        self._program_cache: Union[LRUCache[str, CompiledExpression], StripedLRUCache[str, CompiledExpression]]
+        self._function_cache: Union[LRUCache[str, Callable[..., Number]], StripedLRUCache[str, Callable[..., Number]]]
+        if cache_stripes > 1:
+            self._program_cache = StripedLRUCache(cache_size, cache_stripes)
+            self._function_cache = StripedLRUCache(cache_size, cache_stripes)
+        else:
+            self._program_cache = LRUCache(cache_size)
+            self._function_cache = LRUCache(cache_size)
+        self._optimizer: Optional['DagOptimizer'] = None
+        self._peephole: Optional[Callable[..., CompiledExpression]] = None
+        if memo_size:
+            from dag import DagOptimizer
+            self._optimizer = DagOptimizer(memo_size)
+        elif peephole:
+            from peephole import optimize
+            self._peephole = optimize
 
     def _validate_parentheses(self, tokens: list[str]) -> None:
         """
         Проверяет корректность расстановки скобок в выражении
 
+        Проверка линейная: для каждой открывающей скобки запоминается
+        структурная глубина стека, при закрытии группа должна оставлять
+        в стеке ровно одно значение сверх этой глубины.
+
         Args:
             tokens (list[str]): Список токенов выражения
 
         Raises:
             ValueError: Если скобки несбалансированы или расположены некорректно
         """
-        stack = []
+        groups: list[list[int]] = []
+        depth = 0
 
         for i, token in enumerate(tokens):
             if token == '(':
-                stack.append(i)
+                groups.append([depth, i, 0])
             elif token == ')':
-                if not stack:
+                if not groups:
                     raise ValueError(ERROR_MESSAGES['unmatched_parentheses'])
-                open_index = stack.pop()
+                base, open_index, failed = groups.pop()
                 if open_index == i - 1:
                     raise ValueError(ERROR_MESSAGES['empty_parentheses'])
-                expr_inside = tokens[open_index + 1:i]
-                if not expr_inside:
-                    raise ValueError(ERROR_MESSAGES['empty_parentheses'])
-                tmp_stack = []
-                for t in expr_inside:
-                    if t in self.supported_operators:
-                        if len(tmp_stack) < 2:
-                            raise ValueError(
-                                f"{ERROR_MESSAGES['incomplete_expression_in_parentheses']}: {' '.join(expr_inside)}")
-                        tmp_stack.pop()
-                        tmp_stack.pop()
-                        tmp_stack.append('result')
-                    elif t not in ('(', ')'):
-                        tmp_stack.append(t)
-                if len(tmp_stack) != 1:
+                if failed or depth - base != 1:
                     raise ValueError(
-                        f"{ERROR_MESSAGES['incomplete_expression_in_parentheses']}: {' '.join(expr_inside)}")
+                        f"{ERROR_MESSAGES['incomplete_expression_in_parentheses']}: {' '.join(tokens[open_index + 1:i])}")
+            elif token in self.supported_operators:
+                arity = ARITIES[token]
+                if groups and depth - groups[-1][0] < required_operands(arity):
+                    groups[-1][2] = 1
+                if arity == VARIADIC:
+                    depth = groups[-1][0] + 1 if groups else 1
+                else:
+                    depth -= arity - 1
+            else:
+                depth += 1
 
-        if stack:
+        if groups:
             raise ValueError(ERROR_MESSAGES['unmatched_parentheses'])
 
     def _tokenize(self, expression: str) -> list[str]:
@@ -67,26 +213,7 @@ class RPNCalculator:
         Returns:
             list[str]: Список токенов (числа и операторы)
         """
-        tokens = []
-        current_token = ""
-
-        for char in expression:
-            if char.isspace():
-                if current_token:
-                    tokens.append(current_token)
-                    current_token = ""
-            elif char in ('(', ')'):
-                if current_token:
-                    tokens.append(current_token)
-                    current_token = ""
-                tokens.append(char)
-            else:
-                current_token += char
-
-        if current_token:
-            tokens.append(current_token)
-
-        return tokens
+        return TOKEN_RE.findall(expression)
 
     def _parse_number(self, token: str) -> Union[int, float]:
         """
@@ -109,14 +236,13 @@ class RPNCalculator:
         except ValueError:
             raise ValueError(f"{ERROR_MESSAGES['invalid_token']}: {token}")
 
-    def _apply_operator(self, operator: str, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
+    def _apply_operator(self, operator: str, *operands: Union[int, float]) -> Union[int, float]:
         """
-        Применяет оператор к двум операндам
+        Применяет оператор к операндам
 
         Args:
             operator (str): Оператор
-            a (Union[int, float]): 1-ый операнд
-            b (Union[int, float]): 2-ой операнд
+            *operands (Union[int, float]): Операнды (для свёртки - любое количество)
 
         Returns:
             Union[int, float]: Результат операции
@@ -125,70 +251,296 @@ class RPNCalculator:
             ValueError: При ошибках операции
             ZeroDivisionError: При делении на ноль
         """
-        operator_functions = {
-            '+': lambda x, y: x + y,
-            '-': lambda x, y: x - y,
-            '*': lambda x, y: x * y,
-            '/': lambda x, y: x / y,
-            '//': lambda x, y: x // y,
-            '%': lambda x, y: x % y,
-            '**': lambda x, y: x ** y
-        }
-
-        if operator in ('//', '%'):
-            if not isinstance(a, int) or not isinstance(b, int):
-                raise ValueError(ERROR_MESSAGES['integer_operands_required'])
-
-        if operator in ('/', '//') and b == 0:
-            raise ZeroDivisionError(ERROR_MESSAGES['division_by_zero'])
-
-        return operator_functions[operator](a, b)
+        if ARITIES[operator] == VARIADIC:
+            return self._operators[operator](list(operands))
+        return self._operators[operator](*operands)
 
-    def evaluate(self, expression: str) -> Union[int, float]:
+    def compile(self, expression: str) -> CompiledExpression:
         """
-        Вычисляет выражение в обратной польской нотации
+        Компилирует выражение в переиспользуемую программу
+
+        Токенизация, проверка скобок и разбор чисел выполняются один раз,
+        операторы заранее разрешаются в функции. Выражение сверх лимитов
+        политики (токены, глубина стека, размер литерала) компилируется
+        в программу из одной ошибки.
 
         Args:
             expression (str): Выражение в обратной польской нотации (RPN)
 
         Returns:
-            Union[int, float]: Результат вычисления
+            CompiledExpression: Скомпилированная программа
 
         Raises:
-            ValueError: При ошибках в выражении или вычислении
-            ZeroDivisionError: При делении на ноль
+            ValueError: Если выражение пустое или скобки расставлены некорректно
         """
         if not expression.strip():
             raise ValueError(ERROR_MESSAGES['empty_expression'])
 
         tokens = self._tokenize(expression)
+        policy = self.policy
+        if policy is not None:
+            error = policy.check_tokens(len(tokens))
+            if error is not None:
+                return CompiledExpression(expression, ((OP_FAIL, (ValueError, str(error))),))
         self._validate_parentheses(tokens)
-        tokens = [token for token in tokens if token not in ('(', ')')]
-        stack: list[Union[int, float]] = []
+        operators = self._operators
+        code: list[tuple[int, Any]] = []
+        depth = 0
+        # Глубина стека при открытии каждой группы - граница свёртки VARIADIC-операторов
+        bases: list[int] = []
 
         for token in tokens:
+            if token == '(':
+                bases.append(depth)
+                continue
+            if token == ')':
+                bases.pop()
+                continue
             if token in self.supported_operators:
-                if len(stack) < 2:
-                    raise ValueError(f"{ERROR_MESSAGES['insufficient_operands']} '{token}'")
-
-                b = stack.pop()
-                a = stack.pop()
-
-                try:
-                    result = self._apply_operator(token, a, b)
-                    stack.append(result)
-                except (ValueError, ZeroDivisionError):
-                    raise
-                except Exception as e:
-                    raise ValueError(f"Ошибка при выполнении операции {a} {token} {b}: {str(e)}")
+                arity = ARITIES[token]
+                count = depth - (bases[-1] if bases else 0) if arity == VARIADIC else arity
+                if depth < arity or count < 1:
+                    code.append((OP_FAIL, (ValueError, f"{ERROR_MESSAGES['insufficient_operands']} '{token}'")))
+                    break
+                if arity == 2:
+                    code.append((OP_APPLY, (token, operators[token])))
+                else:
+                    code.append((OP_CALL, (token, operators[token], count, arity == VARIADIC)))
+                depth -= count - 1
             else:
                 try:
-                    number = self._parse_number(token)
-                    stack.append(number)
+                    value = self._parse_number(token)
                 except ValueError:
-                    raise ValueError(f"{ERROR_MESSAGES['invalid_token']}: {token}")
+                    code.append((OP_FAIL, (ValueError, f"{ERROR_MESSAGES['invalid_token']}: {token}")))
+                    break
+                code.append((OP_PUSH, value))
+                depth += 1
+                if policy is not None:
+                    error = policy.check_depth(depth)
+                    if error is None and policy.max_bits is not None and isinstance(value, int) \
+                            and value.bit_length() > policy.max_bits:
+                        error = limit_error(f"результат больше {policy.max_bits} бит")
+                    if error is not None:
+                        return CompiledExpression(expression, ((OP_FAIL, (ValueError, str(error))),))
+        else:
+            if depth != 1:
+                code.append((OP_FAIL, (
+                    ValueError, f"{ERROR_MESSAGES['invalid_expression']}. В стеке осталось {depth} элементов")))
+
+        return CompiledExpression(expression, tuple(code))
+
+    def get_compiled(self, expression: str) -> CompiledExpression:
+        """
+        Возвращает скомпилированное выражение из кэша, компилируя его при промахе
 
-        if len(stack) != 1:
-            raise ValueError(f"{ERROR_MESSAGES['invalid_expression']}. В стеке осталось {len(stack)} элементов")
+        Args:
+            expression (str): Выражение в обратной польской нотации (RPN)
 
-        return stack[0]
+        Returns:
+            CompiledExpression: Скомпилированная программа
+        """
+        program = self._program_cache.get(expression)
+        if program is None:
+            program = self.compile(expression)
+            if self._optimizer is not None:
+                program = self._optimizer.build(program)
+            elif self._peephole is not None and self.metrics is None:
+                # С метриками операторы выполняются как записаны, чтобы счётчики совпадали с выражением
+                program = self._peephole(program, self.policy is None or self.policy.time_budget is None)
+            self._program_cache.put(expression, program)
+        return program
+
+    def cache_info(self) -> dict[str, int]:
+        """
+        Возвращает статистику кэша скомпилированных выражений
+
+        Returns:
+            dict[str, int]: Попадания, промахи, вытеснения, размер и ёмкость
+        """
+        return self._program_cache.stats()
+
+    def invalidate_cache(self, expression: Optional[str] = None) -> None:
+        """
+        Сбрасывает кэш скомпилированных выражений и сгенерированных функций
+
+        Args:
+            expression (Optional[str]): Выражение для удаления (None - очистить весь кэш)
+        """
+        self._program_cache.invalidate(expression)
+        self._function_cache.invalidate(expression)
+
+    def memo_info(self) -> dict[str, int]:
+        """
+        Возвращает статистику дедупликации общих подвыражений
+
+        Returns:
+            dict[str, int]: Операторы в выражениях, уникальные узлы, вычисленные операции,
+            попадания в таблицу мемоизации (пустой словарь, если мемоизация выключена)
+        """
+        return self._optimizer.stats() if self._optimizer is not None else {}
+
+    def enable_instrumentation(self) -> 'Instrumentation':
+        """
+        Включает сбор метрик: время фаз, вызовы операторов, ошибки
+
+        Токенизация, проверка скобок, разбор чисел и операторы экземпляра
+        подменяются обёртками с замером времени, кэш программ сбрасывается
+        (в нём хранятся функции операторов без замера). Вычисление всегда
+        идёт через компиляцию, чтобы фазы измерялись по отдельности.
+
+        Returns:
+            Instrumentation: Накопитель метрик (повторный вызов возвращает тот же)
+        """
+        if self.metrics is not None:
+            return self.metrics
+        from instrumentation import Instrumentation
+        metrics = Instrumentation()
+        metrics._cache_stats = self.cache_info
+        self._tokenize = metrics.timed('tokenize', self._tokenize)  # type: ignore[method-assign]
+        self._validate_parentheses = metrics.timed('validate', self._validate_parentheses)  # type: ignore[method-assign]
+        self._parse_number = metrics.timed('parse', self._parse_number)  # type: ignore[method-assign]
+        self.compile = metrics.timed('compile', self.compile)  # type: ignore[method-assign]
+        self._operators = metrics.timed_operators(self._operators)
+        self._program_cache.invalidate()
+        self._function_cache.invalidate()
+        self.metrics = metrics
+        return metrics
+
+    def disable_instrumentation(self) -> None:
+        """Выключает сбор метрик и возвращает методы без замера"""
+        if self.metrics is None:
+            return
+        for name in ('_tokenize', '_validate_parentheses', '_parse_number', 'compile'):
+            del self.__dict__[name]
+        self._operators = self.policy.guard_operators(OPERATOR_FUNCTIONS) if self.policy is not None \
+            else OPERATOR_FUNCTIONS
+        self._program_cache.invalidate()
+        self._function_cache.invalidate()
+        self.metrics = None
+
+    def evaluate_columns(self, expression: str, **arrays: Any) -> Any:
+        """
+        Вычисляет выражение с именованными переменными над столбцами NumPy
+
+        Args:
+            expression (str): Выражение в RPN, например "x y + z *"
+            **arrays (Any): Значения переменных - массивы NumPy
+
+        Returns:
+            numpy.ma.MaskedArray: Результаты построчно, строки с ошибкой замаскированы
+
+        Raises:
+            ImportError: Если numpy не установлен
+            ValueError: При ошибках, общих для всех строк
+        """
+        from vectorized import evaluate_columns
+        return evaluate_columns(self, expression, arrays)
+
+    def compile_function(self, expression: str) -> Callable[..., Number]:
+        """
+        Возвращает функцию Python, сгенерированную из выражения (с кэшем)
+
+        Выражение переводится в исходный код формулы, переменные становятся
+        параметрами: compile_function("x y + 2 /")(3, 4) == 3.5.
+
+        Args:
+            expression (str): Выражение в RPN, переменные задаются именами
+
+        Returns:
+            Callable[..., Number]: Функция; результат и ошибки совпадают с evaluate()
+            для выражения с подставленными значениями
+
+        Raises:
+            ValueError: Если выражение пустое или скобки расставлены некорректно
+        """
+        function = self._function_cache.get(expression)
+        if function is None:
+            from codegen import compile_function
+            function = compile_function(self, expression)
+            self._function_cache.put(expression, function)
+        return function
+
+    def evaluate_many(self, expressions: Iterable[str]) -> Iterator['EvaluationResult']:
+        """
+        Вычисляет выражения по одному, не выбрасывая исключений
+
+        Для каждого выражения возвращается компактная запись: значение или
+        ключ ERROR_MESSAGES с индексом токена, на котором найдена ошибка.
+        Текст ошибки формируется только при обращении к EvaluationResult.message.
+
+        Args:
+            expressions (Iterable[str]): Выражения в RPN
+
+        Returns:
+            Iterator[EvaluationResult]: Результаты в порядке входа (вычисляются лениво)
+        """
+        from bulk import evaluate_many
+        return evaluate_many(self, expressions)
+
+    def evaluate_file(self, path: str) -> Union[int, float]:
+        """
+        Вычисляет одно выражение из файла без загрузки его в память
+
+        Файл отображается в память, токены читаются лениво из байтов,
+        скобки проверяются и выражение вычисляется за один проход, поэтому
+        память растёт с глубиной стека, а не с размером файла.
+
+        Args:
+            path (str): Путь к файлу с выражением в RPN
+
+        Returns:
+            Union[int, float]: Результат вычисления (как evaluate() для текста файла)
+
+        Raises:
+            OSError: Если файл не удаётся открыть или отобразить в память
+            ValueError: При ошибках в выражении или вычислении
+            ZeroDivisionError: При делении на ноль
+        """
+        from streaming import evaluate_file
+        if self.metrics is not None:
+            return self.metrics.observe_evaluation(
+                lambda name: evaluate_file(name, self._operators, self.policy), path)
+        return evaluate_file(path, self._operators, self.policy)
+
+    def evaluate(self, expression: str) -> Union[int, float]:
+        """
+        Вычисляет выражение в обратной польской нотации
+
+        Если кэш включён, задана политика ресурсов, мемоизация или метрики,
+        выражение компилируется один раз и далее выполняется из LRU-кэша
+        скомпилированных программ, иначе вычисляется однопроходным движком.
+        С мемоизацией одинаковые поддеревья вычисляются один раз, а их
+        результаты переиспользуются между вызовами.
+
+        Args:
+            expression (str): Выражение в обратной польской нотации (RPN)
+
+        Returns:
+            Union[int, float]: Результат вычисления
+
+        Raises:
+            ValueError: При ошибках в выражении или вычислении
+            ZeroDivisionError: При делении на ноль
+        """
+        if self.metrics is not None:
+            return self.metrics.observe_evaluation(self._evaluate_compiled, expression)
+        if self._program_cache.maxsize or self.policy is not None or self._optimizer is not None:
+            return self._evaluate_compiled(expression)
+
+        return evaluate_fused(expression, OPERATOR_FUNCTIONS, self._parse_number)
+
+    def _evaluate_compiled(self, expression: str) -> Union[int, float]:
+        """
+        Вычисляет выражение через (кэшированную) компиляцию с бюджетом времени политики
+
+        Args:
+            expression (str): Выражение в обратной польской нотации (RPN)
+
+        Returns:
+            Union[int, float]: Результат вычисления
+        """
+        policy = self.policy
+        if policy is not None and policy.time_budget is not None:
+            deadline = time.perf_counter() + policy.time_budget
+            return self.get_compiled(expression).run(deadline)
+        return self.get_compiled(expression).run()
@@ -0,0 +1,325 @@
+"""
+Кодогенерация: перевод RPN выражения в функцию Python
+
+Выражение переводится в исходный код одной вложенной арифметической формулы,
+именованные переменные становятся параметрами функции:
+'x y + 2 /' -> 'def rpn(x, y): return ((x + y) / 2)'. Исходный код компилируется
+встроенной compile() один раз, далее вычисление - вызов функции без стека
+и разбора токенов.
+
+Операторы реестра '+', '-', '*', '/', '**' и 'neg' записываются операциями
+Python, остальные ('//', '%', 'powmod', свёртки групп, операторы с проверкой
+лимита max_bits) - вызовами функций калькулятора с их проверками целых
+операндов и деления на ноль. Если формула выбрасывает исключение, выражение
+вычисляется повторно проверяемым вариантом, где каждая операция вызывается
+отдельно: тексты ошибок и их порядок совпадают с evaluate(). С бюджетом
+времени политики или метриками функция сразу выполняет проверяемый вариант.
+
+Глубокие выражения делятся на присваивания временным переменным, чтобы
+вложенность скобок не превышала ограничений компилятора Python.
+"""
+
+import keyword
+import re
+import time
+from typing import Any, Callable, Optional
+from calculator import OP_APPLY, OP_CALL, OP_FAIL, OP_PUSH, RPNCalculator
+from constants import ERROR_MESSAGES, VARIABLE_PATTERN
+from limits import limit_error
+from registry import ARITIES, OPERATOR_FUNCTIONS, VARIADIC, describe_operation
+
+VARIABLE_RE = re.compile(VARIABLE_PATTERN)
+
+# Инструкция чтения параметра (аргумент - имя переменной)
+OP_LOAD = 4
+
+# Префикс имён сгенерированного кода; переменные с таким префиксом не допускаются
+PREFIX = '_rpn_'
+
+# Операторы, записываемые операциями Python (если функция - из реестра)
+NATIVE_OPERATORS = {'+': '+', '-': '-', '*': '*', '/': '/', '**': '**'}
+
+# Наибольшая вложенность формулы; глубже подвыражение присваивается временной переменной
+MAX_NESTING = 40
+
+# Целые литералы короче этого размера в битах записываются в исходный код
+_INLINE_BITS = 64
+
+
+def _checked(symbol: str, function: Callable[..., Any], reduce: bool) -> Callable[..., Any]:
+    """
+    Оборачивает оператор проверками CompiledExpression.run()
+
+    Args:
+        symbol (str): Символ оператора
+        function (Callable[..., Any]): Функция оператора
+        reduce (bool): Передавать операнды списком (свёртка VARIADIC)
+
+    Returns:
+        Callable[..., Any]: Функция (момент прерывания или None, операнды...)
+    """
+    clock = time.perf_counter
+
+    def apply(deadline: Optional[float], *operands: Any) -> Any:
+        if deadline is not None and clock() > deadline:
+            raise limit_error("время вычисления превысило бюджет")
+        try:
+            return function(list(operands)) if reduce else function(*operands)
+        except (ValueError, ZeroDivisionError):
+            raise
+        except Exception as e:
+            raise ValueError(f"Ошибка при выполнении операции {describe_operation(symbol, operands)}: {str(e)}")
+
+    return apply
+
+
+def translate(calculator: RPNCalculator, expression: str) -> tuple[list[tuple[int, Any]], list[str]]:
+    """
+    Переводит выражение в инструкции с чтением переменных
+
+    Проверки и порядок ошибок совпадают с RPNCalculator.compile(): ошибка
+    токена или нехватка операндов записывается инструкцией OP_FAIL в точке
+    обнаружения, превышение лимитов политики - программа из одной ошибки.
+
+    Args:
+        calculator (RPNCalculator): Калькулятор (токенизация, операторы и политика)
+        expression (str): Выражение в RPN, переменные задаются именами
+
+    Returns:
+        tuple[list[tuple[int, Any]], list[str]]: Инструкции и имена параметров
+        в порядке первого появления
+
+    Raises:
+        ValueError: Если выражение пустое или скобки расставлены некорректно
+    """
+    if not expression.strip():
+        raise ValueError(ERROR_MESSAGES['empty_expression'])
+
+    tokens = calculator._tokenize(expression)
+    policy = calculator.policy
+    # Имена, которые нельзя сделать параметрами (ключевые слова, префикс), - некорректные токены
+    parameters = list(dict.fromkeys(token for token in tokens if token not in calculator.supported_operators
+                                    and VARIABLE_RE.fullmatch(token) and not keyword.iskeyword(token)
+                                    and not token.startswith(PREFIX)))
+    if policy is not None:
+        error = policy.check_tokens(len(tokens))
+        if error is not None:
+            return [(OP_FAIL, (ValueError, str(error)))], parameters
+    calculator._validate_parentheses(tokens)
+    operators = calculator._operators
+    names = set(parameters)
+    code: list[tuple[int, Any]] = []
+    depth = 0
+    bases: list[int] = []
+
+    for token in tokens:
+        if token == '(':
+            bases.append(depth)
+            continue
+        if token == ')':
+            bases.pop()
+            continue
+        if token in calculator.supported_operators:
+            arity = ARITIES[token]
+            count = depth - (bases[-1] if bases else 0) if arity == VARIADIC else arity
+            if depth < arity or count < 1:
+                code.append((OP_FAIL, (ValueError, f"{ERROR_MESSAGES['insufficient_operands']} '{token}'")))
+                break
+            if arity == 2:
+                code.append((OP_APPLY, (token, operators[token])))
+            else:
+                code.append((OP_CALL, (token, operators[token], count, arity == VARIADIC)))
+            depth -= count - 1
+            continue
+        value: Any = None
+        if token in names:
+            code.append((OP_LOAD, token))
+        else:
+            try:
+                value = calculator._parse_number(token)
+            except ValueError:
+                code.append((OP_FAIL, (ValueError, f"{ERROR_MESSAGES['invalid_token']}: {token}")))
+                break
+            code.append((OP_PUSH, value))
+        depth += 1
+        if policy is not None:
+            error = policy.check_depth(depth)
+            if error is None and policy.max_bits is not None and isinstance(value, int) \
+                    and value.bit_length() > policy.max_bits:
+                error = limit_error(f"результат больше {policy.max_bits} бит")
+            if error is not None:
+                return [(OP_FAIL, (ValueError, str(error)))], parameters
+    else:
+        if depth != 1:
+            code.append((OP_FAIL, (
+                ValueError, f"{ERROR_MESSAGES['invalid_expression']}. В стеке осталось {depth} элементов")))
+
+    return code, parameters
+
+
+
+class _Body:
+    """
+    Тело сгенерированной функции: присваивания временным переменным и итоговая формула
+    """
+
+    def __init__(self, namespace: dict[str, Any], bound: dict[Any, str], deadline: Optional[str]) -> None:
+        """
+        Инициализация тела
+
+        Args:
+            namespace (dict[str, Any]): Глобальные имена сгенерированного кода (пополняются)
+            bound (dict[Any, str]): Уже добавленные значения: ключ -> глобальное имя
+            deadline (Optional[str]): Имя момента прерывания для проверяемого варианта
+                ('None' - без бюджета), None - формула с операциями Python
+        """
+        self.namespace = namespace
+        self.bound = bound
+        self.deadline = deadline
+        self.lines: list[str] = []
+        # Элемент стека: (текст формулы, вложенность, содержит ли невычисленные операции)
+        self.stack: list[tuple[str, int, bool]] = []
+
+    def bind(self, key: Any, value: Any) -> str:
+        """Возвращает глобальное имя значения, добавляя его в пространство имён"""
+        name = self.bound.get(key)
+        if name is None:
+            name = self.bound[key] = f"{PREFIX}{key[0]}{len(self.bound)}"
+            self.namespace[name] = value
+        return name
+
+    def literal(self, value: Any) -> str:
+        """Текст литерала: небольшие целые и конечные float - в коде, остальные - глобальным именем"""
+        if type(value) is int and value.bit_length() <= _INLINE_BITS or type(value) is float and value - value == 0:
+            text = repr(value)
+            return f"({text})" if text.startswith('-') else text
+        return self.bind(('k', id(value)), value)
+
+    def spill_pending(self) -> None:
+        """Присваивает невычисленные формулы стека временным переменным в порядке вычисления"""
+        for index, (text, _, pending) in enumerate(self.stack):
+            if pending:
+                name = f"{PREFIX}t{len(self.lines)}"
+                self.lines.append(f"{name} = {text}")
+                self.stack[index] = (name, 0, False)
+
+    def operation(self, symbol: str, function: Callable[..., Any], count: int, reduce: bool) -> None:
+        """Снимает операнды со стека и кладёт формулу операции"""
+        operands = self.stack[-count:]
+        del self.stack[-count:]
+        texts = [text for text, _, _ in operands]
+        plain = function is OPERATOR_FUNCTIONS[symbol]
+        if self.deadline is not None:
+            name = self.bind(('c', symbol, function, reduce), _checked(symbol, function, reduce))
+            text = f"{name}({', '.join([self.deadline, *texts])})"
+        elif plain and symbol in NATIVE_OPERATORS:
+            text = f"({texts[0]} {NATIVE_OPERATORS[symbol]} {texts[1]})"
+        elif plain and symbol == 'neg':
+            text = f"(-{texts[0]})"
+        elif reduce:
+            text = f"{self.bind(('f', function), function)}([{', '.join(texts)}])"
+        else:
+            text = f"{self.bind(('f', function), function)}({', '.join(texts)})"
+        nesting = max(level for _, level, _ in operands) + 1
+        self.stack.append((text, nesting, True))
+        if nesting > MAX_NESTING:
+            self.spill_pending()
+
+    def build(self, code: list[tuple[int, Any]]) -> str:
+        """
+        Переводит инструкции в строки тела
+
+        Args:
+            code (list[tuple[int, Any]]): Инструкции translate()
+
+        Returns:
+            str: Завершающая строка - 'return формула' или 'raise ошибка'
+        """
+        for opcode, arg in code:
+            if opcode == OP_PUSH:
+                self.stack.append((self.literal(arg), 0, False))
+            elif opcode == OP_LOAD:
+                self.stack.append((arg, 0, False))
+            elif opcode == OP_APPLY:
+                self.operation(arg[0], arg[1], 2, False)
+            elif opcode == OP_CALL:
+                self.operation(*arg)
+            else:
+                # Операции до ошибки выполняются: их ошибки имеют приоритет, как в run()
+                self.spill_pending()
+                error_type, message = arg
+                return f"raise {self.bind(('e', error_type), error_type)}({message!r})"
+        return f"return {self.stack[0][0]}"
+
+
+def generate(calculator: RPNCalculator, expression: str) -> tuple[str, dict[str, Any]]:
+    """
+    Генерирует исходный код функции rpn для выражения
+
+    Args:
+        calculator (RPNCalculator): Калькулятор (токенизация, операторы и политика)
+        expression (str): Выражение в RPN, переменные задаются именами
+
+    Returns:
+        tuple[str, dict[str, Any]]: Исходный код и глобальные имена для его выполнения
+
+    Raises:
+        ValueError: Если выражение пустое или скобки расставлены некорректно
+    """
+    code, parameters = translate(calculator, expression)
+    signature = ', '.join(parameters)
+    namespace: dict[str, Any] = {}
+    bound: dict[Any, str] = {}
+    policy = calculator.policy
+    budget = policy.time_budget if policy is not None else None
+
+    checked = _Body(namespace, bound, f"{PREFIX}deadline" if budget is not None else 'None')
+    last = checked.build(code)
+    lines = [f"def {PREFIX}checked({signature}):"]
+    if budget is not None:
+        namespace[f"{PREFIX}clock"] = time.perf_counter
+        lines.append(f"    {PREFIX}deadline = {PREFIX}clock() + {budget!r}")
+    lines += [f"    {line}" for line in checked.lines] + [f"    {last}"]
+    if budget is not None or calculator.metrics is not None:
+        # Каждая операция проверяет бюджет и проходит через функции с замером времени
+        lines.append(f"rpn = {PREFIX}checked")
+        return '\n'.join(lines) + '\n', namespace
+
+    fast = _Body(namespace, bound, None)
+    last = fast.build(code)
+    lines.append(f"def rpn({signature}):")
+    if last.startswith('raise') and not fast.lines:
+        lines.append(f"    {last}")
+        return '\n'.join(lines) + '\n', namespace
+    # Формула без проверок; при исключении ошибку воспроизводит проверяемый вариант
+    lines.append("    try:")
+    lines += [f"        {line}" for line in fast.lines]
+    fallback = ["    except Exception:", f"        return {PREFIX}checked({signature})"]
+    if last.startswith('return'):
+        lines += [f"        {last}"] + fallback
+    else:
+        lines += fallback + [f"    {last}"]
+    return '\n'.join(lines) + '\n', namespace
+
+
+def compile_function(calculator: RPNCalculator, expression: str) -> Callable[..., Any]:
+    """
+    Компилирует выражение в функцию Python встроенной compile()
+
+    Args:
+        calculator (RPNCalculator): Калькулятор (токенизация, операторы и политика)
+        expression (str): Выражение в RPN, например "x y + 2 /"
+
+    Returns:
+        Callable[..., Any]: Функция с параметрами-переменными в порядке первого
+        появления; результат и ошибки вызова совпадают с evaluate() для выражения
+        с подставленными значениями
+
+    Raises:
+        ValueError: Если выражение пустое или скобки расставлены некорректно
+    """
+    source, namespace = generate(calculator, expression)
+    exec(compile(source, f"<rpn {expression[:40]!r}>", 'exec'), namespace)
+    function: Callable[..., Any] = namespace['rpn']
+    function.__doc__ = expression
+    return function
@@ -0,0 +1,339 @@
+"""
+Бинарный колоночный формат результатов пакетного вычисления
+
+Результаты пишутся типизированными столбцами вместо строк текста, поэтому
+ни форматирование при записи, ни разбор при чтении не нужны. Файл (все
+числа little-endian):
+
+    заголовок   16 байт: MAGIC, версия формата (uint32), резерв (uint32)
+    значения    rows * 8 байт: int64 или float64 - по статусу строки
+    статусы     rows байт uint8, выравнивание нулями до 8 байт
+    приложение  записи: длина (uint32) и байты, выравнивание нулями до 8 байт
+    трейлер     40 байт: rows, смещение статусов, смещение приложения,
+                размер приложения (uint64), MAGIC
+
+Статус строки: STATUS_INT - значение int64, STATUS_FLOAT - float64,
+STATUS_BIGINT - целое вне int64, STATUS_OTHER - прочий результат
+(например, комплексный) текстом, ERROR_BASE + номер ключа ERROR_CODES -
+ошибка. Для трёх последних столбец значений хранит смещение записи
+в приложении: байты целого (int.to_bytes, signed) или текст UTF-8
+(результат или сообщение об ошибке).
+
+Запись идёт порциями через буфер: столбец значений - сразу в файл,
+статусы и приложение - во временные файлы, которые дописываются при
+закрытии. Чтение отображает файл в память (mmap) и возвращает столбцы
+как memoryview (или массивы NumPy) без копирования.
+"""
+
+import importlib
+import mmap
+import shutil
+import struct
+import sys
+import tempfile
+from typing import IO, Any, Iterable, Iterator, Optional, Union
+from bulk import parse_number
+from constants import ERROR_MESSAGES
+from instrumentation import OPERATION_ERROR, error_key
+
+Number = Union[int, float]
+
+MAGIC = b'RPNCOLS\x00'
+FORMAT_VERSION = 1
+
+STATUS_INT = 0
+STATUS_FLOAT = 1
+STATUS_BIGINT = 2
+STATUS_OTHER = 3
+ERROR_BASE = 128
+
+# Коды ошибок: ERROR_BASE + позиция ключа (новые ключи добавляются только в конец)
+ERROR_CODES: tuple[str, ...] = (*ERROR_MESSAGES, OPERATION_ERROR)
+
+# Количество строк в буфере перед записью порции
+CHUNK_ROWS = 65536
+
+# Размер временных файлов статусов и приложения, до которого они хранятся в памяти
+SPOOL_SIZE = 64 * 1024 * 1024
+
+_HEADER = struct.Struct('<8sII')
+_TRAILER = struct.Struct('<QQQQ8s')
+_LENGTH = struct.Struct('<I')
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+_ERROR_STATUS = {key: ERROR_BASE + index for index, key in enumerate(ERROR_CODES)}
+
+
+def _padding(size: int) -> bytes:
+    """Нули до границы 8 байт"""
+    return bytes(-size % 8)
+
+
+class ColumnarWriter:
+    """
+    Потоковая запись результатов в колоночный файл
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Создаёт файл и записывает заголовок
+
+        Args:
+            path (str): Путь к файлу результатов
+
+        Raises:
+            OSError: Если файл не удаётся создать
+        """
+        if sys.byteorder != 'little':
+            raise OSError("Колоночный формат поддерживается только на little-endian платформах")
+        self.path = path
+        self.rows = 0
+        self.errors = 0
+        self._file: IO[bytes] = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+        self._status: IO[bytes] = tempfile.SpooledTemporaryFile(SPOOL_SIZE)
+        self._sidecar: IO[bytes] = tempfile.SpooledTemporaryFile(SPOOL_SIZE)
+        self._sidecar_size = 0
+        # Порция значений: один буфер, видимый как int64 и как float64
+        self._values = bytearray(8 * CHUNK_ROWS)
+        self._ints = memoryview(self._values).cast('q')
+        self._floats = memoryview(self._values).cast('d')
+        self._statuses = bytearray(CHUNK_ROWS)
+        self._filled = 0
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _side(self, data: bytes) -> int:
+        """Дописывает запись приложения и возвращает её смещение"""
+        offset = self._sidecar_size
+        self._sidecar.write(_LENGTH.pack(len(data)))
+        self._sidecar.write(data)
+        self._sidecar_size += _LENGTH.size + len(data)
+        return offset
+
+    def append(self, ok: bool, value: Union[Number, str]) -> None:
+        """
+        Добавляет строку результата
+
+        Args:
+            ok (bool): Признак успешного вычисления
+            value (Union[Number, str]): Результат или текст ошибки (результат из
+                постоянного кэша - строка, она разбирается обратно в число)
+        """
+        index = self._filled
+        if type(value) is float:
+            status = STATUS_FLOAT
+            self._floats[index] = value
+        elif type(value) is int:
+            if _INT64_MIN <= value <= _INT64_MAX:
+                status = STATUS_INT
+                self._ints[index] = value
+            else:
+                status = STATUS_BIGINT
+                data = value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+                self._ints[index] = self._side(data)
+        elif not ok:
+            self.errors += 1
+            text = str(value)
+            status = _ERROR_STATUS[error_key(text)]
+            self._ints[index] = self._side(text.encode())
+        else:
+            # Строка результата из постоянного кэша: str() целого или float ('1e+16', 'inf')
+            text = str(value)
+            number = parse_number(text)
+            if number is None:
+                try:
+                    number = float(text)
+                except ValueError:
+                    pass
+            if number is not None:
+                self.append(ok, number)
+                return
+            status = STATUS_OTHER
+            self._ints[index] = self._side(text.encode())
+        self._statuses[index] = status
+        self._filled = index + 1
+        if self._filled == CHUNK_ROWS:
+            self.flush()
+
+    def extend(self, results: Iterable[tuple[bool, Union[Number, str]]]) -> None:
+        """Добавляет строки результатов (успех, результат или текст ошибки)"""
+        ints = self._ints
+        floats = self._floats
+        statuses = self._statuses
+        append = self.append
+        # Основной поток - float и int64 - записывается без вызова append()
+        for ok, value in results:
+            index = self._filled
+            if type(value) is float:
+                floats[index] = value
+                statuses[index] = STATUS_FLOAT
+            elif type(value) is int and _INT64_MIN <= value <= _INT64_MAX:
+                ints[index] = value
+                statuses[index] = STATUS_INT
+            else:
+                append(ok, value)
+                continue
+            self._filled = index + 1
+            if self._filled == CHUNK_ROWS:
+                self.flush()
+
+    def __len__(self) -> int:
+        return self.rows + self._filled
+
+    def flush(self) -> None:
+        """Записывает накопленную порцию"""
+        filled = self._filled
+        if filled:
+            self._file.write(memoryview(self._values)[:8 * filled])
+            self._status.write(memoryview(self._statuses)[:filled])
+            self.rows += filled
+            self._filled = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        """Дописывает статусы, приложение и трейлер и закрывает файл"""
+        if self._file.closed:
+            return
+        try:
+            self.flush()
+            status_offset = self._file.tell()
+            self._status.seek(0)
+            shutil.copyfileobj(self._status, self._file)
+            self._file.write(_padding(self.rows))
+            sidecar_offset = self._file.tell()
+            self._sidecar.seek(0)
+            shutil.copyfileobj(self._sidecar, self._file)
+            self._file.write(_padding(self._sidecar_size))
+            self._file.write(_TRAILER.pack(self.rows, status_offset, sidecar_offset, self._sidecar_size, MAGIC))
+        finally:
+            self._ints.release()
+            self._floats.release()
+            self._status.close()
+            self._sidecar.close()
+            self._file.close()
+
+
+class ColumnarReader:
+    """
+    Чтение колоночного файла через отображение в память без копирования
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Отображает файл в память и проверяет заголовок и трейлер
+
+        Args:
+            path (str): Путь к файлу результатов
+
+        Raises:
+            OSError: Если файл не удаётся открыть
+            ValueError: Если файл не в колоночном формате (или не дописан)
+        """
+        with open(path, 'rb') as file:
+            size = file.seek(0, 2)
+            if size < _HEADER.size + _TRAILER.size:
+                raise ValueError(f"Файл не в колоночном формате: {path}")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = _HEADER.unpack_from(self._map, 0)
+        rows, status_offset, sidecar_offset, sidecar_size, end = _TRAILER.unpack_from(self._map, size - _TRAILER.size)
+        if magic != MAGIC or end != MAGIC or version != FORMAT_VERSION \
+                or status_offset != _HEADER.size + 8 * rows or sidecar_offset + sidecar_size > size:
+            self._map.close()
+            raise ValueError(f"Файл не в колоночном формате: {path}")
+        self.rows = rows
+        buffer = memoryview(self._map)
+        #: Статусы строк (uint8)
+        self.status = buffer[status_offset:status_offset + rows]
+        #: Значения строк со статусом STATUS_INT (int64)
+        self.ints = buffer[_HEADER.size:status_offset].cast('q')
+        #: Значения строк со статусом STATUS_FLOAT (float64) - та же память, что ints
+        self.floats = buffer[_HEADER.size:status_offset].cast('d')
+        self._sidecar = buffer[sidecar_offset:sidecar_offset + sidecar_size]
+        # Представления освобождаются при закрытии (базовое - последним)
+        self._views: list[Any] = [buffer, self.status, self.ints, self.floats, self._sidecar]
+
+    def __enter__(self) -> 'ColumnarReader':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _side(self, offset: int) -> bytes:
+        """Байты записи приложения по смещению"""
+        (length,) = _LENGTH.unpack_from(self._sidecar, offset)
+        start = offset + _LENGTH.size
+        return bytes(self._sidecar[start:start + length])
+
+    def error(self, index: int) -> Optional[str]:
+        """Ключ ERROR_CODES ошибки строки (None при успехе)"""
+        status = self.status[index]
+        return ERROR_CODES[status - ERROR_BASE] if status >= ERROR_BASE else None
+
+    def __getitem__(self, index: int) -> tuple[bool, Union[Number, str]]:
+        """
+        Возвращает строку результата
+
+        Args:
+            index (int): Номер строки
+
+        Returns:
+            tuple[bool, Union[Number, str]]: (успех, результат или текст ошибки);
+            результат STATUS_OTHER - текст, как в текстовом выводе
+        """
+        status = self.status[index]
+        if status == STATUS_INT:
+            return True, self.ints[index]
+        if status == STATUS_FLOAT:
+            return True, self.floats[index]
+        data = self._side(self.ints[index])
+        if status == STATUS_BIGINT:
+            return True, int.from_bytes(data, 'little', signed=True)
+        return status == STATUS_OTHER, data.decode()
+
+    def __iter__(self) -> Iterator[tuple[bool, Union[Number, str]]]:
+        for index in range(self.rows):
+            yield self[index]
+
+    def arrays(self) -> tuple[Any, Any, Any]:
+        """
+        Возвращает столбцы массивами NumPy без копирования
+
+        Returns:
+            tuple[Any, Any, Any]: (статусы uint8, значения int64, значения float64)
+
+        Raises:
+            ImportError: Если numpy не установлен
+        """
+        try:
+            np = importlib.import_module('numpy')
+        except ImportError:
+            raise ImportError("Для чтения столбцов массивами требуется пакет numpy")
+        rows, status_offset = self.rows, _HEADER.size + 8 * self.rows
+        return (np.frombuffer(self._map, dtype=np.uint8, count=rows, offset=status_offset),
+                np.frombuffer(self._map, dtype='<i8', count=rows, offset=_HEADER.size),
+                np.frombuffer(self._map, dtype='<f8', count=rows, offset=_HEADER.size))
+
+    def close(self) -> None:
+        """
+        Освобождает представления и отображение файла
+
+        Массивы arrays(), которые ещё используются, продолжают держать
+        отображение: оно освобождается вместе с ними. Представления status,
+        ints и floats после закрытия недействительны.
+        """
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
@@ -9,7 +9,15 @@ SUPPORTED_OPERATORS = {
     '/': 'Деление',
     '//': 'Целочисленное деление',
     '%': 'Остаток от деления',
-    '**': 'Возведение в степень'
+    '**': 'Возведение в степень',
+    'neg': 'Смена знака (унарный)',
+    'abs': 'Модуль (унарный)',
+    'powmod': 'Степень по модулю: a b m powmod = a**b % m',
+    'sum': 'Сумма всех операндов группы',
+    'prod': 'Произведение всех операндов группы',
+    'min': 'Минимум операндов группы',
+    'max': 'Максимум операндов группы',
+    'mean': 'Среднее операндов группы'
 }
 
 ERROR_MESSAGES = {
@@ -21,5 +29,13 @@ ERROR_MESSAGES = {
     'invalid_expression': 'Некорректное выражение',
     'unmatched_parentheses': 'Несбалансированные скобки',
     'empty_parentheses': 'Пустые скобки',
-    'incomplete_expression_in_parentheses': 'Незавершенное выражение в скобках'
+    'incomplete_expression_in_parentheses': 'Незавершенное выражение в скобках',
+    'unknown_variable': 'Неизвестная переменная',
+    'resource_limit_exceeded': 'Превышен лимит ресурсов'
 }
+
+# Токен - одиночная скобка или последовательность символов без пробелов и скобок
+TOKEN_PATTERN = r'[()]|[^\s()]+'
+
+# Имя переменной - идентификатор из латинских букв, цифр и подчёркиваний
+VARIABLE_PATTERN = r'[A-Za-z_][A-Za-z0-9_]*'
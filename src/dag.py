@@ -0,0 +1,215 @@
+"""
+Общие подвыражения RPN выражений: DAG с хэш-консингом и мемоизация
+
+Скомпилированная программа превращается в ориентированный ациклический граф:
+одинаковые поддеревья (в том числе повторяющиеся группы в скобках вроде
+'(3 4 + 5 *)') получают один узел и вычисляются один раз за вычисление.
+Узлы интернируются в общей таблице оптимизатора, поэтому одно и то же
+поддерево в разных выражениях имеет один номер, а его результат хранится
+в ограниченной таблице мемоизации и переиспользуется между вызовами.
+Порядок вычисления узлов - порядок их первого появления в выражении,
+поэтому первая ошибка и её текст совпадают с обычным вычислением.
+"""
+
+import time
+from itertools import count
+from typing import Any, Callable, Optional, Union
+from cache import LRUCache
+from calculator import OP_APPLY, OP_CALL, OP_PUSH, CompiledExpression
+from limits import limit_error
+from registry import describe_operation
+
+Number = Union[int, float]
+
+# Узел-операция программы: (позиция, номер узла, символ, функция, позиции операндов, свёртка списка)
+Operation = tuple[int, int, str, Callable[..., Any], tuple[int, ...], bool]
+
+
+def _literal_key(value: Number) -> tuple[Any, ...]:
+    """Ключ литерала: 1 и 1.0, 0.0 и -0.0 - разные узлы"""
+    if isinstance(value, float):
+        return ('#', float, repr(value))
+    return ('#', int, value)
+
+
+class DagProgram(CompiledExpression):
+    """
+    Программа, вычисляющая каждый уникальный узел DAG один раз
+    """
+
+    __slots__ = ('values', 'operations', 'applies', 'failure', 'root', 'optimizer')
+
+    def __init__(self, program: CompiledExpression, values: list[Optional[Number]], operations: tuple[Operation, ...],
+                 applies: int, root: int, failure: Optional[tuple[type, str]], optimizer: 'DagOptimizer') -> None:
+        """
+        Инициализация программы
+
+        Args:
+            program (CompiledExpression): Исходная программа
+            values (list[Optional[Number]]): Значения узлов-литералов (None на местах операций)
+            operations (tuple[Operation, ...]): Уникальные операции в порядке первого появления
+            applies (int): Количество операторов в исходной программе
+            root (int): Позиция узла-результата
+            failure (Optional[tuple[type, str]]): Ошибка компиляции, выбрасываемая после операций
+            optimizer (DagOptimizer): Оптимизатор с таблицей мемоизации
+        """
+        super().__init__(program.expression, program.code)
+        self.values = values
+        self.operations = operations
+        self.applies = applies
+        self.failure = failure
+        self.root = root
+        self.optimizer = optimizer
+
+    def __repr__(self) -> str:
+        return (f"DagProgram({self.expression!r}, {self.applies} операторов, "
+                f"{len(self.operations)} уникальных)")
+
+    def run(self, deadline: Optional[float] = None) -> Number:
+        """
+        Выполняет программу, беря результаты узлов из таблицы мемоизации
+
+        Args:
+            deadline (Optional[float]): Момент time.perf_counter(), после которого
+                вычисление прерывается (проверяется перед каждым оператором)
+
+        Returns:
+            Number: Результат вычисления
+
+        Raises:
+            ValueError: При ошибках в выражении, вычислении или превышении бюджета времени
+            ZeroDivisionError: При делении на ноль
+        """
+        optimizer = self.optimizer
+        memo = optimizer.memo
+        clock = time.perf_counter
+        values = list(self.values)
+        computed = 0
+        operands: list[Any] = []
+        symbol = ''
+        try:
+            for position, node, symbol, function, arguments, reduce in self.operations:
+                value = memo.get(node)
+                if value is None:
+                    if deadline is not None and clock() > deadline:
+                        raise limit_error("время вычисления превысило бюджет")
+                    operands = [values[index] for index in arguments]
+                    value = function(operands) if reduce else function(*operands)
+                    computed += 1
+                    memo.put(node, value)
+                values[position] = value
+        except (ValueError, ZeroDivisionError):
+            raise
+        except Exception as e:
+            raise ValueError(f"Ошибка при выполнении операции {describe_operation(symbol, operands)}: {str(e)}")
+        finally:
+            optimizer.evaluations += 1
+            optimizer.applies += self.applies
+            optimizer.unique += len(self.operations)
+            optimizer.computed += computed
+        if self.failure is not None:
+            error_type, message = self.failure
+            raise error_type(message)
+        return values[self.root]  # type: ignore[return-value]
+
+
+class DagOptimizer:
+    """
+    Таблица интернированных узлов и ограниченная таблица мемоизации результатов
+    """
+
+    def __init__(self, memo_size: int = 4096) -> None:
+        """
+        Инициализация оптимизатора
+
+        Args:
+            memo_size (int): Максимальное количество запомненных результатов поддеревьев
+                (таблица узлов в 4 раза больше)
+
+        Raises:
+            ValueError: Если размер таблицы не положительный
+        """
+        if memo_size <= 0:
+            raise ValueError("Размер таблицы мемоизации должен быть положительным")
+        self.memo: LRUCache[int, Number] = LRUCache(memo_size)
+        self._nodes: LRUCache[tuple[Any, ...], int] = LRUCache(4 * memo_size)
+        # Номера узлов не переиспользуются: вытесненное поддерево получит новый номер
+        self._ids = count()
+        self.evaluations = 0
+        self.applies = 0
+        self.unique = 0
+        self.computed = 0
+
+    def build(self, program: CompiledExpression) -> DagProgram:
+        """
+        Строит DAG скомпилированной программы
+
+        Args:
+            program (CompiledExpression): Программа
+
+        Returns:
+            DagProgram: Программа над уникальными узлами
+        """
+        nodes = self._nodes
+        local: dict[tuple[Any, ...], int] = {}
+        ids: list[int] = []
+        values: list[Optional[Number]] = []
+        operations: list[Operation] = []
+        stack: list[int] = []
+        applies = 0
+        failure: Optional[tuple[type, str]] = None
+
+        for opcode, arg in program.code:
+            if opcode == OP_PUSH:
+                key = _literal_key(arg)
+            elif opcode == OP_APPLY or opcode == OP_CALL:
+                applies += 1
+                count = 2 if opcode == OP_APPLY else arg[2]
+                arguments = tuple(stack[-count:])
+                del stack[-count:]
+                key = (arg[0], *(ids[index] for index in arguments))
+            else:
+                failure = arg
+                break
+            position = local.get(key)
+            if position is None:
+                node = nodes.get(key)
+                if node is None:
+                    node = next(self._ids)
+                    nodes.put(key, node)
+                position = local[key] = len(values)
+                ids.append(node)
+                if opcode == OP_PUSH:
+                    values.append(arg)
+                else:
+                    values.append(None)
+                    operations.append((position, node, arg[0], arg[1], arguments, opcode == OP_CALL and arg[3]))
+            stack.append(position)
+
+        root = stack[0] if failure is None else -1
+        return DagProgram(program, values, tuple(operations), applies, root, failure, self)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает статистику дедупликации
+
+        Returns:
+            dict[str, int]: Вычисления, операторы в выражениях, уникальные узлы,
+            фактически вычисленные операции, попадания и размер таблицы мемоизации
+        """
+        memo = self.memo.stats()
+        return {
+            'evaluations': self.evaluations,
+            'applies': self.applies,
+            'unique': self.unique,
+            'computed': self.computed,
+            'deduplicated': self.applies - self.unique,
+            'memo_hits': memo['hits'],
+            'memo_size': memo['size'],
+            'memo_maxsize': memo['maxsize'],
+        }
+
+    def clear(self) -> None:
+        """Очищает таблицы узлов и мемоизации"""
+        self.memo.invalidate()
+        self._nodes.invalidate()
@@ -0,0 +1,186 @@
+"""
+Однопроходный движок вычисления RPN выражений
+
+Токенизация, проверка скобок и вычисление выполняются за один проход по строке.
+Проверка групп в скобках линейная: при открытии скобки запоминается
+структурная глубина стека, при закрытии сравнивается с текущей.
+"""
+
+import re
+import sys
+from typing import Any, Callable, Iterator, Union
+from constants import ERROR_MESSAGES, TOKEN_PATTERN
+from registry import ARITIES, VARIADIC, describe_operation, required_operands
+
+Number = Union[int, float]
+
+TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+# База глубины вне скобок: разность с ней никогда не меньше 2
+_NO_GROUP = -sys.maxsize
+
+
+def incomplete_group_error(inner_text: str) -> ValueError:
+    """
+    Формирует ошибку незавершённого выражения в скобках
+
+    Args:
+        inner_text (str): Текст между скобками
+
+    Returns:
+        ValueError: Ошибка с перечислением токенов группы
+    """
+    inner_tokens = ' '.join(TOKEN_RE.findall(inner_text))
+    return ValueError(f"{ERROR_MESSAGES['incomplete_expression_in_parentheses']}: {inner_tokens}")
+
+
+def _close_group(groups: list[list[Any]], depth: int, last_open: bool, expression: str, end: int) -> None:
+    """
+    Проверяет группу, закрываемую скобкой
+
+    Args:
+        groups (list[list[Any]]): Открытые группы [база глубины, позиция '(', признак ошибки]
+        depth (int): Текущая структурная глубина стека
+        last_open (bool): Был ли предыдущий токен открывающей скобкой
+        expression (str): Исходное выражение (для текста ошибки)
+        end (int): Позиция закрывающей скобки
+
+    Raises:
+        ValueError: Если скобки несбалансированы, пусты или выражение в них не завершено
+    """
+    if not groups:
+        raise ValueError(ERROR_MESSAGES['unmatched_parentheses'])
+    base, start, failed = groups.pop()
+    if last_open:
+        raise ValueError(ERROR_MESSAGES['empty_parentheses'])
+    if failed or depth - base != 1:
+        raise incomplete_group_error(expression[start + 1:end])
+
+
+def _depth_after(arity: int, depth: int, base: int) -> int:
+    """Структурная глубина стека после оператора (свёртка оставляет над базой группы один элемент)"""
+    if arity == VARIADIC:
+        return (0 if base == _NO_GROUP else base) + 1
+    return depth - arity + 1
+
+
+def evaluate_fused(expression: str,
+                   operators: dict[str, Callable[..., Any]],
+                   parse_number: Callable[[str], Number]) -> Number:
+    """
+    Вычисляет выражение за один проход по строке
+
+    Ошибки скобок имеют приоритет над ошибками вычисления, как и в
+    RPNCalculator.evaluate(): после первой ошибки вычисления проход
+    продолжается только для проверки скобок.
+
+    Args:
+        expression (str): Выражение в обратной польской нотации (RPN)
+        operators (dict[str, Callable[..., Any]]): Функции операторов с проверками
+        parse_number (Callable[[str], Number]): Функция разбора числа
+
+    Returns:
+        Number: Результат вычисления
+
+    Raises:
+        ValueError: При ошибках в выражении или вычислении
+        ZeroDivisionError: При делении на ноль
+    """
+    if not expression.strip():
+        raise ValueError(ERROR_MESSAGES['empty_expression'])
+
+    stack: list[Number] = []
+    push = stack.append
+    pop = stack.pop
+    groups: list[list[Any]] = []
+    base = _NO_GROUP
+    last_open = False
+    error: Union[ValueError, ZeroDivisionError, None] = None
+    depth = 0
+    tokens: Iterator[re.Match[str]] = TOKEN_RE.finditer(expression)
+
+    for match in tokens:
+        token = match.group()
+        if token == '(':
+            base = len(stack)
+            groups.append([base, match.start(), False])
+            last_open = True
+            continue
+        if token == ')':
+            _close_group(groups, len(stack), last_open, expression, match.start())
+            base = groups[-1][0] if groups else _NO_GROUP
+        elif token in operators:
+            size = len(stack)
+            arity = ARITIES[token]
+            if arity == 2:
+                if size - base < 2:
+                    groups[-1][2] = True
+                if size < 2:
+                    error = ValueError(f"{ERROR_MESSAGES['insufficient_operands']} '{token}'")
+                    depth = size - 1
+                    break
+                b = pop()
+                a = pop()
+                try:
+                    push(operators[token](a, b))
+                except (ValueError, ZeroDivisionError) as e:
+                    error = e
+                except Exception as e:
+                    error = ValueError(f"Ошибка при выполнении операции {a} {token} {b}: {str(e)}")
+            else:
+                count = size - (0 if base == _NO_GROUP else base) if arity == VARIADIC else arity
+                if size - base < required_operands(arity):
+                    groups[-1][2] = True
+                if size < arity or count < 1:
+                    error = ValueError(f"{ERROR_MESSAGES['insufficient_operands']} '{token}'")
+                    depth = _depth_after(arity, size, base)
+                    break
+                operands = stack[-count:]
+                del stack[-count:]
+                try:
+                    push(operators[token](operands) if arity == VARIADIC else operators[token](*operands))
+                except (ValueError, ZeroDivisionError) as e:
+                    error = e
+                except Exception as e:
+                    error = ValueError(f"Ошибка при выполнении операции {describe_operation(token, operands)}: {str(e)}")
+            if error is not None:
+                depth = _depth_after(arity, size, base)
+                break
+        else:
+            try:
+                push(parse_number(token))
+            except ValueError:
+                error = ValueError(f"{ERROR_MESSAGES['invalid_token']}: {token}")
+                depth = len(stack) + 1
+                break
+        last_open = False
+
+    if error is not None:
+        # Досканирование только для проверки скобок
+        last_open = False
+        for match in tokens:
+            token = match.group()
+            if token == '(':
+                groups.append([depth, match.start(), False])
+                last_open = True
+                continue
+            if token == ')':
+                _close_group(groups, depth, last_open, expression, match.start())
+            elif token in operators:
+                arity = ARITIES[token]
+                base = groups[-1][0] if groups else _NO_GROUP
+                if depth - base < required_operands(arity):
+                    groups[-1][2] = True
+                depth = _depth_after(arity, depth, base)
+            else:
+                depth += 1
+            last_open = False
+
+    if groups:
+        raise ValueError(ERROR_MESSAGES['unmatched_parentheses'])
+    if error is not None:
+        raise error
+    if len(stack) != 1:
+        raise ValueError(f"{ERROR_MESSAGES['invalid_expression']}. В стеке осталось {len(stack)} элементов")
+
+    return stack[0]
@@ -0,0 +1,220 @@
+"""
+Инструментирование RPN калькулятора: время по фазам, операторы, ошибки
+
+Включается методом RPNCalculator.enable_instrumentation(): токенизация,
+проверка скобок, разбор чисел и операторы экземпляра подменяются обёртками
+с замером времени. Пока инструментирование выключено, evaluate() платит
+только за одну проверку атрибута.
+"""
+
+import json
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Optional, Union
+from constants import ERROR_MESSAGES
+
+Number = Union[int, float]
+
+# Верхние границы корзин гистограмм задержки, в секундах
+BUCKETS = (1e-7, 2.5e-7, 5e-7, 1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+           1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ('tokenize', 'validate', 'parse', 'apply', 'compile', 'evaluate')
+
+# Ключ ошибки, текст которой не начинается ни с одного сообщения ERROR_MESSAGES
+OPERATION_ERROR = 'operation_error'
+
+# Сообщения проверяются от длинных к коротким, чтобы префикс не перекрыл точное совпадение
+_MESSAGE_KEYS = sorted(ERROR_MESSAGES.items(), key=lambda item: -len(item[1]))
+
+
+def error_key(error: Union[BaseException, str]) -> str:
+    """
+    Определяет ключ ERROR_MESSAGES по тексту ошибки
+
+    Args:
+        error (Union[BaseException, str]): Ошибка вычисления или её текст
+
+    Returns:
+        str: Ключ ERROR_MESSAGES или OPERATION_ERROR
+    """
+    message = str(error)
+    for key, text in _MESSAGE_KEYS:
+        if message.startswith(text):
+            return key
+    return OPERATION_ERROR
+
+
+class Histogram:
+    """Гистограмма задержек с фиксированными корзинами"""
+
+    __slots__ = ('counts', 'count', 'total')
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Учитывает одно измерение"""
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        """Возвращает накопительные счётчики корзин, количество и сумму"""
+        cumulative = []
+        running = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            running += count
+            cumulative.append([bound, running])
+        return {'buckets': cumulative, 'count': self.count, 'sum': self.total}
+
+
+class Instrumentation:
+    """
+    Накопитель метрик одного калькулятора
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, Histogram] = {phase: Histogram() for phase in PHASES}
+        self.operators: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self._cache_stats: Optional[Callable[[], dict[str, int]]] = None
+
+    def reset(self) -> None:
+        """Обнуляет все метрики"""
+        self.phases = {phase: Histogram() for phase in PHASES}
+        self.operators = {}
+        self.errors = {}
+
+    def timed(self, phase: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Оборачивает функцию замером времени фазы
+
+        Args:
+            phase (str): Имя фазы
+            function (Callable[..., Any]): Функция
+
+        Returns:
+            Callable[..., Any]: Обёртка
+        """
+        clock = time.perf_counter
+
+        def wrapper(*args: Any) -> Any:
+            started = clock()
+            try:
+                return function(*args)
+            finally:
+                self.phases[phase].observe(clock() - started)
+
+        return wrapper
+
+    def timed_operators(self, operators: dict[str, Callable[..., Any]]) -> dict[str, Callable[..., Any]]:
+        """
+        Оборачивает функции операторов подсчётом вызовов и времени
+
+        Args:
+            operators (dict[str, Callable[..., Any]]): Функции операторов
+
+        Returns:
+            dict[str, Callable[..., Any]]: Функции с замером
+        """
+        clock = time.perf_counter
+
+        def wrap(symbol: str, function: Callable[..., Any]) -> Callable[..., Any]:
+            def apply(*operands: Any) -> Any:
+                started = clock()
+                try:
+                    return function(*operands)
+                finally:
+                    elapsed = clock() - started
+                    self.phases['apply'].observe(elapsed)
+                    stats = self.operators.get(symbol)
+                    if stats is None:
+                        stats = self.operators[symbol] = [0, 0.0]
+                    stats[0] += 1
+                    stats[1] += elapsed
+            return apply
+
+        return {symbol: wrap(symbol, function) for symbol, function in operators.items()}
+
+    def observe_evaluation(self, evaluate: Callable[[str], Number], expression: str) -> Number:
+        """
+        Вычисляет выражение, учитывая общее время и ошибку
+
+        Args:
+            evaluate (Callable[[str], Number]): Функция вычисления
+            expression (str): Выражение
+
+        Returns:
+            Number: Результат вычисления
+        """
+        started = time.perf_counter()
+        try:
+            return evaluate(expression)
+        except (ValueError, ZeroDivisionError) as err:
+            key = error_key(err)
+            self.errors[key] = self.errors.get(key, 0) + 1
+            raise
+        finally:
+            self.phases['evaluate'].observe(time.perf_counter() - started)
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Возвращает снимок метрик
+
+        Returns:
+            dict[str, Any]: Фазы, операторы, ошибки и статистика кэша
+        """
+        return {
+            'phases': {phase: histogram.snapshot() for phase, histogram in self.phases.items()},
+            'operators': {symbol: {'calls': int(calls), 'seconds': seconds}
+                          for symbol, (calls, seconds) in sorted(self.operators.items())},
+            'errors': dict(sorted(self.errors.items())),
+            'cache': self._cache_stats() if self._cache_stats is not None else {},
+        }
+
+    def to_json(self) -> str:
+        """Возвращает снимок метрик в JSON"""
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = 'rpn') -> str:
+        """
+        Возвращает снимок метрик в текстовом формате Prometheus
+
+        Args:
+            prefix (str): Префикс имён метрик
+
+        Returns:
+            str: Текст экспозиции
+        """
+        snapshot = self.snapshot()
+        lines = [f"# HELP {prefix}_phase_seconds Время фаз вычисления",
+                 f"# TYPE {prefix}_phase_seconds histogram"]
+        for phase, histogram in snapshot['phases'].items():
+            for bound, count in histogram['buckets']:
+                lines.append(f'{prefix}_phase_seconds_bucket{{phase="{phase}",le="{bound:g}"}} {count}')
+            lines.append(f'{prefix}_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'{prefix}_phase_seconds_sum{{phase="{phase}"}} {histogram["sum"]!r}')
+            lines.append(f'{prefix}_phase_seconds_count{{phase="{phase}"}} {histogram["count"]}')
+
+        lines += [f"# HELP {prefix}_operator_calls_total Вызовы операторов",
+                  f"# TYPE {prefix}_operator_calls_total counter"]
+        for symbol, stats in snapshot['operators'].items():
+            lines.append(f'{prefix}_operator_calls_total{{operator="{symbol}"}} {stats["calls"]}')
+        lines += [f"# HELP {prefix}_operator_seconds_total Время операторов",
+                  f"# TYPE {prefix}_operator_seconds_total counter"]
+        for symbol, stats in snapshot['operators'].items():
+            lines.append(f'{prefix}_operator_seconds_total{{operator="{symbol}"}} {stats["seconds"]!r}')
+
+        lines += [f"# HELP {prefix}_errors_total Ошибки по ключам ERROR_MESSAGES",
+                  f"# TYPE {prefix}_errors_total counter"]
+        for key, count in snapshot['errors'].items():
+            lines.append(f'{prefix}_errors_total{{error="{key}"}} {count}')
+
+        for name, value in snapshot['cache'].items():
+            kind = 'gauge' if name in ('size', 'maxsize') else 'counter'
+            metric = f"{prefix}_cache_{name}" + ('_total' if kind == 'counter' else '')
+            lines += [f"# TYPE {metric} {kind}", f"{metric} {value}"]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,112 @@
+"""
+Ограничения ресурсов при вычислении RPN выражений
+
+Политика задаёт предельный размер результата в битах (оценивается по операндам
+до выполнения '*', '**' и 'prod'), количество токенов, глубину стека и время вычисления
+одного выражения. Выражения сверх лимитов отклоняются без вычисления.
+"""
+
+import math
+from typing import Any, Callable, Optional
+from constants import ERROR_MESSAGES
+
+
+def limit_error(detail: str) -> ValueError:
+    """
+    Формирует ошибку превышения лимита
+
+    Args:
+        detail (str): Какой лимит превышен
+
+    Returns:
+        ValueError: Ошибка с текстом из ERROR_MESSAGES
+    """
+    return ValueError(f"{ERROR_MESSAGES['resource_limit_exceeded']}: {detail}")
+
+
+class ResourcePolicy:
+    """
+    Лимиты ресурсов на одно выражение (None - без ограничения)
+    """
+
+    __slots__ = ('max_bits', 'max_tokens', 'max_stack_depth', 'time_budget')
+
+    def __init__(self, max_bits: Optional[int] = None, max_tokens: Optional[int] = None,
+                 max_stack_depth: Optional[int] = None, time_budget: Optional[float] = None) -> None:
+        """
+        Инициализация политики
+
+        Args:
+            max_bits (Optional[int]): Максимальная длина целого результата в битах
+            max_tokens (Optional[int]): Максимальное количество токенов
+            max_stack_depth (Optional[int]): Максимальная глубина стека
+            time_budget (Optional[float]): Бюджет времени на выражение в секундах
+
+        Raises:
+            ValueError: Если лимит не положительный
+        """
+        for name, value in (('max_bits', max_bits), ('max_tokens', max_tokens),
+                            ('max_stack_depth', max_stack_depth), ('time_budget', time_budget)):
+            if value is not None and value <= 0:
+                raise ValueError(f"Лимит {name} должен быть положительным")
+        self.max_bits = max_bits
+        self.max_tokens = max_tokens
+        self.max_stack_depth = max_stack_depth
+        self.time_budget = time_budget
+
+    def __repr__(self) -> str:
+        return (f"ResourcePolicy(max_bits={self.max_bits}, max_tokens={self.max_tokens}, "
+                f"max_stack_depth={self.max_stack_depth}, time_budget={self.time_budget})")
+
+    def check_tokens(self, count: int) -> Optional[ValueError]:
+        """Возвращает ошибку, если токенов больше лимита"""
+        if self.max_tokens is not None and count > self.max_tokens:
+            return limit_error(f"больше {self.max_tokens} токенов")
+        return None
+
+    def check_depth(self, depth: int) -> Optional[ValueError]:
+        """Возвращает ошибку, если глубина стека больше лимита"""
+        if self.max_stack_depth is not None and depth > self.max_stack_depth:
+            return limit_error(f"глубина стека больше {self.max_stack_depth}")
+        return None
+
+    def guard_operators(self, operators: dict[str, Callable[..., Any]]) -> dict[str, Callable[..., Any]]:
+        """
+        Оборачивает '*', '**' и 'prod' проверкой размера результата
+
+        Args:
+            operators (dict[str, Callable[..., Any]]): Функции операторов
+
+        Returns:
+            dict[str, Callable[..., Any]]: Функции с проверкой (или исходный словарь без лимита)
+        """
+        if self.max_bits is None:
+            return operators
+        max_bits = self.max_bits
+        multiply = operators['*']
+        power = operators['**']
+        product = operators['prod']
+
+        def guarded_multiply(a: Any, b: Any) -> Any:
+            if type(a) is int and type(b) is int and a.bit_length() + b.bit_length() > max_bits:
+                raise limit_error(f"результат больше {max_bits} бит")
+            return multiply(a, b)
+
+        def guarded_power(a: Any, b: Any) -> Any:
+            # |a| >= 2, поэтому при b >= max_bits результат заведомо больше лимита;
+            # проверка идёт первой, иначе b может не поместиться во float
+            if type(a) is int and type(b) is int and b > 0 and abs(a) > 1 \
+                    and (b >= max_bits or b * math.log2(abs(a)) >= max_bits):
+                raise limit_error(f"результат больше {max_bits} бит")
+            return power(a, b)
+
+        def guarded_product(values: list[Any]) -> Any:
+            if sum(value.bit_length() for value in values if type(value) is int) > max_bits:
+                raise limit_error(f"результат больше {max_bits} бит")
+            return product(values)
+
+        guarded = dict(operators)
+        guarded['*'] = guarded_multiply
+        guarded['**'] = guarded_power
+        guarded['prod'] = guarded_product
+        return guarded
@@ -0,0 +1,150 @@
+"""
+Клиент и генератор нагрузки для сетевого режима RPN калькулятора
+
+Открывает несколько соединений, отправляет выражения конвейером (не больше
+pipeline запросов без ответа на соединение) и измеряет пропускную способность
+и задержки ответов (p50, p99).
+
+    python src/loadgen.py --port 8765 --connections 16 --requests 100000 --pipeline 32
+"""
+
+import argparse
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+
+class LoadStats:
+    """Результаты прогона нагрузки"""
+
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    @property
+    def count(self) -> int:
+        """Количество полученных ответов"""
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        """Скорость в ответах в секунду"""
+        return self.count / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Возвращает перцентиль задержки
+
+        Args:
+            q (float): Уровень от 0 до 1
+
+        Returns:
+            float: Задержка в секундах
+        """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> str:
+        """Возвращает сводку одной строкой"""
+        return (f"Ответов: {self.count}, ошибок: {self.errors}, время: {self.elapsed:.3f} с, "
+                f"скорость: {self.throughput:.0f} запросов/с, "
+                f"p50: {self.percentile(0.5) * 1e3:.3f} мс, p99: {self.percentile(0.99) * 1e3:.3f} мс")
+
+
+async def _open(host: Optional[str], port: Optional[int],
+                path: Optional[str]) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    if path is not None:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+
+async def _run_connection(expressions: list[str], pipeline: int, stats: LoadStats,
+                          host: Optional[str], port: Optional[int], path: Optional[str]) -> None:
+    """Отправляет выражения по одному соединению и собирает задержки"""
+    reader, writer = await _open(host, port, path)
+    window = asyncio.Semaphore(pipeline)
+    sent: deque[float] = deque()
+
+    async def send() -> None:
+        for expression in expressions:
+            await window.acquire()
+            sent.append(time.perf_counter())
+            writer.write(expression.encode() + b'\n')
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    try:
+        for _ in expressions:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Сервер закрыл соединение")
+            stats.latencies.append(time.perf_counter() - sent.popleft())
+            if line.startswith('Ошибка'.encode()):
+                stats.errors += 1
+            window.release()
+        await sender
+    finally:
+        sender.cancel()
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load(expressions: list[str], host: Optional[str] = '127.0.0.1', port: Optional[int] = None,
+                   path: Optional[str] = None, connections: int = 16, requests: int = 10000,
+                   pipeline: int = 32) -> LoadStats:
+    """
+    Запускает нагрузку на сервер
+
+    Args:
+        expressions (list[str]): Выражения, отправляются по кругу
+        host (Optional[str]): Адрес TCP
+        port (Optional[int]): Порт TCP
+        path (Optional[str]): Путь Unix-сокета (вместо TCP)
+        connections (int): Количество соединений
+        requests (int): Общее количество запросов
+        pipeline (int): Максимум запросов без ответа на соединение
+
+    Returns:
+        LoadStats: Пропускная способность и задержки
+    """
+    stats = LoadStats()
+    share, extra = divmod(requests, connections)
+    batches = []
+    offset = 0
+    for i in range(connections):
+        size = share + (1 if i < extra else 0)
+        batches.append([expressions[(offset + j) % len(expressions)] for j in range(size)])
+        offset += size
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_run_connection(batch, pipeline, stats, host, port, path)
+                           for batch in batches if batch))
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Точка входа генератора нагрузки"""
+    parser = argparse.ArgumentParser(description="Генератор нагрузки для сервера RPN калькулятора")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="подключаться к Unix-сокету")
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--pipeline', type=int, default=32)
+    parser.add_argument('--expression', action='append',
+                        help="выражение для отправки (можно несколько, по умолчанию набор примеров)")
+    args = parser.parse_args(argv)
+
+    expressions = args.expression or ["3 4 +", "(3 4 + 5 *) 2 /", "5 1 2 + 4 * + 3 -", "2 64 **", "1 0 /"]
+    stats = asyncio.run(run_load(expressions, args.host, args.port, args.unix,
+                                 args.connections, args.requests, args.pipeline))
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,32 @@
 """
 Главный модуль RPN калькулятора
 Точка входа в приложение
+
+Однократное вычисление (-e "3 4 +" или выражение аргументами) не разбирает
+аргументы через argparse и не импортирует модули других режимов, чтобы
+вызов из скриптов запускался быстро. Коды завершения: EXIT_OK - успех,
+EXIT_ERROR - ошибка в выражении, 2 - неверные аргументы (argparse),
+EXIT_INTERRUPTED - прерывание с клавиатуры.
 """
 
+import sys
+from typing import TYPE_CHECKING, Optional
 from calculator import RPNCalculator
-from constants import SUPPORTED_OPERATORS
+
+if TYPE_CHECKING:
+    import argparse
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_INTERRUPTED = 130
+
+# Флаги однократного вычисления
+EXPRESSION_FLAGS = ('-e', '--expression')
 
 
 def print_help() -> None:
     """Выводит справку по использованию калькулятора"""
+    from constants import SUPPORTED_OPERATORS
     print("RPN Калькулятор (Обратная Польская Нотация)")
     print("~*" * 25)
     print("Операции:")
@@ -46,13 +64,18 @@ def genius() -> None:
              thanks and bye!''')
 
 
-def run_interactive_mode() -> None:
+def run_interactive_mode(calculator: Optional[RPNCalculator] = None) -> None:
     """Запускает интерактивный режим калькулятора"""
-    calculator = RPNCalculator()
+    if calculator is None:
+        calculator = RPNCalculator()
     print_help()
     while True:
         try:
-            expression = input("\nВведите выражение в RPN: ").strip()
+            try:
+                expression = input("\nВведите выражение в RPN: ").strip()
+            except EOFError:
+                print()
+                break
 
             if expression.lower() in ('exit', 'i love hse'):
                 print("До свидания!")
@@ -75,13 +98,224 @@ def run_interactive_mode() -> None:
             print(f"Неожиданная ошибка: {err}")
 
 
-def main() -> None:
-    """Основная функция - точка входа в приложение (запуск программы)"""
+def one_shot_expressions(argv: list[str]) -> Optional[list[str]]:
+    """
+    Выделяет выражения однократного вычисления без разбора через argparse
+
+    Args:
+        argv (list[str]): Аргументы командной строки
+
+    Returns:
+        Optional[list[str]]: Выражения, если аргументы - только флаги -e
+        (--expression) с выражениями или слова одного выражения, ни одно
+        из которых не начинается с '-'; иначе None (нужен полный разбор)
+    """
+    if not argv:
+        return None
+    if not any(argument.startswith('-') for argument in argv):
+        return [' '.join(argv)]
+    if not argv[0].startswith('-'):
+        # Слова выражения с флагами (или токенами '-', '-3') разбирает argparse
+        return None
+    expressions = []
+    index = 0
+    while index < len(argv):
+        argument = argv[index]
+        if argument in EXPRESSION_FLAGS and index + 1 < len(argv):
+            expressions.append(argv[index + 1])
+            index += 2
+        elif argument.startswith('--expression='):
+            expressions.append(argument.partition('=')[2])
+            index += 1
+        elif argument.startswith('-e') and argument != '-e':
+            expressions.append(argument[2:])
+            index += 1
+        else:
+            return None
+    return expressions
+
+
+def run_one_shot(expressions: list[str], calculator: RPNCalculator) -> int:
+    """
+    Вычисляет выражения и выводит результаты по одному в строке
+
+    Args:
+        expressions (list[str]): Выражения в RPN
+        calculator (RPNCalculator): Калькулятор
+
+    Returns:
+        int: EXIT_OK или EXIT_ERROR, если хотя бы одно выражение с ошибкой
+            (текст ошибки выводится в stderr)
+    """
+    status = EXIT_OK
+    for expression in expressions:
+        try:
+            print(calculator.evaluate(expression))
+        except (ValueError, ZeroDivisionError) as err:
+            print(f"Ошибка: {err}", file=sys.stderr)
+            status = EXIT_ERROR
+    return status
+
+
+def parse_args(argv: Optional[list[str]] = None) -> 'argparse.Namespace':
+    """
+    Разбирает аргументы командной строки
+
+    Args:
+        argv (Optional[list[str]]): Аргументы (по умолчанию sys.argv[1:])
+
+    Returns:
+        argparse.Namespace: Разобранные аргументы
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="RPN Калькулятор (Обратная Польская Нотация)")
+    parser.add_argument('words', nargs='*', metavar='TOKEN',
+                        help="вычислить одно выражение из аргументов и выйти")
+    parser.add_argument('-e', '--expression', action='append', metavar='EXPR',
+                        help="вычислить выражение и выйти (можно повторять), без интерактивного режима")
+    parser.add_argument('--batch', nargs='?', const='-', metavar='FILE',
+                        help="пакетный режим: выражения построчно из FILE или stdin, результаты в stdout")
+    parser.add_argument('--file', metavar='FILE',
+                        help="одно выражение из FILE любого размера: файл отображается в память и читается потоково")
+    parser.add_argument('--workers', type=int, nargs='?', const=0, metavar='N',
+                        help="пакетный и сетевой режим: пул из N процессов (без N - по числу ядер)")
+    parser.add_argument('--session', action='store_true',
+                        help="интерактивная сессия: стек сохраняется между строками, есть undo и edit")
+    parser.add_argument('--serve', metavar='[HOST:]PORT',
+                        help="сетевой режим: выражения построчно по TCP, ответ на каждую строку")
+    parser.add_argument('--unix', metavar='PATH', help="сетевой режим на Unix-сокете")
+    parser.add_argument('--cache', metavar='FILE',
+                        help="пакетный режим: постоянный кэш результатов в файле SQLite, вычисляются только новые выражения")
+    parser.add_argument('--cache-max-entries', type=int, metavar='N',
+                        help="вытеснять давно не использованные записи кэша сверх N")
+    parser.add_argument('--cache-max-age', type=float, metavar='SEC',
+                        help="вытеснять записи кэша, не использованные дольше SEC секунд")
+    parser.add_argument('--columnar', metavar='FILE',
+                        help="пакетный режим: результаты в бинарный колоночный файл FILE вместо текста в stdout")
+    parser.add_argument('--metrics', nargs='?', const='-', metavar='FILE',
+                        help="собрать метрики и записать снимок в FILE (без FILE - в stderr) по завершении; "
+                             "при --workers учитываются только выражения текущего процесса")
+    parser.add_argument('--metrics-format', choices=('prometheus', 'json'), default='prometheus',
+                        help="формат снимка метрик (по умолчанию prometheus)")
+    limits = parser.add_argument_group("лимиты ресурсов на выражение")
+    limits.add_argument('--max-bits', type=int, metavar='N', help="максимальный размер целого результата в битах")
+    limits.add_argument('--max-tokens', type=int, metavar='N', help="максимальное количество токенов")
+    limits.add_argument('--max-depth', type=int, metavar='N', help="максимальная глубина стека")
+    limits.add_argument('--time-budget', type=float, metavar='SEC', help="бюджет времени на выражение в секундах")
+    return parser.parse_args(argv)
+
+
+def write_metrics(calculator: RPNCalculator, target: str, output_format: str) -> None:
+    """
+    Записывает снимок метрик калькулятора
+
+    Args:
+        calculator (RPNCalculator): Калькулятор с включёнными метриками
+        target (str): Путь к файлу или '-' для stderr
+        output_format (str): 'prometheus' или 'json'
+    """
+    if calculator.metrics is None:
+        return
+    text = calculator.metrics.to_json() + '\n' if output_format == 'json' else calculator.metrics.to_prometheus()
+    if target == '-':
+        sys.stderr.write(text)
+    else:
+        with open(target, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+
+def run_mode(args: 'argparse.Namespace', calculator: RPNCalculator) -> int:
+    """
+    Запускает режим, выбранный аргументами командной строки
+
+    Args:
+        args (argparse.Namespace): Разобранные аргументы
+        calculator (RPNCalculator): Калькулятор
+
+    Returns:
+        int: Код завершения
+    """
+    expressions = list(args.expression or [])
+    if args.words:
+        expressions.append(' '.join(args.words))
+    if expressions:
+        return run_one_shot(expressions, calculator)
+    import os
+    from batch import run_batch_mode
+    workers = args.workers
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if args.batch is not None:
+        if args.cache is None:
+            run_batch_mode(args.batch, calculator=calculator, workers=workers, columnar=args.columnar)
+            return EXIT_OK
+        import sqlite3
+        from persistent import ResultCache
+        try:
+            cache = ResultCache(args.cache, args.cache_max_entries, args.cache_max_age)
+        except (ValueError, sqlite3.Error) as err:
+            raise SystemExit(f"Ошибка: {err}")
+        with cache:
+            run_batch_mode(args.batch, calculator=calculator, workers=workers, cache=cache, columnar=args.columnar)
+        return EXIT_OK
+    if args.file is not None:
+        try:
+            print(calculator.evaluate_file(args.file))
+        except (ValueError, ZeroDivisionError, OSError) as err:
+            raise SystemExit(f"Ошибка: {err}")
+        return EXIT_OK
+    if args.serve is not None or args.unix is not None:
+        import asyncio
+        from server import RPNServer, ServerConfig, parse_address, run_server
+        host, port = parse_address(args.serve) if args.serve is not None else (None, None)
+        server = RPNServer(calculator, ServerConfig(workers=workers))
+        try:
+            asyncio.run(run_server(server, host, port, args.unix))
+        except KeyboardInterrupt:
+            pass
+        return EXIT_OK
+    try:
+        if args.session:
+            from session import run_session_mode
+            run_session_mode(calculator)
+        else:
+            run_interactive_mode(calculator)
+    except KeyboardInterrupt:
+        print()
+        return EXIT_INTERRUPTED
+    return EXIT_OK
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Основная функция - точка входа в приложение (запуск программы)
+
+    Args:
+        argv (Optional[list[str]]): Аргументы (по умолчанию sys.argv[1:])
+
+    Returns:
+        int: Код завершения
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    expressions = one_shot_expressions(argv)
+    if expressions is not None:
+        # Без лимитов и метрик: однопроходный движок без кэша и оптимизатора
+        return run_one_shot(expressions, RPNCalculator(cache_size=0, peephole=False))
+    args = parse_args(argv)
+    policy = None
+    if any(limit is not None for limit in (args.max_bits, args.max_tokens, args.max_depth, args.time_budget)):
+        from limits import ResourcePolicy
+        policy = ResourcePolicy(args.max_bits, args.max_tokens, args.max_depth, args.time_budget)
+    calculator = RPNCalculator(policy=policy)
+    if args.metrics is not None:
+        calculator.enable_instrumentation()
     try:
-        run_interactive_mode()
-    except:
-        pass
+        return run_mode(args, calculator)
+    finally:
+        if args.metrics is not None:
+            write_metrics(calculator, args.metrics, args.metrics_format)
 
 
 if __name__ == "__main__":
-    exit(main())
+    sys.exit(main())
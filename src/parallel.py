@@ -0,0 +1,202 @@
+"""
+Параллельное пакетное вычисление RPN выражений в пуле процессов
+
+Вход делится на порции (chunks), порции вычисляются в ProcessPoolExecutor,
+каждый процесс держит собственный экземпляр RPNCalculator (и свой кэш программ).
+Результаты выдаются в порядке входа, одновременно в работе не больше
+max_in_flight порций, поэтому потребление памяти не зависит от размера входа.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Iterable, Iterator, Optional, Union
+from batch import BatchStats, evaluate_stream
+from calculator import RPNCalculator
+from limits import ResourcePolicy
+
+Number = Union[int, float]
+Result = tuple[bool, Union[Number, str]]
+
+# Размер порции выражений, отправляемой в процесс
+CHUNK_SIZE = 2048
+
+# Меньше этого числа выражений пул не запускается: накладные расходы больше выигрыша
+SERIAL_THRESHOLD = 10000
+
+# Калькулятор процесса-обработчика, создаётся инициализатором пула
+_worker_calculator: Optional[RPNCalculator] = None
+
+
+def init_worker(cache_size: int, policy: Optional[ResourcePolicy]) -> None:
+    """
+    Создаёт калькулятор процесса-обработчика
+
+    Args:
+        cache_size (int): Размер кэша скомпилированных выражений
+        policy (Optional[ResourcePolicy]): Лимиты ресурсов на выражение
+    """
+    global _worker_calculator
+    _worker_calculator = RPNCalculator(cache_size, policy)
+
+
+def _evaluate_chunk(expressions: list[str]) -> tuple[list[Result], int, float]:
+    """
+    Вычисляет порцию выражений в процессе-обработчике
+
+    Args:
+        expressions (list[str]): Порция выражений
+
+    Returns:
+        tuple[list[Result], int, float]: Результаты, PID процесса, время работы в секундах
+    """
+    calculator = _worker_calculator if _worker_calculator is not None else RPNCalculator()
+    started = time.perf_counter()
+    results = list(evaluate_stream(calculator, expressions))
+    return results, os.getpid(), time.perf_counter() - started
+
+
+def evaluate_one(expression: str) -> Result:
+    """
+    Вычисляет одно выражение в процессе-обработчике
+
+    Args:
+        expression (str): Выражение
+
+    Returns:
+        Result: (успех, результат или текст ошибки)
+    """
+    results, _, _ = _evaluate_chunk([expression])
+    return results[0]
+
+
+class WorkerStats:
+    """Статистика одного процесса-обработчика"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.chunks = 0
+        self.busy = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Скорость в выражениях в секунду чистого времени вычисления"""
+        return self.count / self.busy if self.busy > 0 else 0.0
+
+
+class ParallelStats(BatchStats):
+    """Статистика параллельного вычисления с разбивкой по процессам"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.workers: dict[int, WorkerStats] = {}
+        self.serial = False
+
+    def record_chunk(self, pid: int, count: int, busy: float) -> None:
+        """
+        Учитывает порцию, вычисленную процессом
+
+        Args:
+            pid (int): PID процесса
+            count (int): Количество выражений в порции
+            busy (float): Время вычисления порции в секундах
+        """
+        worker = self.workers.get(pid)
+        if worker is None:
+            worker = self.workers[pid] = WorkerStats()
+        worker.count += count
+        worker.chunks += 1
+        worker.busy += busy
+
+    def summary(self) -> str:
+        """Возвращает сводку с разбивкой по процессам"""
+        lines = [super().summary()]
+        if self.serial:
+            lines.append("Режим: последовательный (один процесс или вход меньше порога)")
+        for pid, worker in sorted(self.workers.items()):
+            lines.append(f"  процесс {pid}: порций {worker.chunks}, выражений {worker.count}, "
+                         f"скорость: {worker.throughput:.0f} выражений/с")
+        return '\n'.join(lines)
+
+
+def _chunks(expressions: Iterator[str], size: int) -> Iterator[list[str]]:
+    """Лениво делит поток выражений на порции"""
+    while True:
+        chunk = list(islice(expressions, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _collect(future: Future[tuple[list[Result], int, float]],
+             stats: Optional[ParallelStats]) -> list[Result]:
+    """Дожидается порции и учитывает её в статистике"""
+    results, pid, busy = future.result()
+    if stats is not None:
+        stats.record_chunk(pid, len(results), busy)
+    return results
+
+
+def evaluate_parallel(expressions: Iterable[str], workers: Optional[int] = None,
+                      chunk_size: Optional[int] = None, max_in_flight: Optional[int] = None,
+                      serial_threshold: Optional[int] = None, cache_size: int = 1024,
+                      stats: Optional[ParallelStats] = None,
+                      policy: Optional[ResourcePolicy] = None,
+                      calculator: Optional[RPNCalculator] = None) -> Iterator[Result]:
+    """
+    Вычисляет выражения в пуле процессов, сохраняя порядок
+
+    Первые serial_threshold выражений читаются заранее: если вход на этом
+    закончился, он вычисляется последовательно в текущем процессе
+    калькулятором calculator (с его кэшем и метриками).
+
+    Args:
+        expressions (Iterable[str]): Выражения
+        workers (Optional[int]): Количество процессов (по умолчанию os.cpu_count())
+        chunk_size (Optional[int]): Размер порции (по умолчанию CHUNK_SIZE)
+        max_in_flight (Optional[int]): Максимум порций в работе (по умолчанию 2 * workers)
+        serial_threshold (Optional[int]): Порог размера входа для запуска пула (по умолчанию SERIAL_THRESHOLD)
+        cache_size (int): Размер кэша скомпилированных выражений в каждом процессе
+        stats (Optional[ParallelStats]): Накопитель статистики по процессам
+        policy (Optional[ResourcePolicy]): Лимиты ресурсов на выражение
+        calculator (Optional[RPNCalculator]): Калькулятор для последовательного режима
+            (None - новый с cache_size и policy)
+
+    Yields:
+        Result: (успех, результат или текст ошибки)
+
+    Raises:
+        ValueError: Если workers, chunk_size или max_in_flight меньше 1
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = CHUNK_SIZE
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+    if serial_threshold is None:
+        serial_threshold = SERIAL_THRESHOLD
+    if workers < 1 or chunk_size < 1 or max_in_flight < 1:
+        raise ValueError("Количество процессов, размер порции и окно должны быть положительными")
+
+    iterator = iter(expressions)
+    head = list(islice(iterator, serial_threshold))
+    if workers == 1 or len(head) < serial_threshold:
+        if stats is not None:
+            stats.serial = True
+        if calculator is None:
+            calculator = RPNCalculator(cache_size, policy)
+        yield from evaluate_stream(calculator, chain(head, iterator))
+        return
+
+    pending: deque[Future[tuple[list[Result], int, float]]] = deque()
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(cache_size, policy)) as pool:
+        for chunk in _chunks(chain(head, iterator), chunk_size):
+            if len(pending) >= max_in_flight:
+                yield from _collect(pending.popleft(), stats)
+            pending.append(pool.submit(_evaluate_chunk, chunk))
+        while pending:
+            yield from _collect(pending.popleft(), stats)
+
@@ -0,0 +1,196 @@
+"""
+Оптимизация скомпилированных RPN программ по образцам инструкций (peephole)
+
+Программа проходится один раз с моделью стека: для каждого значения известны
+инструкция, которая его положила, и статический тип (целое, вещественное или
+любое - например, комплексный результат '**'). Выполняются преобразования:
+
+- свёртка констант: оператор над литералами вычисляется при компиляции, если
+  он не выбрасывает ошибку (иначе он остаётся на месте и ошибка возникает
+  в той же точке вычисления);
+- слияние 'a b ** m %' с целым литералом m в одну операцию pow(a, b, m) без
+  вычисления полной степени; для нецелых операндов и отрицательного
+  показателя операция выполняет исходные '**' и '%' с теми же ошибками;
+- тождества 'x 1 *', 'x 1 **', 'x 0 -' (x вещественный), 'x 0 +' и 'x 1 //'
+  (x целый; для вещественного -0.0 + 0 даёт 0.0).
+
+Меняются только операторы реестра без обёрток: функции с проверкой лимита
+ResourcePolicy.max_bits и замером времени остаются как есть, поэтому
+результаты и ошибки совпадают с программой без оптимизации.
+"""
+
+from typing import Any, Union
+from calculator import OP_APPLY, OP_CALL, OP_FAIL, OP_PUSH, CompiledExpression
+from registry import OPERATOR_FUNCTIONS, describe_operation
+
+Number = Union[int, float]
+
+# Статические типы значений: каждый следующий включает предыдущий
+ANY = 0
+REAL = 1
+INT = 2
+
+# Символ слитой операции 'a b ** m %' (не совпадает с powmod: при b < 0 поведение разное)
+POWER_MODULO = '** %'
+
+# Степень целых литералов больше этого размера в битах при компиляции не вычисляется:
+# размер результата не ограничен размером выражения, а бюджет времени действует
+# только при выполнении
+FOLD_MAX_BITS = 4096
+
+_power = OPERATOR_FUNCTIONS['**']
+_modulo = OPERATOR_FUNCTIONS['%']
+
+
+def power_modulo(a: Number, b: Number, m: int) -> Number:
+    """
+    Вычисляет 'a b ** m %' без полной степени для целых a и b >= 0
+
+    Args:
+        a (Number): Основание
+        b (Number): Показатель
+        m (int): Модуль (целый, не ноль - проверяется при компиляции)
+
+    Returns:
+        Number: (a ** b) % m
+
+    Raises:
+        ValueError: При нецелом результате степени или ошибке операции '**'
+        ZeroDivisionError: При возведении нуля в отрицательную степень
+    """
+    if type(a) is int and type(b) is int and b >= 0:
+        return pow(a, b, m)
+    try:
+        value = _power(a, b)
+    except (ValueError, ZeroDivisionError):
+        raise
+    except Exception as e:
+        raise ValueError(f"Ошибка при выполнении операции {describe_operation('**', [a, b])}: {str(e)}")
+    return _modulo(value, m)
+
+
+def _literal_type(value: Any) -> int:
+    """Статический тип литерала"""
+    if type(value) is int:
+        return INT
+    return REAL if type(value) is float else ANY
+
+
+def _result_type(symbol: str, types: list[int], exponent: Any) -> int:
+    """
+    Статический тип результата оператора
+
+    Args:
+        symbol (str): Символ оператора
+        types (list[int]): Типы операндов
+        exponent (Any): Значение литерала-показателя для '**' (None, если неизвестно)
+
+    Returns:
+        int: INT, REAL или ANY
+    """
+    lowest = min(types)
+    if symbol in ('+', '-', '*', 'neg', 'sum', 'prod', 'min', 'max'):
+        return lowest
+    if symbol in ('/', 'mean'):
+        return min(lowest, REAL)
+    if symbol in ('//', '%', 'powmod', POWER_MODULO):
+        # Операторы проверяют, что операнды целые: без ошибки результат всегда целый
+        return INT
+    if symbol == 'abs':
+        return INT if lowest == INT else REAL
+    if symbol == '**':
+        if types[0] == INT and type(exponent) is int and exponent >= 0:
+            return INT
+        # Вещественное в целой степени - вещественное, иначе возможен комплексный результат
+        return REAL if types[0] >= REAL and types[1] == INT else ANY
+    return ANY
+
+
+def _is_identity(symbol: str, value: Any, left: int) -> bool:
+    """Проверяет, что 'x value symbol' равно x для x статического типа left"""
+    if type(value) is not int:
+        return False
+    if value == 1:
+        return symbol in ('*', '**') and left >= REAL or symbol == '//' and left == INT
+    if value == 0:
+        return symbol == '-' and left >= REAL or symbol == '+' and left == INT
+    return False
+
+
+def _foldable(symbol: str, values: list[Any]) -> bool:
+    """Операция над литералами достаточно дешева для вычисления при компиляции"""
+    if symbol == '**':
+        base, exponent = values
+        return not (type(base) is int and type(exponent) is int
+                    and exponent * abs(base).bit_length() > FOLD_MAX_BITS)
+    return True
+
+
+def optimize(program: CompiledExpression, fold: bool = True) -> CompiledExpression:
+    """
+    Применяет свёртку констант, слияние степени по модулю и тождества
+
+    Args:
+        program (CompiledExpression): Программа RPNCalculator.compile()
+        fold (bool): Сворачивать константы (без бюджета времени: свёртка идёт при компиляции)
+
+    Returns:
+        CompiledExpression: Программа с тем же результатом и теми же ошибками
+    """
+    code: list[tuple[int, Any]] = []
+    # Модель стека: (статический тип, позиция инструкции, положившей значение)
+    stack: list[tuple[int, int]] = []
+    # Операнды операций по позиции инструкции - для слияния '**' с последующим '%'
+    consumed: dict[int, list[tuple[int, int]]] = {}
+
+    for opcode, arg in program.code:
+        if opcode == OP_PUSH:
+            stack.append((_literal_type(arg), len(code)))
+            code.append((opcode, arg))
+            continue
+        if opcode == OP_FAIL:
+            code.append((opcode, arg))
+            break
+        symbol, function = arg[0], arg[1]
+        count = 2 if opcode == OP_APPLY else arg[2]
+        operands = stack[-count:]
+        del stack[-count:]
+        plain = function is OPERATOR_FUNCTIONS.get(symbol)
+
+        if plain and symbol == '%':
+            power, modulus = operands
+            position = power[1]
+            if code[position] == (OP_APPLY, ('**', _power)) and modulus[1] == position + 1 == len(code) - 1 \
+                    and code[-1][0] == OP_PUSH and type(code[-1][1]) is int and code[-1][1] != 0:
+                del code[position]
+                operands = consumed.pop(position) + [(modulus[0], position)]
+                opcode, arg, count = OP_CALL, (POWER_MODULO, power_modulo, 3, False), 3
+                symbol, function = POWER_MODULO, power_modulo
+
+        start = len(code) - count
+        if fold and all(code[index][0] == OP_PUSH for _, index in operands) \
+                and [index for _, index in operands] == list(range(start, len(code))):
+            values = [code[index][1] for index in range(start, len(code))]
+            if _foldable(symbol, values):
+                try:
+                    value = function(values) if opcode == OP_CALL and arg[3] else function(*values)
+                except Exception:
+                    value = None
+                if type(value) in (int, float):
+                    del code[start:]
+                    stack.append((_literal_type(value), len(code)))
+                    code.append((OP_PUSH, value))
+                    continue
+
+        if plain and count == 2 and operands[1][1] == len(code) - 1 and code[-1][0] == OP_PUSH \
+                and _is_identity(symbol, code[-1][1], operands[0][0]):
+            del code[-1]
+            stack.append(operands[0])
+            continue
+
+        exponent = code[-1][1] if code[-1][0] == OP_PUSH else None
+        stack.append((_result_type(symbol, [kind for kind, _ in operands], exponent), len(code)))
+        consumed[len(code)] = operands
+        code.append((opcode, arg))
+
+    return CompiledExpression(program.expression, tuple(code))
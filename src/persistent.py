@@ -0,0 +1,286 @@
+"""
+Постоянный кэш результатов пакетного вычисления в файле SQLite
+
+Ключ записи - хэш BLAKE2b нормализованного потока токенов (RPNCalculator._tokenize),
+поэтому строки, отличающиеся только пробелами, дают одну запись. Хэш вычисляется
+с ключом пространства имён: версия формата, набор операторов и политика лимитов,
+так что калькуляторы с разными лимитами не видят результаты друг друга.
+Хранится строка вывода (результат или текст ошибки): при повторном запуске
+попадание не требует ни разбора, ни вычисления.
+
+Поиск выполняется порциями запросов `IN (...)`, новые результаты записываются
+одной транзакцией на порцию. Вытеснение - по возрасту последнего использования
+(max_age) и по количеству записей (max_entries, сначала давно не использованные).
+"""
+
+import hashlib
+import sqlite3
+import time
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, Union
+from calculator import RPNCalculator
+from constants import ERROR_MESSAGES
+
+Number = Union[int, float]
+Result = tuple[bool, Union[Number, str]]
+
+# Версия формата записей: увеличивается при изменении семантики операторов или текста ошибок
+CACHE_VERSION = 1
+
+# Количество выражений, которые ищутся в кэше и вычисляются за один шаг
+CHUNK_SIZE = 4096
+
+# Количество ключей в одном запросе `IN (...)` (меньше лимита параметров SQLite)
+LOOKUP_BATCH = 500
+
+# Время последнего использования обновляется не чаще раза за этот интервал (секунды):
+# повторный запуск вскоре после предыдущего только читает
+TOUCH_INTERVAL = 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key BLOB PRIMARY KEY,
+    ok INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+
+def cache_namespace(calculator: RPNCalculator) -> bytes:
+    """
+    Вычисляет ключ пространства имён для калькулятора
+
+    Args:
+        calculator (RPNCalculator): Калькулятор
+
+    Returns:
+        bytes: 16 байт, зависящие от версии формата, операторов и политики
+    """
+    operators = ' '.join(sorted(calculator.supported_operators))
+    text = f"{CACHE_VERSION}|{operators}|{calculator.policy!r}"
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def cache_key(tokens: list[str], namespace: bytes) -> bytes:
+    """
+    Вычисляет ключ записи по нормализованному потоку токенов
+
+    Args:
+        tokens (list[str]): Токены выражения (без пробельных символов)
+        namespace (bytes): Ключ пространства имён (cache_namespace())
+
+    Returns:
+        bytes: 16 байт хэша BLAKE2b
+    """
+    return hashlib.blake2b(' '.join(tokens).encode(), digest_size=16, key=namespace).digest()
+
+
+class ResultCache:
+    """
+    Постоянный кэш строк результата в файле SQLite
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = None, max_age: Optional[float] = None) -> None:
+        """
+        Открывает (или создаёт) файл кэша
+
+        Args:
+            path (str): Путь к файлу SQLite (':memory:' - кэш в памяти)
+            max_entries (Optional[int]): Максимальное количество записей (None - без ограничения)
+            max_age (Optional[float]): Срок жизни записи без использования в секундах (None - бессрочно)
+
+        Raises:
+            ValueError: Если лимит не положительный
+            sqlite3.Error: Если файл не удаётся открыть как базу SQLite
+        """
+        if max_entries is not None and max_entries <= 0:
+            raise ValueError("Лимит записей кэша должен быть положительным")
+        if max_age is not None and max_age <= 0:
+            raise ValueError("Срок жизни записей кэша должен быть положительным")
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._connection = sqlite3.connect(path)
+        try:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            with self._connection:
+                if version != CACHE_VERSION:
+                    self._connection.execute("DROP TABLE IF EXISTS results")
+                    self._connection.execute(f"PRAGMA user_version={CACHE_VERSION}")
+                self._connection.executescript(_SCHEMA)
+        except sqlite3.Error:
+            self._connection.close()
+            raise
+
+    def __enter__(self) -> 'ResultCache':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, tuple[bool, str]]:
+        """
+        Ищет записи порциями запросов и обновляет время использования устаревших
+
+        Args:
+            keys (list[bytes]): Ключи записей (cache_key())
+
+        Returns:
+            dict[bytes, tuple[bool, str]]: Найденные записи: ключ -> (успех, строка результата)
+        """
+        found: dict[bytes, tuple[bool, str]] = {}
+        now = time.time()
+        stale: list[tuple[float, bytes]] = []
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), LOOKUP_BATCH):
+            batch = unique[start:start + LOOKUP_BATCH]
+            query = f"SELECT key, ok, value, used FROM results WHERE key IN ({','.join('?' * len(batch))})"
+            for key, ok, value, used in self._connection.execute(query, batch):
+                found[key] = (bool(ok), value)
+                if now - used > TOUCH_INTERVAL:
+                    stale.append((now, key))
+        if stale:
+            with self._connection:
+                self._connection.executemany("UPDATE results SET used = ? WHERE key = ?", stale)
+        hits = sum(1 for key in keys if key in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, entries: Iterable[tuple[bytes, bool, str]]) -> None:
+        """
+        Записывает результаты одной транзакцией
+
+        Args:
+            entries (Iterable[tuple[bytes, bool, str]]): (ключ, успех, строка результата)
+        """
+        now = time.time()
+        rows = [(key, int(ok), value, now) for key, ok, value in entries]
+        if not rows:
+            return
+        # Вставка по возрастанию ключа идёт по соседним страницам B-дерева
+        rows.sort()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO results (key, ok, value, used) VALUES (?, ?, ?, ?)", rows)
+        self.writes += len(rows)
+
+    def evict(self) -> int:
+        """
+        Удаляет записи старше max_age и самые давно использованные сверх max_entries
+
+        Returns:
+            int: Количество удалённых записей
+        """
+        removed = 0
+        with self._connection:
+            if self.max_age is not None:
+                removed += self._connection.execute(
+                    "DELETE FROM results WHERE used < ?", (time.time() - self.max_age,)).rowcount
+            if self.max_entries is not None:
+                excess = len(self) - self.max_entries
+                if excess > 0:
+                    removed += self._connection.execute(
+                        "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used LIMIT ?)",
+                        (excess,)).rowcount
+        self.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        """Удаляет все записи"""
+        with self._connection:
+            self._connection.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        """Выполняет вытеснение и закрывает файл"""
+        try:
+            self.evict()
+        finally:
+            self._connection.close()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает статистику использования кэша
+
+        Returns:
+            dict[str, int]: Попадания, промахи, записи, вытеснения и размер
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'evictions': self.evictions,
+            'size': len(self),
+        }
+
+    def summary(self) -> str:
+        """Возвращает сводку одной строкой"""
+        stats = self.stats()
+        return (f"Кэш результатов: попаданий {stats['hits']}, промахов {stats['misses']}, "
+                f"записано {stats['writes']}, вытеснено {stats['evictions']}, записей {stats['size']}")
+
+
+def _cacheable(calculator: RPNCalculator, ok: bool, text: str) -> bool:
+    """Результат детерминирован: ошибка бюджета времени зависит от нагрузки и не кэшируется"""
+    policy = calculator.policy
+    return ok or policy is None or policy.time_budget is None or \
+        not text.startswith(ERROR_MESSAGES['resource_limit_exceeded'])
+
+
+def evaluate_cached(calculator: RPNCalculator, expressions: Iterable[str], cache: ResultCache,
+                    evaluate: Optional[Callable[[list[str]], Iterable[Result]]] = None,
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[tuple[bool, str]]:
+    """
+    Вычисляет выражения с постоянным кэшем, сохраняя порядок
+
+    Вход читается порциями по chunk_size: ключи порции ищутся в кэше, промахи
+    (каждое уникальное выражение один раз) вычисляются функцией evaluate,
+    их результаты записываются одной транзакцией.
+
+    Args:
+        calculator (RPNCalculator): Калькулятор (токенизация, операторы и политика)
+        expressions (Iterable[str]): Выражения
+        cache (ResultCache): Постоянный кэш
+        evaluate (Optional[Callable[[list[str]], Iterable[Result]]]): Вычисление порции промахов
+            (по умолчанию batch.evaluate_stream с этим калькулятором)
+        chunk_size (int): Размер порции
+
+    Yields:
+        tuple[bool, str]: (успех, строка результата или текст ошибки)
+    """
+    if evaluate is None:
+        from batch import evaluate_stream
+        evaluate = partial(evaluate_stream, calculator)
+    namespace = cache_namespace(calculator)
+    tokenize = calculator._tokenize
+    iterator = iter(expressions)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        keys = [cache_key(tokenize(expression), namespace) for expression in chunk]
+        found = cache.get_many(keys)
+        misses: dict[bytes, str] = {}
+        for key, expression in zip(keys, chunk):
+            if key not in found and key not in misses:
+                misses[key] = expression
+        if misses:
+            computed = {key: (ok, str(value))
+                        for key, (ok, value) in zip(misses, evaluate(list(misses.values())))}
+            cache.put_many((key, ok, text) for key, (ok, text) in computed.items()
+                           if _cacheable(calculator, ok, text))
+            found.update(computed)
+        for key in keys:
+            yield found[key]
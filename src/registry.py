@@ -0,0 +1,153 @@
+"""
+Реестр операторов RPN калькулятора
+
+Реестр строится один раз при импорте: для каждого оператора заданы арность,
+готовая функция со встроенными проверками и признак целочисленных операндов.
+Арность VARIADIC означает свёртку всех операндов текущей группы в скобках
+(вне скобок - всего стека) одним вызовом функции над списком, например
+'1 2 3 4 sum' или '(1 2 3 max) 2 *'. Предварительная проверка оператора
+возвращает ключ ERROR_MESSAGES для операндов, на которых функция выбросит
+ошибку, - так ошибки находятся без исключений.
+"""
+
+import math
+import operator
+from typing import Any, Callable, Optional, Sequence, Union
+from constants import ERROR_MESSAGES
+
+Number = Union[int, float]
+
+VARIADIC = -1
+
+# Столько операндов показывается в тексте ошибки n-арного оператора
+_SHOWN_OPERANDS = 8
+
+
+def _true_divide(a: Number, b: Number) -> Number:
+    if b == 0:
+        raise ZeroDivisionError(ERROR_MESSAGES['division_by_zero'])
+    return a / b
+
+
+def _floor_divide(a: Number, b: Number) -> Number:
+    if not isinstance(a, int) or not isinstance(b, int):
+        raise ValueError(ERROR_MESSAGES['integer_operands_required'])
+    if b == 0:
+        raise ZeroDivisionError(ERROR_MESSAGES['division_by_zero'])
+    return a // b
+
+
+def _modulo(a: Number, b: Number) -> Number:
+    if not isinstance(a, int) or not isinstance(b, int):
+        raise ValueError(ERROR_MESSAGES['integer_operands_required'])
+    if b == 0:
+        raise ZeroDivisionError(ERROR_MESSAGES['division_by_zero'])
+    return a % b
+
+
+def _powmod(a: Number, b: Number, m: Number) -> Number:
+    if not isinstance(a, int) or not isinstance(b, int) or not isinstance(m, int):
+        raise ValueError(ERROR_MESSAGES['integer_operands_required'])
+    if m == 0:
+        raise ZeroDivisionError(ERROR_MESSAGES['division_by_zero'])
+    return pow(a, b, m)
+
+
+def _mean(values: Sequence[Number]) -> Number:
+    return sum(values) / len(values)
+
+
+def _check_divisor(a: Number, b: Number) -> Optional[str]:
+    return 'division_by_zero' if b == 0 else None
+
+
+def _check_integer_division(a: Number, b: Number) -> Optional[str]:
+    if not isinstance(a, int) or not isinstance(b, int):
+        return 'integer_operands_required'
+    return 'division_by_zero' if b == 0 else None
+
+
+def _check_powmod(a: Number, b: Number, m: Number) -> Optional[str]:
+    if not isinstance(a, int) or not isinstance(b, int) or not isinstance(m, int):
+        return 'integer_operands_required'
+    return 'division_by_zero' if m == 0 else None
+
+
+class OperatorSpec:
+    """
+    Описание оператора: символ, арность, функция, проверка типов и операндов
+    """
+
+    __slots__ = ('symbol', 'arity', 'function', 'integers', 'check')
+
+    def __init__(self, symbol: str, arity: int, function: Callable[..., Any], integers: bool = False,
+                 check: Optional[Callable[..., Optional[str]]] = None) -> None:
+        """
+        Инициализация описания
+
+        Args:
+            symbol (str): Символ оператора
+            arity (int): Количество операндов или VARIADIC
+            function (Callable[..., Any]): Функция с проверками (VARIADIC - над списком операндов)
+            integers (bool): Требуются ли целочисленные операнды
+            check (Optional[Callable[..., Optional[str]]]): Проверка операндов без исключений -
+                ключ ERROR_MESSAGES ошибки, которую выбросит function, или None
+        """
+        self.symbol = symbol
+        self.arity = arity
+        self.function = function
+        self.integers = integers
+        self.check = check
+
+    def __repr__(self) -> str:
+        arity = 'VARIADIC' if self.arity == VARIADIC else self.arity
+        return f"OperatorSpec({self.symbol!r}, {arity})"
+
+
+OPERATORS: dict[str, OperatorSpec] = {spec.symbol: spec for spec in (
+    OperatorSpec('+', 2, operator.add),
+    OperatorSpec('-', 2, operator.sub),
+    OperatorSpec('*', 2, operator.mul),
+    OperatorSpec('/', 2, _true_divide, check=_check_divisor),
+    OperatorSpec('//', 2, _floor_divide, integers=True, check=_check_integer_division),
+    OperatorSpec('%', 2, _modulo, integers=True, check=_check_integer_division),
+    OperatorSpec('**', 2, operator.pow),
+    OperatorSpec('neg', 1, operator.neg),
+    OperatorSpec('abs', 1, abs),
+    OperatorSpec('powmod', 3, _powmod, integers=True, check=_check_powmod),
+    OperatorSpec('sum', VARIADIC, sum),
+    OperatorSpec('prod', VARIADIC, math.prod),
+    OperatorSpec('min', VARIADIC, min),
+    OperatorSpec('max', VARIADIC, max),
+    OperatorSpec('mean', VARIADIC, _mean),
+)}
+
+# Арность по символу оператора
+ARITIES: dict[str, int] = {symbol: spec.arity for symbol, spec in OPERATORS.items()}
+
+# Функции операторов со встроенными проверками по символу
+OPERATOR_FUNCTIONS: dict[str, Callable[..., Any]] = {symbol: spec.function for symbol, spec in OPERATORS.items()}
+
+
+def required_operands(arity: int) -> int:
+    """Возвращает минимальное количество операндов для арности"""
+    return 1 if arity == VARIADIC else arity
+
+
+def describe_operation(symbol: str, operands: Sequence[Any]) -> str:
+    """
+    Формирует текст операции для сообщения об ошибке
+
+    Args:
+        symbol (str): Символ оператора
+        operands (Sequence[Any]): Операнды
+
+    Returns:
+        str: 'a + b' для бинарных операторов, 'powmod(a, b, m)' для остальных
+    """
+    if len(operands) == 2 and ARITIES[symbol] == 2:
+        return f"{operands[0]} {symbol} {operands[1]}"
+    shown = ', '.join(str(value) for value in operands[:_SHOWN_OPERANDS])
+    if len(operands) > _SHOWN_OPERANDS:
+        shown += f", ... ({len(operands)} операндов)"
+    return f"{symbol}({shown})"
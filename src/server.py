@@ -0,0 +1,328 @@
+"""
+Сетевой режим RPN калькулятора на asyncio
+
+Сервер принимает выражения построчно по TCP или Unix-сокету и отвечает одной
+строкой на каждое выражение в порядке запросов (как пакетный режим).
+Запросы можно отправлять конвейером, не дожидаясь ответов: в очереди
+соединения не больше max_pending запросов, при заполнении очереди сервер
+перестаёт читать сокет (обратное давление через TCP). Дорогие по оценке
+выражения вычисляются в пуле процессов, чтобы не блокировать цикл событий.
+"""
+
+import asyncio
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Union
+from batch import format_result
+from calculator import RPNCalculator
+from constants import SUPPORTED_OPERATORS
+from engine import TOKEN_RE
+from parallel import Result, evaluate_one, init_worker
+from registry import ARITIES, VARIADIC
+
+# Оценка размера вещественного операнда в битах
+FLOAT_BITS = 64
+
+# Оценка стоимости выражения, которое заведомо нельзя вычислять в цикле событий
+MAX_COST = 1 << 62
+
+# Сколько ждать конца входа клиента перед закрытием отклонённого соединения, секунд
+LINGER_TIMEOUT = 1.0
+
+SERVER_BUSY = "Сервер перегружен"
+LINE_TOO_LONG = "Слишком длинная строка"
+
+
+def _literal_bits(token: str) -> int:
+    """Оценивает размер числового литерала в битах без его разбора"""
+    if '.' in token:
+        return FLOAT_BITS
+    return len(token) * 10 // 3 + 1
+
+
+def _call_bits(symbol: str, operands: list[int]) -> int:
+    """Оценивает размер результата оператора, отличного от бинарного, в битах"""
+    if symbol == 'powmod':
+        return operands[2]
+    if symbol == 'sum':
+        return max(operands) + len(operands).bit_length()
+    if symbol == 'prod':
+        return min(sum(operands), MAX_COST)
+    if symbol == 'mean':
+        return FLOAT_BITS
+    return max(operands)
+
+
+def estimate_cost(expression: str) -> int:
+    """
+    Оценивает стоимость вычисления выражения
+
+    Стек выражения моделируется размерами операндов в битах (как оценка
+    результата в limits.ResourcePolicy): сумма '+'/'-' на бит больше большего
+    операнда, произведение - сумма размеров, степень - размер основания,
+    умноженный на 2 в степени размера показателя, 'powmod' - размер модуля.
+    Стоимость - длина выражения плюс суммарный размер промежуточных результатов.
+
+    Args:
+        expression (str): Выражение
+
+    Returns:
+        int: Оценка стоимости (не больше MAX_COST)
+    """
+    cost = len(expression)
+    stack: list[int] = []
+    bases: list[int] = []
+    for token in TOKEN_RE.findall(expression):
+        if token == '(':
+            bases.append(len(stack))
+            continue
+        if token == ')':
+            if bases:
+                bases.pop()
+            continue
+        if token not in SUPPORTED_OPERATORS:
+            stack.append(_literal_bits(token))
+            continue
+        arity = ARITIES[token]
+        count = len(stack) - (bases[-1] if bases else 0) if arity == VARIADIC else arity
+        if len(stack) < arity or count < 1:
+            # Нехватка операндов обнаруживается вычислением сразу
+            return cost
+        if arity != 2:
+            operands = stack[-count:]
+            del stack[-count:]
+            bits = _call_bits(token, operands)
+            cost = min(cost + bits, MAX_COST)
+            stack.append(bits)
+            continue
+        b = stack.pop()
+        a = stack.pop()
+        if token in ('+', '-'):
+            bits = max(a, b) + 1
+        elif token == '*':
+            bits = a + b
+        elif token == '/':
+            bits = FLOAT_BITS
+        elif token in ('//', '%'):
+            bits = a
+        elif b >= FLOAT_BITS:
+            return MAX_COST
+        else:
+            bits = min(a << b, MAX_COST)
+        cost = min(cost + bits, MAX_COST)
+        stack.append(bits)
+    return cost
+
+
+class ServerConfig:
+    """Лимиты сервера и соединений"""
+
+    def __init__(self, max_connections: int = 1024, max_pending: int = 256, max_line: int = 1 << 20,
+                 idle_timeout: Optional[float] = 300.0, offload_cost: int = 1 << 16,
+                 workers: Optional[int] = None) -> None:
+        """
+        Инициализация лимитов
+
+        Args:
+            max_connections (int): Максимум одновременных соединений
+            max_pending (int): Максимум запросов без ответа на соединение
+            max_line (int): Максимальная длина строки запроса в байтах
+            idle_timeout (Optional[float]): Закрыть соединение после простоя, секунд (None - не закрывать)
+            offload_cost (int): Оценка стоимости, начиная с которой выражение уходит в пул процессов
+            workers (Optional[int]): Размер пула процессов (0 - вычислять всё в цикле событий)
+        """
+        self.max_connections = max_connections
+        self.max_pending = max_pending
+        self.max_line = max_line
+        self.idle_timeout = idle_timeout
+        self.offload_cost = offload_cost
+        self.workers = workers
+
+
+class RPNServer:
+    """
+    Сервер, вычисляющий построчные выражения для многих соединений
+    """
+
+    def __init__(self, calculator: Optional[RPNCalculator] = None,
+                 config: Optional[ServerConfig] = None) -> None:
+        """
+        Инициализация сервера
+
+        Args:
+            calculator (Optional[RPNCalculator]): Калькулятор для дешёвых выражений
+            config (Optional[ServerConfig]): Лимиты сервера
+        """
+        self.calculator = calculator if calculator is not None else RPNCalculator()
+        self.config = config if config is not None else ServerConfig()
+        self.active = 0
+        self.stats = {'connections': 0, 'rejected': 0, 'requests': 0, 'errors': 0, 'offloaded': 0}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._server: Optional[asyncio.Server] = None
+
+    async def start(self, host: Optional[str] = None, port: Optional[int] = None,
+                    path: Optional[str] = None) -> asyncio.Server:
+        """
+        Запускает приём соединений
+
+        Args:
+            host (Optional[str]): Адрес TCP
+            port (Optional[int]): Порт TCP (0 - любой свободный)
+            path (Optional[str]): Путь Unix-сокета (вместо TCP)
+
+        Returns:
+            asyncio.Server: Запущенный сервер
+        """
+        if self.config.workers != 0:
+            # Процессы пула создаются лениво, уже при открытых соединениях: при fork
+            # они унаследовали бы сокеты клиентов, и клиент не увидел бы их закрытия
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._pool = ProcessPoolExecutor(self.config.workers, multiprocessing.get_context(method),
+                                             initializer=init_worker,
+                                             initargs=(self.calculator._program_cache.maxsize,
+                                                       self.calculator.policy))
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path, limit=self.config.max_line)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=self.config.max_line)
+        return self._server
+
+    async def close(self) -> None:
+        """Останавливает приём соединений и пул процессов"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _submit(self, expression: str) -> Union[Result, asyncio.Future[Result]]:
+        """Вычисляет дешёвое выражение сразу, дорогое отправляет в пул процессов"""
+        self.stats['requests'] += 1
+        if self._pool is not None and estimate_cost(expression) >= self.config.offload_cost:
+            self.stats['offloaded'] += 1
+            return asyncio.get_running_loop().run_in_executor(self._pool, evaluate_one, expression)
+        try:
+            return True, self.calculator.evaluate(expression)
+        except (ValueError, ZeroDivisionError) as err:
+            return False, str(err)
+
+    async def _respond(self, pending: asyncio.Queue[Union[Result, asyncio.Future[Result], None]],
+                       writer: asyncio.StreamWriter) -> None:
+        """Пишет ответы в порядке запросов"""
+        broken = False
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            if isinstance(item, asyncio.Future):
+                try:
+                    ok, value = await item
+                except Exception as err:
+                    ok, value = False, f"Ошибка пула процессов: {err}"
+            else:
+                ok, value = item
+            if not ok:
+                self.stats['errors'] += 1
+            if broken:
+                continue
+            try:
+                writer.write(format_result(ok, value).encode() + b'\n')
+                await writer.drain()
+            except ConnectionError:
+                # Клиент ушёл: дочитываем очередь, чтобы не блокировать чтение
+                broken = True
+                writer.transport.abort()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обслуживает одно соединение"""
+        if self.active >= self.config.max_connections:
+            self.stats['rejected'] += 1
+            writer.write(format_result(False, SERVER_BUSY).encode() + b'\n')
+            await self._close(reader, writer)
+            return
+        self.active += 1
+        self.stats['connections'] += 1
+        pending: asyncio.Queue[Union[Result, asyncio.Future[Result], None]] = asyncio.Queue(self.config.max_pending)
+        responder = asyncio.create_task(self._respond(pending, writer))
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.config.idle_timeout)
+                except ValueError:
+                    await pending.put((False, LINE_TOO_LONG))
+                    break
+                except (asyncio.TimeoutError, ConnectionError):
+                    break
+                if not line:
+                    break
+                await pending.put(self._submit(line.decode('utf-8', errors='replace').rstrip('\r\n')))
+        finally:
+            await pending.put(None)
+            await responder
+            self.active -= 1
+            await self._close(reader, writer)
+
+    @staticmethod
+    async def _close(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Закрывает соединение, не теряя последнего ответа
+
+        Если закрыть сокет с непрочитанным входом, ядро отправит RST, и клиент
+        получит ConnectionResetError вместо ответа. Поэтому сначала закрывается
+        только запись, затем вход клиента дочитывается (не дольше LINGER_TIMEOUT).
+        """
+        try:
+            if not reader.at_eof():
+                if writer.can_write_eof():
+                    writer.write_eof()
+                await writer.drain()
+                await asyncio.wait_for(_discard(reader), LINGER_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def _discard(reader: asyncio.StreamReader) -> None:
+    """Читает и отбрасывает вход до конца потока"""
+    while await reader.read(1 << 16):
+        pass
+
+
+def parse_address(address: str) -> tuple[Optional[str], int]:
+    """
+    Разбирает адрес вида [HOST:]PORT
+
+    Args:
+        address (str): Адрес
+
+    Returns:
+        tuple[Optional[str], int]: Хост (None - все интерфейсы) и порт
+    """
+    host, _, port = address.rpartition(':')
+    return host or None, int(port)
+
+
+async def run_server(server: RPNServer, host: Optional[str] = None, port: Optional[int] = None,
+                     path: Optional[str] = None) -> None:
+    """
+    Запускает сервер и обслуживает соединения до остановки
+
+    Args:
+        server (RPNServer): Сервер
+        host (Optional[str]): Адрес TCP
+        port (Optional[int]): Порт TCP
+        path (Optional[str]): Путь Unix-сокета (вместо TCP)
+    """
+    listener = await server.start(host, port, path)
+    addresses = ', '.join(str(sock.getsockname()) for sock in listener.sockets)
+    print(f"Сервер RPN калькулятора слушает {addresses}", file=sys.stderr)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
@@ -0,0 +1,316 @@
+"""
+Инкрементальная сессия RPN калькулятора
+
+Стек операндов сохраняется между строками: новая строка применяется
+к текущему состоянию, а не вычисляет всю историю заново. Каждые interval
+токенов сохраняется контрольная точка (копия стека и открытых скобок),
+поэтому отмена или правка недавнего токена повторяет только токены после
+ближайшей точки. Хранится не больше max_checkpoints точек и только токены
+после самой старой из них: память ограничена, а отменить можно лишь то,
+что новее самой старой точки.
+"""
+
+from collections import deque
+from typing import Any, Callable, Optional, Union
+from calculator import RPNCalculator
+from constants import ERROR_MESSAGES
+from registry import ARITIES, VARIADIC, describe_operation, required_operands
+
+Number = Union[int, float]
+
+# Контрольная точка: (позиция в истории, стек, открытые группы (глубина, позиция '('))
+Checkpoint = tuple[int, tuple[Number, ...], tuple[tuple[int, int], ...]]
+
+
+class Session:
+    """
+    Сессия с постоянным стеком, отменой и правкой токенов
+    """
+
+    def __init__(self, calculator: Optional[RPNCalculator] = None, interval: int = 64,
+                 max_checkpoints: int = 64) -> None:
+        """
+        Инициализация сессии
+
+        Args:
+            calculator (Optional[RPNCalculator]): Калькулятор (операторы, разбор чисел, лимиты)
+            interval (int): Контрольная точка каждые interval токенов
+            max_checkpoints (int): Максимум хранимых контрольных точек
+
+        Raises:
+            ValueError: Если interval или max_checkpoints меньше 1
+        """
+        if interval < 1 or max_checkpoints < 1:
+            raise ValueError("Интервал и количество контрольных точек должны быть положительными")
+        self.calculator = calculator if calculator is not None else RPNCalculator()
+        self.interval = interval
+        self.max_checkpoints = max_checkpoints
+        self.stack: list[Number] = []
+        self._groups: list[tuple[int, int]] = []
+        # История токенов, начиная с абсолютной позиции _offset (позиция самой старой точки)
+        self._history: list[str] = []
+        self._offset = 0
+        self._checkpoints: deque[Checkpoint] = deque(maxlen=max_checkpoints)
+        self._checkpoints.append((0, (), ()))
+        self.replayed = 0
+
+    @property
+    def position(self) -> int:
+        """Количество применённых токенов с начала сессии"""
+        return self._offset + len(self._history)
+
+    @property
+    def undo_limit(self) -> int:
+        """Сколько последних токенов можно отменить или исправить"""
+        return self.position - self._checkpoints[0][0]
+
+    @property
+    def result(self) -> Optional[Number]:
+        """Вершина стека (None, если стек пуст)"""
+        return self.stack[-1] if self.stack else None
+
+    def history(self) -> list[str]:
+        """Возвращает хранимые токены (позиции с self.position - len(...))"""
+        return list(self._history)
+
+    def clear(self) -> None:
+        """Сбрасывает стек, историю и контрольные точки"""
+        self.stack = []
+        self._groups = []
+        self._history = []
+        self._offset = 0
+        self._checkpoints.clear()
+        self._checkpoints.append((0, (), ()))
+
+    def push(self, line: str) -> Optional[Number]:
+        """
+        Применяет токены строки к текущему стеку
+
+        Строка применяется целиком или не применяется: при ошибке состояние
+        возвращается к началу строки.
+
+        Args:
+            line (str): Токены в RPN
+
+        Returns:
+            Optional[Number]: Вершина стека
+
+        Raises:
+            ValueError: При ошибках в токенах или вычислении
+            ZeroDivisionError: При делении на ноль
+        """
+        tokens = self.calculator._tokenize(line)
+        start = self.position
+        # Точка перед строкой переживает (max_checkpoints - 1) * interval новых токенов,
+        # для более длинной строки состояние сохраняется целиком
+        saved = self._save() if len(tokens) >= self.interval * (self.max_checkpoints - 1) else None
+        try:
+            for token in tokens:
+                self._apply(token)
+        except (ValueError, ZeroDivisionError):
+            if saved is not None:
+                self._restore(saved)
+            else:
+                self._rewind(start)
+            raise
+        return self.result
+
+    def undo(self, count: int = 1) -> Optional[Number]:
+        """
+        Отменяет последние токены
+
+        Args:
+            count (int): Количество токенов
+
+        Returns:
+            Optional[Number]: Вершина стека
+
+        Raises:
+            ValueError: Если токенов для отмены больше undo_limit
+        """
+        if count < 0 or count > self.undo_limit:
+            raise ValueError(f"Можно отменить не больше {self.undo_limit} токенов")
+        self._rewind(self.position - count)
+        return self.result
+
+    def edit(self, back: int, token: str) -> Optional[Number]:
+        """
+        Заменяет токен и пересчитывает токены после него
+
+        Args:
+            back (int): Номер токена с конца (1 - последний)
+            token (str): Новый токен
+
+        Returns:
+            Optional[Number]: Вершина стека
+
+        Raises:
+            ValueError: Если токен старше самой старой контрольной точки или правка
+                даёт ошибку (состояние при этом не меняется)
+            ZeroDivisionError: Если правка даёт деление на ноль
+        """
+        if back < 1 or back > self.undo_limit:
+            raise ValueError(f"Можно исправить только последние {self.undo_limit} токенов")
+        target = self.position - back
+        tail = self._history[target - self._offset:]
+        self._rewind(target)
+        try:
+            for new_token in [token, *tail[1:]]:
+                self._apply(new_token)
+        except (ValueError, ZeroDivisionError):
+            self._rewind(target)
+            for old_token in tail:
+                self._apply(old_token)
+            raise
+        return self.result
+
+    def _save(self) -> tuple[Any, ...]:
+        """Копирует всё состояние сессии"""
+        return list(self.stack), list(self._groups), list(self._history), self._offset, list(self._checkpoints)
+
+    def _restore(self, saved: tuple[Any, ...]) -> None:
+        """Восстанавливает состояние, сохранённое _save()"""
+        self.stack, self._groups, self._history, self._offset, checkpoints = saved
+        self._checkpoints.clear()
+        self._checkpoints.extend(checkpoints)
+
+    def _rewind(self, target: int) -> None:
+        """Возвращает состояние после target токенов: от ближайшей точки повторяются остальные"""
+        checkpoints = self._checkpoints
+        while checkpoints[-1][0] > target:
+            checkpoints.pop()
+        position, stack, groups = checkpoints[-1]
+        replay = self._history[position - self._offset:target - self._offset]
+        del self._history[position - self._offset:]
+        self.stack = list(stack)
+        self._groups = list(groups)
+        for token in replay:
+            self._apply(token)
+        self.replayed += len(replay)
+
+    def _apply(self, token: str) -> None:
+        """Применяет один токен и сохраняет контрольную точку на границе интервала"""
+        stack = self.stack
+        groups = self._groups
+        if token == '(':
+            groups.append((len(stack), self.position))
+        elif token == ')':
+            if not groups:
+                raise ValueError(ERROR_MESSAGES['unmatched_parentheses'])
+            base, opened = groups[-1]
+            if opened == self.position - 1:
+                raise ValueError(ERROR_MESSAGES['empty_parentheses'])
+            if len(stack) - base != 1:
+                inner = ' '.join(self._history[max(opened + 1 - self._offset, 0):])
+                raise ValueError(f"{ERROR_MESSAGES['incomplete_expression_in_parentheses']}: {inner}")
+            groups.pop()
+        elif token in ARITIES:
+            self._apply_operator(token)
+        else:
+            stack.append(self.calculator._parse_number(token))
+            policy = self.calculator.policy
+            if policy is not None:
+                error = policy.check_depth(len(stack))
+                if error is not None:
+                    stack.pop()
+                    raise error
+
+        self._history.append(token)
+        if self.position % self.interval == 0:
+            self._checkpoint()
+
+    def _apply_operator(self, token: str) -> None:
+        """Применяет оператор к вершине стека (операнды берутся только из текущей группы)"""
+        stack = self.stack
+        arity = ARITIES[token]
+        base = self._groups[-1][0] if self._groups else 0
+        count = len(stack) - base if arity == VARIADIC else arity
+        if len(stack) - base < required_operands(arity):
+            if self._groups:
+                inner = ' '.join([*self._history[max(self._groups[-1][1] + 1 - self._offset, 0):], token])
+                raise ValueError(f"{ERROR_MESSAGES['incomplete_expression_in_parentheses']}: {inner}")
+            raise ValueError(f"{ERROR_MESSAGES['insufficient_operands']} '{token}'")
+        operands = stack[-count:]
+        function: Callable[..., Any] = self.calculator._operators[token]
+        try:
+            result = function(operands) if arity == VARIADIC else function(*operands)
+        except (ValueError, ZeroDivisionError):
+            raise
+        except Exception as e:
+            raise ValueError(f"Ошибка при выполнении операции {describe_operation(token, operands)}: {str(e)}")
+        del stack[-count:]
+        stack.append(result)
+
+    def _checkpoint(self) -> None:
+        """Сохраняет контрольную точку, вытесняя самую старую и её историю"""
+        checkpoints = self._checkpoints
+        if len(checkpoints) == checkpoints.maxlen:
+            checkpoints.popleft()
+            oldest = checkpoints[0][0] if checkpoints else self.position
+            del self._history[:oldest - self._offset]
+            self._offset = oldest
+        checkpoints.append((self.position, tuple(self.stack), tuple(self._groups)))
+
+
+def print_session_help() -> None:
+    """Выводит справку по командам сессии"""
+    print("Сессия RPN калькулятора: стек сохраняется между строками")
+    print("Команды:")
+    print("  undo [N]      - отменить последние N токенов (по умолчанию 1)")
+    print("  edit N TOKEN  - заменить N-й с конца токен и пересчитать следующие")
+    print("  stack         - показать стек")
+    print("  history       - показать последние токены")
+    print("  clear         - очистить стек")
+    print("  help          - показать справку")
+    print("  exit          - выйти")
+
+
+def format_stack(session: Session) -> str:
+    """Возвращает стек сессии одной строкой"""
+    if not session.stack:
+        return "Стек пуст"
+    return "Стек: " + ' '.join(str(value) for value in session.stack)
+
+
+def run_session_mode(calculator: Optional[RPNCalculator] = None, interval: int = 64) -> None:
+    """
+    Запускает интерактивную сессию с постоянным стеком
+
+    Args:
+        calculator (Optional[RPNCalculator]): Калькулятор
+        interval (int): Контрольная точка каждые interval токенов
+    """
+    session = Session(calculator, interval)
+    print_session_help()
+    while True:
+        try:
+            line = input("\nrpn> ").strip()
+        except EOFError:
+            print()
+            return
+        command, _, rest = line.partition(' ')
+        command = command.lower()
+        try:
+            if command in ('exit', 'quit'):
+                print("До свидания!")
+                return
+            elif command == 'help':
+                print_session_help()
+                continue
+            elif command == 'undo':
+                session.undo(int(rest) if rest else 1)
+            elif command == 'edit':
+                back, _, token = rest.strip().partition(' ')
+                if not token.strip():
+                    raise ValueError("Использование: edit N TOKEN")
+                session.edit(int(back), token.strip())
+            elif command == 'history':
+                print(' '.join(session.history()[-session.undo_limit:]) or "История пуста")
+                continue
+            elif command == 'clear':
+                session.clear()
+            elif command != 'stack' and line:
+                session.push(line)
+            print(format_stack(session))
+        except (ValueError, ZeroDivisionError) as err:
+            print(f"Ошибка: {err}")
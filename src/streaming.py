@@ -0,0 +1,74 @@
+"""
+Потоковое вычисление RPN выражения из файла
+
+Файл отображается в память (mmap), токены читаются лениво (re.finditer) прямо
+из байтового буфера, скобки проверяются и выражение вычисляется по мере чтения.
+Ни строка, ни список токенов целиком не создаются: память растёт только
+с глубиной стека и вложенностью скобок, а не с размером файла.
+Результат и ошибки (включая их приоритет и лимиты политики) совпадают
+с RPNCalculator.evaluate() для того же текста; разделители токенов -
+пробельные символы ASCII, числа - цифры ASCII.
+"""
+
+import mmap
+import os
+from typing import Any, Callable, Optional, Union
+from bulk import RecordEvaluator
+from constants import ERROR_MESSAGES
+from limits import ResourcePolicy
+
+Number = Union[int, float]
+
+
+def evaluate_buffer(buffer: Any, operators: dict[str, Callable[..., Any]],
+                    policy: Optional[ResourcePolicy] = None) -> Number:
+    """
+    Вычисляет выражение из байтового буфера за один ленивый проход
+
+    Токены берутся из re.finditer по буферу по одному, скобки проверяются
+    по структурной глубине стека (движок bulk.RecordEvaluator над байтами).
+    Лимит токенов проверяется отдельным проходом до вычисления, который
+    останавливается на max_tokens + 1 токене.
+
+    Args:
+        buffer (Any): bytes, bytearray, memoryview или mmap с выражением в RPN
+        operators (dict[str, Callable[..., Any]]): Функции операторов с проверками
+        policy (Optional[ResourcePolicy]): Лимиты ресурсов (None - без ограничений)
+
+    Returns:
+        Number: Результат вычисления
+
+    Raises:
+        ValueError: При ошибках в выражении, вычислении или превышении лимитов
+        ZeroDivisionError: При делении на ноль
+    """
+    result = RecordEvaluator(operators, policy, binary=True).evaluate(buffer)
+    if result.error is not None:
+        # Текст ошибки формируется сейчас: после закрытия mmap буфер недоступен
+        raise result.exception()
+    return result.value  # type: ignore[return-value]
+
+
+def evaluate_file(path: Union[str, 'os.PathLike[str]'], operators: dict[str, Callable[..., Any]],
+                  policy: Optional[ResourcePolicy] = None) -> Number:
+    """
+    Вычисляет одно выражение из файла, отображённого в память
+
+    Args:
+        path (Union[str, os.PathLike[str]]): Путь к обычному файлу с выражением в RPN
+        operators (dict[str, Callable[..., Any]]): Функции операторов с проверками
+        policy (Optional[ResourcePolicy]): Лимиты ресурсов (None - без ограничений)
+
+    Returns:
+        Number: Результат вычисления
+
+    Raises:
+        OSError: Если файл не удаётся открыть или отобразить в память
+        ValueError: При ошибках в выражении, вычислении или превышении лимитов
+        ZeroDivisionError: При делении на ноль
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ValueError(ERROR_MESSAGES['empty_expression'])
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return evaluate_buffer(buffer, operators, policy)
@@ -0,0 +1,360 @@
+"""
+Векторизованное вычисление RPN выражения над столбцами NumPy
+
+Стек операторов проходится один раз, каждый оператор применяется сразу
+ко всем строкам. Семантика совпадает с RPNCalculator.evaluate() построчно:
+строки, на которых обычное вычисление завершилось бы ошибкой (деление
+на ноль, нецелочисленные операнды для '//' и '%', переполнение float
+при '**', комплексный результат), маскируются. Целые хранятся в int64,
+при угрозе переполнения операция пересчитывается над Python int (dtype=object).
+Вещественное '**' вычисляется numpy и может отличаться в последнем знаке.
+Операторы другой арности ('neg', 'powmod', 'sum' и т.д.) применяются
+построчно функцией калькулятора и совпадают с evaluate() точно.
+"""
+
+import importlib
+import re
+from typing import Any, Callable, Optional, Union
+from calculator import RPNCalculator
+from limits import ResourcePolicy, limit_error
+from constants import ERROR_MESSAGES, VARIABLE_PATTERN
+from registry import ARITIES, VARIADIC
+
+# numpy - необязательная зависимость
+np: Any
+try:
+    np = importlib.import_module('numpy')
+except ImportError:
+    np = None
+
+VARIABLE_RE = re.compile(VARIABLE_PATTERN)
+
+# Порог для оценки переполнения int64 с запасом на погрешность float64
+_INT64_SAFE = 2.0 ** 62
+# Целые с модулем больше 2**53 не представимы в float64 точно
+_FLOAT64_EXACT = 2 ** 53
+
+# Максимальная оценка размера произведения двух int64 в битах
+_EXACT_BITS = 128
+
+_ERROR = object()
+
+# Элемент стека: (значения, маска строк с ошибкой)
+Column = tuple[Any, Any]
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Для векторизованного вычисления требуется пакет numpy")
+
+
+def _to_column(name: str, array: Any) -> Any:
+    """
+    Приводит входной массив к int64, float64 или object
+
+    Args:
+        name (str): Имя переменной
+        array (Any): Массив или скаляр
+
+    Returns:
+        Any: Массив NumPy
+
+    Raises:
+        TypeError: Если тип элементов не числовой
+    """
+    column = np.asarray(array)
+    kind = column.dtype.kind
+    if kind in 'biu':
+        if kind == 'u' and column.size and column.max() > np.iinfo(np.int64).max:
+            return column.astype(object)
+        return column.astype(np.int64, copy=False)
+    if kind == 'f':
+        return column.astype(np.float64, copy=False)
+    if kind == 'O':
+        return column
+    raise TypeError(f"Неподдерживаемый тип столбца '{name}': {column.dtype}")
+
+
+def _constant(value: Union[int, float], shape: tuple[int, ...]) -> Any:
+    if isinstance(value, float):
+        return np.full(shape, value, dtype=np.float64)
+    if -_INT64_SAFE < value < _INT64_SAFE:
+        return np.full(shape, value, dtype=np.int64)
+    return np.full(shape, value, dtype=object)
+
+
+def _safe_scalar(function: Callable[[Any, Any], Any]) -> Any:
+    def apply(a: Any, b: Any) -> Any:
+        try:
+            result = function(a, b)
+        except Exception:
+            return _ERROR
+        if isinstance(result, complex):
+            return _ERROR
+        return result
+
+    return np.frompyfunc(apply, 2, 1)
+
+
+def _normalize(values: Any, mask: Any) -> Any:
+    """
+    Возвращает object-массиву компактный dtype, если все значения одного типа
+
+    Args:
+        values (Any): Массив Python чисел
+        mask (Any): Маска строк с ошибкой
+
+    Returns:
+        Any: Массив int64, float64 или object
+    """
+    valid = values[~mask]
+    is_float = np.frompyfunc(lambda v: isinstance(v, float), 1, 1)(valid).astype(bool)
+    if is_float.all():
+        result = np.ones(values.shape, dtype=np.float64)
+        result[~mask] = valid.astype(np.float64)
+        return result
+    if not is_float.any():
+        if not valid.size or (-_INT64_SAFE < min(valid) and max(valid) < _INT64_SAFE):
+            result = np.ones(values.shape, dtype=np.int64)
+            result[~mask] = valid.astype(np.int64)
+            return result
+    return values
+
+
+def _apply_object(function: Callable[[Any, Any], Any], x: Any, y: Any, mask: Any) -> Column:
+    """Применяет оператор поэлементно над Python числами (точная семантика)"""
+    xs = np.where(mask, 1, x.astype(object))
+    ys = np.where(mask, 1, y.astype(object))
+    with np.errstate(all='ignore'):
+        values = _safe_scalar(function)(xs, ys)
+    bad = np.frompyfunc(lambda v: v is _ERROR, 1, 1)(values).astype(bool)
+    if bad.any():
+        values[bad] = 1
+        mask = mask | bad
+    return _normalize(values, mask), mask
+
+
+def _apply_call(function: Callable[..., Any], operands: list[Column], reduce: bool) -> Column:
+    """
+    Применяет оператор другой арности построчно над Python числами
+
+    Args:
+        function (Callable[..., Any]): Функция оператора калькулятора
+        operands (list[Column]): Операнды (значения, маска)
+        reduce (bool): Передавать операнды списком (свёртка VARIADIC)
+
+    Returns:
+        Column: Результат (значения, маска)
+    """
+    mask = operands[0][1].copy()
+    for _, other in operands[1:]:
+        mask |= other
+    columns = [values.astype(object) for values, _ in operands]
+    values = np.ones(mask.shape, dtype=object)
+    for index in np.ndindex(mask.shape):
+        if mask[index]:
+            continue
+        row = [column[index] for column in columns]
+        try:
+            result = function(row) if reduce else function(*row)
+        except Exception:
+            result = _ERROR
+        if result is _ERROR or isinstance(result, complex):
+            mask[index] = True
+        else:
+            values[index] = result
+    return _normalize(values, mask), mask
+
+
+def _apply_float(symbol: str, x: Any, y: Any, mask: Any) -> Column:
+    """Применяет оператор, когда хотя бы один операнд - float64"""
+    if symbol in ('//', '%'):
+        return np.ones(mask.shape, dtype=np.float64), np.ones(mask.shape, dtype=bool)
+
+    x = x.astype(np.float64, copy=False)
+    y = y.astype(np.float64, copy=False)
+    bad = None
+    with np.errstate(all='ignore'):
+        if symbol == '+':
+            values = x + y
+        elif symbol == '-':
+            values = x - y
+        elif symbol == '*':
+            values = x * y
+        elif symbol == '/':
+            bad = y == 0
+            values = x / np.where(bad, 1.0, y)
+        else:
+            values = np.power(x, y)
+            finite = np.isfinite(x) & np.isfinite(y)
+            bad = ((x == 0) & (y < 0) & np.isfinite(y)) \
+                | ((x < 0) & finite & (y != np.floor(y))) \
+                | (np.isinf(values) & finite)
+
+    if bad is not None and bad.any():
+        values[bad] = 1.0
+        mask = mask | bad
+    return values, mask
+
+
+def _apply_int(symbol: str, x: Any, y: Any, mask: Any) -> Union[Column, None]:
+    """
+    Применяет оператор к двум столбцам int64
+
+    Returns:
+        Union[Column, None]: Результат или None, если нужен точный пересчёт над Python int
+    """
+    bad = None
+    with np.errstate(all='ignore'):
+        if symbol == '+':
+            values = x + y
+            if (((x ^ values) & (y ^ values)) < 0).any():
+                return None
+        elif symbol == '-':
+            values = x - y
+            if (((x ^ y) & (x ^ values)) < 0).any():
+                return None
+        elif symbol == '*':
+            if (np.abs(x.astype(np.float64) * y) >= _INT64_SAFE).any():
+                return None
+            values = x * y
+        elif symbol == '/':
+            if (np.abs(x) > _FLOAT64_EXACT).any() or (np.abs(y) > _FLOAT64_EXACT).any():
+                return None
+            bad = y == 0
+            values = x / np.where(bad, 1, y)
+        elif symbol in ('//', '%'):
+            bad = y == 0
+            divisor = np.where(bad, 1, y)
+            if ((x == np.iinfo(np.int64).min) & (divisor == -1)).any():
+                return None
+            values = x // divisor if symbol == '//' else np.mod(x, divisor)
+        else:
+            negative = y < 0
+            if negative.all():
+                return _apply_float(symbol, x, y, mask)
+            if negative.any():
+                return None
+            if (np.abs(x.astype(np.float64)) ** y >= _INT64_SAFE).any():
+                return None
+            values = np.power(x, y)
+
+    if bad is not None and bad.any():
+        values[bad] = 1
+        mask = mask | bad
+    return values, mask
+
+
+def _apply(symbol: str, left: Column, right: Column, function: Callable[[Any, Any], Any],
+           exact: bool = False) -> Column:
+    """
+    Применяет оператор к двум элементам стека
+
+    Args:
+        symbol (str): Оператор
+        left (Column): Левый операнд (значения, маска)
+        right (Column): Правый операнд (значения, маска)
+        function (Callable[[Any, Any], Any]): Функция оператора калькулятора (с проверками политики)
+        exact (bool): Вычислять целые только над Python int (нужно, если лимит размера меньше int64)
+
+    Returns:
+        Column: Результат (значения, маска)
+    """
+    x, x_mask = left
+    y, y_mask = right
+    mask = x_mask | y_mask
+    if x.dtype == object or y.dtype == object:
+        return _apply_object(function, x, y, mask)
+    if x.dtype.kind == 'i' and y.dtype.kind == 'i':
+        result = None if exact else _apply_int(symbol, x, y, mask)
+        if result is None:
+            return _apply_object(function, x, y, mask)
+        return result
+    return _apply_float(symbol, x, y, mask)
+
+
+def evaluate_columns(calculator: RPNCalculator, expression: str, arrays: dict[str, Any]) -> Any:
+    """
+    Вычисляет выражение с переменными над столбцами NumPy
+
+    Лимиты политики калькулятора соблюдаются как в evaluate(): превышение
+    количества токенов, глубины стека или размера литерала - ошибка для всех
+    строк, строки с результатом '*' и '**' сверх max_bits маскируются.
+
+    Args:
+        calculator (RPNCalculator): Калькулятор (токенизация, проверка скобок, разбор чисел)
+        expression (str): Выражение в RPN, переменные задаются именами
+        arrays (dict[str, Any]): Значения переменных - массивы одинаковой или совместимой формы
+
+    Returns:
+        numpy.ma.MaskedArray: Результаты построчно, строки с ошибкой замаскированы
+
+    Raises:
+        ImportError: Если numpy не установлен
+        ValueError: При ошибках, общих для всех строк (скобки, токены, нехватка операндов, лимиты)
+        TypeError: Если тип столбца не числовой
+    """
+    _require_numpy()
+    if not expression.strip():
+        raise ValueError(ERROR_MESSAGES['empty_expression'])
+
+    tokens = calculator._tokenize(expression)
+    policy: Optional[ResourcePolicy] = calculator.policy
+    if policy is not None:
+        error = policy.check_tokens(len(tokens))
+        if error is not None:
+            raise error
+    calculator._validate_parentheses(tokens)
+    operators = calculator._operators
+    # Результат int64 укладывается в 126 бит оценки произведения, при меньшем лимите
+    # '*' и '**' проверяются поэлементно
+    exact = policy is not None and policy.max_bits is not None and policy.max_bits < _EXACT_BITS
+
+    columns = {name: _to_column(name, array) for name, array in arrays.items()}
+    shape = np.broadcast_shapes(*(column.shape for column in columns.values())) if columns else ()
+    columns = {name: np.broadcast_to(column, shape) for name, column in columns.items()}
+    no_errors = np.zeros(shape, dtype=bool)
+    stack: list[Column] = []
+    bases: list[int] = []
+
+    for token in tokens:
+        if token == '(':
+            bases.append(len(stack))
+            continue
+        if token == ')':
+            bases.pop()
+            continue
+        if token in calculator.supported_operators:
+            arity = ARITIES[token]
+            count = len(stack) - (bases[-1] if bases else 0) if arity == VARIADIC else arity
+            if len(stack) < arity or count < 1:
+                raise ValueError(f"{ERROR_MESSAGES['insufficient_operands']} '{token}'")
+            if arity == 2:
+                right = stack.pop()
+                left = stack.pop()
+                stack.append(_apply(token, left, right, operators[token], exact and token in ('*', '**')))
+            else:
+                operands = stack[-count:]
+                del stack[-count:]
+                stack.append(_apply_call(operators[token], operands, arity == VARIADIC))
+            continue
+        if token in columns:
+            stack.append((columns[token], no_errors))
+        elif VARIABLE_RE.fullmatch(token):
+            raise ValueError(f"{ERROR_MESSAGES['unknown_variable']}: {token}")
+        else:
+            value = calculator._parse_number(token)
+            if policy is not None and policy.max_bits is not None and isinstance(value, int) \
+                    and value.bit_length() > policy.max_bits:
+                raise limit_error(f"результат больше {policy.max_bits} бит")
+            stack.append((_constant(value, shape), no_errors))
+        if policy is not None:
+            error = policy.check_depth(len(stack))
+            if error is not None:
+                raise error
+
+    if len(stack) != 1:
+        raise ValueError(f"{ERROR_MESSAGES['invalid_expression']}. В стеке осталось {len(stack)} элементов")
+
+    values, mask = stack[0]
+    return np.ma.MaskedArray(values, mask=mask)
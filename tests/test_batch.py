@@ -0,0 +1,80 @@
+"""
+Тесты пакетного режима RPN калькулятора
+"""
+import sys
+import os
+import io
+import subprocess
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import batch
+from batch import evaluate_stream, read_expressions, run_batch_mode, write_results
+from calculator import RPNCalculator
+
+
+class TestBatchMode:
+    """Класс тестов пакетного режима"""
+
+    def setup_method(self):
+        """Инициализация калькулятора перед каждым тестом"""
+        self.calculator = RPNCalculator()
+
+    def test_results_in_order(self) -> None:
+        """Тестирование порядка и формата результатов"""
+        source = io.StringIO("3 4 +\n1 0 /\n\n(3 4 +) 2 *\r\n")
+        output = io.StringIO()
+
+        stats = write_results(evaluate_stream(self.calculator, read_expressions(source)), output)
+
+        assert output.getvalue().splitlines() == [
+            "7", "Ошибка: Деление на ноль", "Ошибка: Пустое выражение", "14"]
+        assert stats.count == 4
+        assert stats.errors == 2
+        print("\n  ✓ Одна строка результата на каждую строку входа")
+
+    def test_chunked_flush(self, monkeypatch) -> None:
+        """Тестирование записи результатов порциями"""
+        monkeypatch.setattr(batch, 'FLUSH_EVERY', 3)
+        writes = []
+
+        class Output(io.StringIO):
+            def write(self, text):
+                writes.append(text)
+                return super().write(text)
+
+        output = Output()
+        write_results(evaluate_stream(self.calculator, (f"{i} 1 +" for i in range(7))), output)
+
+        assert len(writes) == 3
+        assert output.getvalue().splitlines() == [str(i + 1) for i in range(7)]
+        print("\n  ✓ Вывод сбрасывается порциями")
+
+    def test_file_source(self, tmp_path, capsys) -> None:
+        """Тестирование чтения выражений из файла"""
+        path = tmp_path / "input.txt"
+        path.write_text("2 3 **\nabc\n", encoding='utf-8')
+        output = io.StringIO()
+
+        run_batch_mode(str(path), output, self.calculator)
+
+        assert output.getvalue() == "8\nОшибка: Некорректный токен: abc\n"
+        assert "Обработано: 2, ошибок: 1" in capsys.readouterr().err
+        print("\n  ✓ Сводка выводится в stderr")
+
+    def test_broken_pipe_exits_quietly(self, tmp_path) -> None:
+        """Тестирование закрытия канала читателем (`--batch | head`)"""
+        path = tmp_path / "input.txt"
+        path.write_text(''.join(f"{i} 2 *\n" for i in range(200000)), encoding='utf-8')
+        process = subprocess.Popen([sys.executable, os.path.join(fp, 'main.py'), '--batch', str(path)],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        assert process.stdout.readline() == b"0\n"
+        process.stdout.close()
+
+        assert process.wait(timeout=30) == 0
+        assert b"Traceback" not in process.stderr.read()
+        process.stderr.close()
+        print("\n  ✓ Выход без трассировки при закрытом stdout")
@@ -0,0 +1,101 @@
+"""
+Тесты бенчмарков горячих путей RPN калькулятора
+"""
+import sys
+import os
+import json
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from benchmark import (THREAD_COUNTS, WORKLOADS, find_mode_mismatches, find_regressions, load_baseline, main,
+                       run_benchmarks, save_baseline)
+from cache import GIL_ENABLED
+from calculator import RPNCalculator
+
+
+class TestBenchmark:
+    """Класс тестов бенчмарков"""
+
+    def test_workloads_are_valid(self) -> None:
+        """Тестирование корректности сгенерированных нагрузок"""
+        calculator = RPNCalculator()
+        for name, workload in WORKLOADS.items():
+            expressions = workload(1)
+            assert expressions, f"Нагрузка '{name}' пуста"
+            if name == 'errors':
+                for expression in expressions[:9]:
+                    with pytest.raises((ValueError, ZeroDivisionError)):
+                        calculator.evaluate(expression)
+            else:
+                calculator.evaluate(expressions[0])
+        print("\n  ✓ Нагрузки вычисляются (или ожидаемо завершаются ошибкой)")
+
+    def test_run_reports_metrics(self) -> None:
+        """Тестирование состава результатов прогона"""
+        results = run_benchmarks(repeat=1, workloads=['errors'])
+
+        assert set(results) == {'errors/_tokenize', 'errors/_validate_parentheses', 'errors/_apply_operator',
+                                'errors/evaluate', 'errors/evaluate_uncached', 'errors/evaluate_many',
+                                'errors/compile_function'}
+        for measurement in results.values():
+            assert measurement['ns_per_token'] > 0
+            assert measurement['expressions_per_sec'] > 0
+
+    def test_regression_threshold(self) -> None:
+        """Тестирование сравнения с базовой линией"""
+        baseline = {'flat/evaluate': {'ns_per_token': 100.0, 'expressions_per_sec': 1.0}}
+
+        slower = {'flat/evaluate': {'ns_per_token': 130.0, 'expressions_per_sec': 1.0}}
+        assert find_regressions(slower, baseline, 50) == []
+        assert len(find_regressions(slower, baseline, 20)) == 1
+
+        new = {'nested/evaluate': {'ns_per_token': 500.0, 'expressions_per_sec': 1.0}}
+        assert find_regressions(new, baseline, 0) == []
+        print("\n  ✓ Замедление сверх порога считается регрессией")
+
+    def test_baseline_roundtrip(self, tmp_path) -> None:
+        """Тестирование сохранения и сравнения с базовой линией из CLI"""
+        path = str(tmp_path / "baseline.json")
+        results = {'errors/evaluate': {'ns_per_token': 1e-6, 'expressions_per_sec': 1.0}}
+        save_baseline(results, path)
+
+        assert load_baseline(path) == results
+        assert main(['--repeat', '1', '--workload', 'errors', '--baseline', path]) == 1
+        assert main(['--repeat', '1', '--workload', 'errors', '--save', path]) == 0
+        assert main(['--repeat', '1', '--workload', 'errors', '--baseline', path, '--threshold', '1000']) == 0
+
+    def test_thread_scaling(self, tmp_path, capsys) -> None:
+        """Тестирование нагрузки 'threads' и режима GIL в базовой линии"""
+        results = run_benchmarks(repeat=1, workloads=['threads'])
+        assert set(results) == {f'threads/evaluate_{count}' for count in THREAD_COUNTS}
+        assert all(measurement['expressions_per_sec'] > 0 for measurement in results.values())
+        path = str(tmp_path / "baseline.json")
+        assert main(['--repeat', '1', '--workload', 'threads', '--save', path]) == 0
+        assert f"GIL: {'включён' if GIL_ENABLED else 'выключен'}" in capsys.readouterr().out
+        with open(path, encoding='utf-8') as file:
+            assert all(measurement['gil'] == GIL_ENABLED for measurement in json.load(file)['results'].values())
+        print("\n  ✓ Пропускная способность измеряется для 1, 2, 4 и 8 потоков")
+
+    def test_gil_mode_mismatch(self, tmp_path, capsys) -> None:
+        """Тестирование: измерения в другом режиме GIL не сравниваются с базовой линией"""
+        baseline = {'threads/evaluate_4': {'ns_per_token': 100.0, 'expressions_per_sec': 1.0, 'gil': True},
+                    'flat/evaluate': {'ns_per_token': 100.0, 'expressions_per_sec': 1.0}}
+        results = {'threads/evaluate_4': {'ns_per_token': 500.0, 'expressions_per_sec': 1.0, 'gil': False},
+                   'flat/evaluate': {'ns_per_token': 500.0, 'expressions_per_sec': 1.0, 'gil': False}}
+        assert find_mode_mismatches(results, baseline) == ['threads/evaluate_4']
+        assert [line.split(':')[0] for line in find_regressions(results, baseline, 20)] == ['flat/evaluate']
+        results['threads/evaluate_4']['gil'] = True
+        assert find_mode_mismatches(results, baseline) == []
+        assert len(find_regressions(results, baseline, 20)) == 2
+
+        path = str(tmp_path / "baseline.json")
+        measured = run_benchmarks(repeat=1, workloads=['errors'])
+        save_baseline({name: {**measurement, 'ns_per_token': 1e-6, 'gil': not GIL_ENABLED}
+                       for name, measurement in measured.items()}, path)
+        assert main(['--repeat', '1', '--workload', 'errors', '--baseline', path]) == 0
+        assert "Режим GIL отличается от базовой линии" in capsys.readouterr().err
+        print("\n  ✓ Прогон без GIL не сравнивается с базовой линией с GIL и наоборот")
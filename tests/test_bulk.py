@@ -0,0 +1,109 @@
+"""
+Тесты вычисления RPN выражений без исключений
+"""
+import re
+import sys
+import os
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from bulk import EvaluationResult, RecordEvaluator, parse_number
+from calculator import OPERATOR_FUNCTIONS, RPNCalculator
+from limits import ResourcePolicy
+
+EXPRESSIONS = ["3 4 +", "(1 2 3 sum) 2.5 *", "2 100 97 powmod", "", "1 0 /", "5 0 %", "3.5 2 //",
+               "1 +", "1 abc +", "(4 +) 2 *", "() 1", "1 2 )", "(1 2 +", "1 2", "1 0 / (2 +)",
+               "10.0 400 **", "2 (sum) +", "1_000 +5 +", "1.5e3 .5 -", "1e3"]
+
+
+class TestEvaluateMany:
+    """Класс тестов evaluate_many"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.calculator = RPNCalculator()
+
+    def outcome(self, expression: str) -> tuple[object, ...]:
+        """Результат evaluate(): значение или тип и текст ошибки"""
+        try:
+            result = self.calculator.evaluate(expression)
+            return ('ok', result, type(result))
+        except (ValueError, ZeroDivisionError) as err:
+            return (type(err).__name__, str(err))
+
+    def test_matches_evaluate(self) -> None:
+        """Тестирование совпадения результатов и текста ошибок с evaluate()"""
+        results = list(self.calculator.evaluate_many(EXPRESSIONS))
+        assert len(results) == len(EXPRESSIONS)
+        for expression, result in zip(EXPRESSIONS, results):
+            if result.ok:
+                actual: tuple[object, ...] = ('ok', result.value, type(result.value))
+            else:
+                error = result.exception()
+                actual = (type(error).__name__, result.message)
+                assert str(error) == result.message
+            assert actual == self.outcome(expression), expression
+        print("\n  ✓ Значения и ошибки совпадают с evaluate()")
+
+    def test_error_keys_and_index(self) -> None:
+        """Тестирование ключей ошибок и индексов токенов"""
+        cases = {"": ('empty_expression', -1), "1 0 /": ('division_by_zero', 2),
+                 "1 2 + abc *": ('invalid_token', 3), "1 2 3 4 + + + +": ('insufficient_operands', 7),
+                 "(1 +) 2": ('incomplete_expression_in_parentheses', 3), "1 (2 (3": ('unmatched_parentheses', 3),
+                 "1 2": ('invalid_expression', 2), "3.5 2 %": ('integer_operands_required', 2),
+                 "0 -1 **": ('operation_error', 2), "4 5 +": (None, -1)}
+        for expression, result in zip(cases, self.calculator.evaluate_many(cases)):
+            assert (result.error, result.index) == cases[expression], expression
+        print("\n  ✓ Ошибка описывается ключом ERROR_MESSAGES и индексом токена")
+
+    def test_deferred_message(self) -> None:
+        """Тестирование отложенного формирования текста ошибки"""
+        result = next(self.calculator.evaluate_many(["(1 2 3 +) 4"]))
+        assert result.detail == (0, 8)
+        assert result.message == "Незавершенное выражение в скобках: 1 2 3 +"
+        assert repr(result) == "EvaluationResult(error='incomplete_expression_in_parentheses', index=5)"
+        assert EvaluationResult(7).message == ''
+        with pytest.raises(ValueError):
+            EvaluationResult(7).exception()
+        print("\n  ✓ Текст ошибки формируется только по запросу")
+
+    def test_no_exceptions_raised(self, monkeypatch) -> None:
+        """Тестирование отсутствия исключений при разборе чисел и проверяемых ошибках"""
+        def forbidden(token: str) -> None:
+            raise AssertionError("_parse_number не должен вызываться")
+
+        monkeypatch.setattr(self.calculator, '_parse_number', forbidden)
+        results = list(self.calculator.evaluate_many(["abc", "1 0 /", "5 0 //", "1.5 2 %", "2 3 0 powmod"]))
+        assert [result.error for result in results] == ['invalid_token', 'division_by_zero', 'division_by_zero',
+                                                        'integer_operands_required', 'division_by_zero']
+        assert parse_number("1_000") == 1000 and parse_number("1__0") is None
+        assert parse_number("9" * 5000) is None
+        print("\n  ✓ Ошибки находятся без исключений")
+
+    def test_policy(self) -> None:
+        """Тестирование лимитов политики"""
+        for policy, expression, key in ((ResourcePolicy(max_tokens=3), "1 0 / )", 'resource_limit_exceeded'),
+                                        (ResourcePolicy(max_stack_depth=2), "1 0 / 1 2 3 + +", 'resource_limit_exceeded'),
+                                        (ResourcePolicy(max_bits=64), "2 100 ** 1 +", 'resource_limit_exceeded'),
+                                        (ResourcePolicy(max_bits=8), "(1 0 /) (1000", 'unmatched_parentheses')):
+            calculator = RPNCalculator(policy=policy)
+            result = next(calculator.evaluate_many([expression]))
+            assert result.error == key
+            with pytest.raises(type(result.exception()), match=re.escape(result.message)):
+                calculator.evaluate(expression)
+        evaluator = RecordEvaluator(OPERATOR_FUNCTIONS, binary=True)
+        assert evaluator.evaluate(b"1 2 abc").message == "Некорректный токен: abc"
+        print("\n  ✓ Лимиты ресурсов соблюдаются в том же порядке")
+
+    def test_metrics(self) -> None:
+        """Тестирование evaluate_many с включёнными метриками"""
+        metrics = self.calculator.enable_instrumentation()
+        results = list(self.calculator.evaluate_many(["1 2 +", "1 0 /"]))
+        assert results[0].value == 3
+        assert results[1].error == 'division_by_zero'
+        assert metrics.errors == {'division_by_zero': 1}
+        print("\n  ✓ С метриками выражения учитываются как в evaluate()")
@@ -170,6 +170,51 @@ class TestRPNCalculator:
             assert result == expected, f"Неверный результат для {expression}"
             print(f"  ✓ '{expression}' = {result}")
 
+    def test_compiled_cache(self) -> None:
+        """Тестирование кэша скомпилированных выражений"""
+        calculator = RPNCalculator(cache_size=2)
+
+        print("\nТесты кэша скомпилированных выражений:")
+        assert calculator.evaluate("3 4 +") == 7
+        assert calculator.evaluate("3 4 +") == 7
+        assert calculator.cache_info()['hits'] == 1
+        assert calculator.cache_info()['misses'] == 1
+        print("  ✓ Повторное выражение берётся из кэша")
+
+        calculator.evaluate("1 2 +")
+        calculator.evaluate("5 6 *")
+        assert calculator.cache_info()['size'] == 2
+        assert calculator.cache_info()['evictions'] == 1
+        print("  ✓ Размер кэша ограничен")
+
+        calculator.invalidate_cache()
+        assert calculator.cache_info()['size'] == 0
+        print("  ✓ Кэш сбрасывается")
+
+        program = calculator.compile("(3 4 + 5 *) 2 /")
+        assert program.run() == 17.5
+        assert program.run() == 17.5
+        print("  ✓ Скомпилированная программа переиспользуется")
+
+    def test_compiled_matches_uncached(self) -> None:
+        """Тестирование совпадения ошибок кэшированного и обычного вычисления"""
+        uncached = RPNCalculator(cache_size=0)
+        expressions = [
+            "3 4 + 2 *", "1 0 / abc +", "abc 1 0 /", "3 +", "3 4", "1 0 / +",
+            "3.5 2 %", "2.0 10000 **", "(4 +) 2 *", "(3 4 +)) 1 0 /",
+        ]
+
+        print("\nТесты совпадения кэшированного и обычного вычисления:")
+        for expression in expressions:
+            outcomes = []
+            for calculator in (self.calculator, uncached):
+                try:
+                    outcomes.append(calculator.evaluate(expression))
+                except (ValueError, ZeroDivisionError) as e:
+                    outcomes.append((type(e), str(e)))
+            assert outcomes[0] == outcomes[1], f"Расхождение для {expression}: {outcomes}"
+            print(f"  ✓ '{expression}'")
+
 
 def run_all_tests():
     """Запуск всех тестов"""
@@ -184,6 +229,8 @@ def run_all_tests():
         test_class.test_syntax_errors,
         test_class.test_complex_expressions,
         test_class.test_operator_precedence,
+        test_class.test_compiled_cache,
+        test_class.test_compiled_matches_uncached,
     ]
 
     for method in test_methods:
@@ -0,0 +1,108 @@
+"""
+Тесты кодогенерации RPN выражений в функции Python
+"""
+import sys
+import os
+import inspect
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from calculator import RPNCalculator
+from codegen import MAX_NESTING, generate
+from limits import ResourcePolicy
+
+EXPRESSIONS = ["x y + 2 /", "x y /", "x y //", "x y %", "x y **", "x neg y abs -", "x y 7 powmod",
+               "(x y 3 sum) (x y max) *", "(x y mean) (x y min) -", "x y prod", "x 0.5 **", "1 2 + 3 4 + x",
+               "x y", "x +", "x abc +", "x 1 0 / +", "x y / 1 0 // +", "x 2 ** 1000003 %", "-0.0 x +"]
+VALUES = [(3, 4), (7, 0), (2.5, -2), (-8, 3), (10 ** 20, 3), (-0.0, 0.5), (0, -1)]
+
+
+class TestCodegen:
+    """Класс тестов кодогенерации"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.calculator = RPNCalculator()
+
+    def result(self, function, *args) -> tuple[object, ...]:
+        """Результат с типом или тип и текст ошибки"""
+        try:
+            value = function(*args)
+        except (ValueError, ZeroDivisionError) as err:
+            return type(err), str(err)
+        return type(value), repr(value)
+
+    def substituted(self, expression: str, x: object, y: object) -> str:
+        """Выражение с подставленными значениями переменных"""
+        return ' '.join(str(x) if token == 'x' else str(y) if token == 'y' else token
+                        for token in self.calculator._tokenize(expression))
+
+    def test_formula(self) -> None:
+        """Тестирование функции: параметры, результат и исходный код формулы"""
+        function = self.calculator.compile_function("x y + 2 /")
+        assert list(inspect.signature(function).parameters) == ['x', 'y']
+        assert function(3, 4) == 3.5
+        assert function(y=1, x=2) == 1.5
+        assert self.calculator.compile_function("2 3 **")() == 8
+        source, _ = generate(self.calculator, "x y + 2 / neg")
+        assert "return (-((x + y) / 2))" in source
+        print("\n  ✓ Переменные становятся параметрами, формула - операциями Python")
+
+    def test_matches_evaluate(self) -> None:
+        """Тестирование совпадения результатов, типов и ошибок с evaluate()"""
+        for calculator in (self.calculator, RPNCalculator(policy=ResourcePolicy(max_bits=80, max_stack_depth=3))):
+            for expression in EXPRESSIONS:
+                function = calculator.compile_function(expression)
+                names = list(inspect.signature(function).parameters)
+                for x, y in VALUES:
+                    arguments = [{'x': x, 'y': y, 'abc': 1}[name] for name in names]
+                    text = self.substituted(expression, x, y).replace('abc', '1')
+                    expected = self.result(calculator.evaluate, text)
+                    assert self.result(function, *arguments) == expected, (expression, x, y)
+        print("\n  ✓ Результаты и тексты ошибок совпадают с evaluate()")
+
+    def test_compile_errors(self) -> None:
+        """Тестирование ошибок разбора и имён, которые нельзя сделать параметрами"""
+        with pytest.raises(ValueError, match="Пустое выражение"):
+            self.calculator.compile_function("  ")
+        with pytest.raises(ValueError, match="Несбалансированные скобки"):
+            self.calculator.compile_function("(x 1 +")
+        with pytest.raises(ValueError, match="Некорректный токен: if"):
+            self.calculator.compile_function("x if +")(1)
+        with pytest.raises(ValueError, match="Некорректный токен: _rpn_t0"):
+            self.calculator.compile_function("x _rpn_t0 +")(1)
+        print("\n  ✓ Ключевые слова Python и служебный префикс - некорректные токены")
+
+    def test_deep_expressions(self) -> None:
+        """Тестирование глубокой вложенности и длинных цепочек"""
+        depth = 20 * MAX_NESTING
+        nested = '(' * depth + 'x' + ' 1 +)' * depth
+        assert self.calculator.compile_function(nested)(0.5) == depth + 0.5
+        chain = 'x ' + ' '.join(f"{i % 7} + x *" for i in range(3000))
+        assert self.calculator.compile_function(chain)(1) == self.calculator.evaluate(chain.replace('x', '1'))
+        source, _ = generate(self.calculator, "x 0 / " + "1 + " * depth)
+        assert source.count('=') > 1
+        with pytest.raises(ZeroDivisionError):
+            self.calculator.compile_function("x 0 / " + "1 + " * depth)(1)
+        print("\n  ✓ Глубокие формулы делятся на присваивания временным переменным")
+
+    def test_cache_budget_and_metrics(self) -> None:
+        """Тестирование кэша функций, бюджета времени и метрик"""
+        function = self.calculator.compile_function("x 1 +")
+        assert self.calculator.compile_function("x 1 +") is function
+        self.calculator.invalidate_cache("x 1 +")
+        assert self.calculator.compile_function("x 1 +") is not function
+
+        budget = RPNCalculator(policy=ResourcePolicy(time_budget=1e-9))
+        chain = 'x' + ' 1 +' * 1000
+        with pytest.raises(ValueError, match="время вычисления превысило бюджет"):
+            budget.compile_function(chain)(1)
+
+        metrics = self.calculator.enable_instrumentation()
+        assert self.calculator.compile_function("x 1 + 2 *")(1) == 4
+        assert metrics.operators['+'][0] == metrics.operators['*'][0] == 1
+        print("\n  ✓ Функции кэшируются, бюджет времени и счётчики операторов соблюдаются")
@@ -0,0 +1,107 @@
+"""
+Тесты бинарного колоночного формата результатов
+"""
+import sys
+import os
+import io
+import mmap
+import subprocess
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+import columnar
+from batch import evaluate_stream, run_batch_mode
+from calculator import RPNCalculator
+from columnar import (ERROR_BASE, ERROR_CODES, STATUS_BIGINT, STATUS_FLOAT, STATUS_INT, STATUS_OTHER,
+                      ColumnarReader, ColumnarWriter)
+
+EXPRESSIONS = ["3 4 +", "1 0 /", "2.5 2 *", "2 100 **", "-8 0.5 **", "abc", "", "2 63 ** 1 -",
+               "2 63 ** neg", "2 63 **", "1 2", "-0.0 1 *", "1e300. 1e300. *"]
+
+
+class TestColumnar:
+    """Класс тестов колоночного формата"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.calculator = RPNCalculator()
+        self.results = list(evaluate_stream(self.calculator, EXPRESSIONS))
+
+    def rows(self, results) -> list[tuple[bool, str]]:
+        """Строки результата: repr чисел (тип и знак нуля), текст остальных"""
+        return [(ok, repr(value) if type(value) in (int, float) else str(value)) for ok, value in results]
+
+    def test_roundtrip(self, tmp_path, monkeypatch) -> None:
+        """Тестирование записи порциями и чтения всех типов результатов"""
+        monkeypatch.setattr(columnar, 'CHUNK_ROWS', 4)
+        path = str(tmp_path / "results.col")
+        with ColumnarWriter(path) as writer:
+            writer.extend(self.results)
+        assert len(writer) == len(EXPRESSIONS) and writer.errors == 5
+
+        with ColumnarReader(path) as reader:
+            assert len(reader) == len(EXPRESSIONS)
+            assert self.rows(reader) == self.rows(self.results)
+            assert list(reader.status[:5]) == [STATUS_INT, ERROR_BASE + ERROR_CODES.index('division_by_zero'),
+                                               STATUS_FLOAT, STATUS_BIGINT, STATUS_OTHER]
+            assert reader.ints[0] == 7 and reader.floats[2] == 5.0
+            assert [reader.error(i) for i in (0, 1, 5, 6, 10)] == [None, 'division_by_zero', 'invalid_token',
+                                                                  'empty_expression', 'invalid_expression']
+        print("\n  ✓ Целые, float, большие целые, прочие результаты и ошибки читаются без потерь")
+
+    def test_cached_strings(self, tmp_path) -> None:
+        """Тестирование строк результата из постоянного кэша"""
+        path = str(tmp_path / "results.col")
+        with ColumnarWriter(path) as writer:
+            writer.extend((ok, str(value)) for ok, value in self.results)
+            writer.extend([(True, '1e+16'), (True, '-inf')])
+        with ColumnarReader(path) as reader:
+            assert self.rows(reader)[:-2] == self.rows(self.results)
+            assert reader[len(reader) - 2] == (True, 1e16) and reader.status[len(reader) - 1] == STATUS_FLOAT
+        print("\n  ✓ Строки из кэша разбираются обратно в типизированные значения")
+
+    def test_zero_copy(self, tmp_path) -> None:
+        """Тестирование: столбцы - представления отображения файла в память"""
+        path = str(tmp_path / "results.col")
+        with ColumnarWriter(path) as writer:
+            writer.extend((True, float(i)) for i in range(1000))
+        reader = ColumnarReader(path)
+        assert isinstance(reader.floats.obj, mmap.mmap)
+        assert reader.floats.format == 'd' and reader.ints.format == 'q' and len(reader.floats) == 1000
+        assert sum(reader.floats) == sum(range(1000))
+        np = pytest.importorskip('numpy')
+        status, _, floats = reader.arrays()
+        assert not floats.flags.owndata and floats.dtype == np.float64
+        assert (status == STATUS_FLOAT).all() and floats[999] == 999.0
+        reader.close()
+        print("\n  ✓ Столбцы читаются без копирования (memoryview и NumPy)")
+
+    def test_invalid_file(self, tmp_path) -> None:
+        """Тестирование чтения файла в другом формате"""
+        path = tmp_path / "results.txt"
+        path.write_bytes(b"7\n" * 40)
+        with pytest.raises(ValueError, match="не в колоночном формате"):
+            ColumnarReader(str(path))
+        print("\n  ✓ Файл в другом формате не читается")
+
+    def test_batch_columnar(self, tmp_path) -> None:
+        """Тестирование пакетного режима и флага --columnar"""
+        source = tmp_path / "input.txt"
+        source.write_text("2 3 **\nabc\n7 2 /\n", encoding='utf-8')
+        path = str(tmp_path / "results.col")
+        output = io.StringIO()
+        stats = run_batch_mode(str(source), output, self.calculator, columnar=path)
+        assert output.getvalue() == "" and (stats.count, stats.errors) == (3, 1)
+        with ColumnarReader(path) as reader:
+            assert list(reader) == [(True, 8), (False, "Некорректный токен: abc"), (True, 3.5)]
+        command = [sys.executable, os.path.join(fp, 'main.py'), '--batch', str(source), '--columnar', path]
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=60)
+        assert completed.returncode == 0 and completed.stdout == ""
+        assert "Обработано: 3, ошибок: 1" in completed.stderr
+        with ColumnarReader(path) as reader:
+            assert reader[2] == (True, 3.5)
+        print("\n  ✓ --columnar пишет результаты в колоночный файл")
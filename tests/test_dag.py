@@ -0,0 +1,107 @@
+"""
+Тесты мемоизации общих подвыражений RPN калькулятора
+"""
+import sys
+import os
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from calculator import RPNCalculator
+from dag import DagOptimizer, DagProgram
+from limits import ResourcePolicy
+
+
+class TestDag:
+    """Класс тестов DAG и мемоизации"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.plain = RPNCalculator(cache_size=0)
+        self.calculator = RPNCalculator(memo_size=256)
+
+    def result(self, calculator: RPNCalculator, expression: str) -> tuple[object, ...]:
+        """Результат или тип и текст ошибки"""
+        try:
+            value = calculator.evaluate(expression)
+        except (ValueError, ZeroDivisionError) as err:
+            return type(err), str(err)
+        return type(value), repr(value)
+
+    def test_identical_groups_computed_once(self) -> None:
+        """Тестирование дедупликации одинаковых групп в одном выражении"""
+        group = "(3 4 + 5 *)"
+        expression = f"{group} {group} + {group} *"
+        program = self.calculator.get_compiled(expression)
+
+        assert isinstance(program, DagProgram)
+        assert program.applies == 8
+        assert len(program.operations) == 4
+        assert self.calculator.evaluate(expression) == 70 * 35
+        info = self.calculator.memo_info()
+        assert info['deduplicated'] == 4
+        assert info['computed'] == 4
+        print("\n  ✓ Одинаковые группы вычисляются один раз")
+
+    def test_memo_across_calls(self) -> None:
+        """Тестирование мемоизации поддеревьев между вызовами"""
+        self.calculator.evaluate("(2 100 ** 3 -) 7 %")
+        before = self.calculator.memo_info()['computed']
+        assert self.calculator.evaluate("(2 100 ** 3 -) 5 +") == 2 ** 100 - 3 + 5
+        info = self.calculator.memo_info()
+
+        assert info['computed'] == before + 1
+        assert info['memo_hits'] == 2
+        print("\n  ✓ Общее поддерево разных выражений берётся из таблицы мемоизации")
+
+    def test_literal_types_not_merged(self) -> None:
+        """Тестирование различения 1 и 1.0, 0.0 и -0.0"""
+        for expression in ("1 1 + 1.0 1 + -", "-0.0 1 * 0.0 1 * +", "1 -0.0 / 2 +", "2 1.0 // 2 1 // +"):
+            assert self.result(self.calculator, expression) == self.result(self.plain, expression)
+        assert repr(self.calculator.evaluate("-0.0 1 *")) == "-0.0"
+        assert repr(self.calculator.evaluate("0.0 1 *")) == "0.0"
+        print("\n  ✓ Литералы разных типов и знаков - разные узлы")
+
+    def test_errors_match_plain(self) -> None:
+        """Тестирование совпадения ошибок и их приоритета"""
+        expressions = [
+            "1 0 / (1 0 /) +",
+            "(1 2 +) (1 2 +) abc",
+            "(1 2 +) (1 2 +)",
+            "1 2 + +",
+            "1.5 2 % (1.5 2 %) +",
+            "(1 0 //) 3",
+            "(3 4 +",
+            "",
+        ]
+        for expression in expressions:
+            for _ in range(2):
+                assert self.result(self.calculator, expression) == self.result(self.plain, expression), expression
+        print("\n  ✓ Ошибки совпадают с обычным вычислением")
+
+    def test_bounded_memo(self) -> None:
+        """Тестирование ограничения таблицы мемоизации"""
+        calculator = RPNCalculator(cache_size=0, memo_size=4)
+        for i in range(100):
+            assert calculator.evaluate(f"{i} 1 + 2 *") == (i + 1) * 2
+        info = calculator.memo_info()
+
+        assert info['memo_size'] == 4
+        assert info['computed'] == 200
+        assert calculator.evaluate("99 1 + 2 *") == 200
+        assert calculator.memo_info()['memo_hits'] == 2
+        with pytest.raises(ValueError):
+            DagOptimizer(0)
+        print("\n  ✓ Таблица мемоизации ограничена")
+
+    def test_policy(self) -> None:
+        """Тестирование мемоизации с лимитами ресурсов"""
+        calculator = RPNCalculator(policy=ResourcePolicy(max_bits=64, time_budget=1.0), memo_size=16)
+        with pytest.raises(ValueError, match="Превышен лимит ресурсов"):
+            calculator.evaluate("(2 100 **) (2 100 **) +")
+        assert calculator.evaluate("(2 10 **) (2 10 **) +") == 2048
+        assert RPNCalculator().memo_info() == {}
+        print("\n  ✓ Лимиты ресурсов соблюдаются")
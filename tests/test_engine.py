@@ -0,0 +1,96 @@
+"""
+Тесты однопроходного движка вычисления RPN выражений
+"""
+import sys
+import os
+import time
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from calculator import OPERATOR_FUNCTIONS, RPNCalculator
+from engine import evaluate_fused
+
+
+class TestFusedEngine:
+    """Класс тестов однопроходного движка"""
+
+    def setup_method(self):
+        """Инициализация калькуляторов перед каждым тестом"""
+        self.calculator = RPNCalculator(cache_size=0)
+
+    def evaluate(self, expression: str):
+        return evaluate_fused(expression, OPERATOR_FUNCTIONS, self.calculator._parse_number)
+
+    def test_results(self) -> None:
+        """Тестирование результатов вычисления"""
+        cases = [
+            ("3 4 +", 7),
+            ("(3 4 +) 2 *", 14),
+            ("3(4 2 *)+", 11),
+            ("( ( 3 4 + ) )", 7),
+            ("(3 4 + 5 *) 2 /", 17.5),
+        ]
+
+        print("Тесты результатов однопроходного движка:")
+        for expression, expected in cases:
+            assert self.evaluate(expression) == expected
+            print(f"  ✓ '{expression}' = {expected}")
+
+    def test_error_priority(self) -> None:
+        """Тестирование приоритета ошибок: скобки проверяются до вычисления"""
+        cases = [
+            ("1 0 / )", ValueError, "Несбалансированные скобки"),
+            ("abc (3 +)", ValueError, "Незавершенное выражение в скобках: 3 +"),
+            ("1 0 / (3 4 + 2)", ValueError, "Незавершенное выражение в скобках: 3 4 + 2"),
+            ("(+ (3 +))", ValueError, "Незавершенное выражение в скобках: 3 +"),
+            ("(1 0 /) abc", ZeroDivisionError, "Деление на ноль"),
+            ("1 0 / abc", ZeroDivisionError, "Деление на ноль"),
+            ("abc 1 0 /", ValueError, "Некорректный токен: abc"),
+            ("(3 ())", ValueError, "Пустые скобки"),
+            ("3 4", ValueError, "Некорректное выражение. В стеке осталось 2 элементов"),
+        ]
+
+        print("\nТесты приоритета ошибок:")
+        for expression, expected_error, message in cases:
+            with pytest.raises(expected_error) as info:
+                self.evaluate(expression)
+            assert str(info.value) == message
+            print(f"  ✓ '{expression}': {message}")
+
+    def test_deep_nesting_is_linear(self) -> None:
+        """Тестирование линейного времени на глубокой вложенности скобок"""
+        depth = 10000
+        expression = "(" * depth + "1" + ")" * depth
+
+        start = time.perf_counter()
+        assert self.evaluate(expression) == 1
+        self.calculator._validate_parentheses(self.calculator._tokenize(expression))
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.5, f"Слишком медленно: {elapsed:.3f} с"
+        print(f"\n  ✓ Вложенность {depth}: {elapsed * 1000:.1f} мс")
+
+
+def run_all_tests():
+    """Запуск всех тестов"""
+    test_class = TestFusedEngine()
+
+    test_methods = [
+        test_class.test_results,
+        test_class.test_error_priority,
+        test_class.test_deep_nesting_is_linear,
+    ]
+
+    for method in test_methods:
+        test_class.setup_method()
+        method()
+
+    print("\nВсё успешно пройдено! Победа!")
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,117 @@
+"""
+Тесты метрик RPN калькулятора
+"""
+import sys
+import os
+import json
+import subprocess
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from calculator import RPNCalculator
+from instrumentation import OPERATION_ERROR, error_key
+from limits import ResourcePolicy
+
+
+class TestInstrumentation:
+    """Класс тестов метрик"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.calculator = RPNCalculator()
+        self.metrics = self.calculator.enable_instrumentation()
+
+    def test_phases_and_operators(self) -> None:
+        """Тестирование времени фаз и счётчиков операторов"""
+        assert self.calculator.evaluate("(3 4 + 5 *) 2 /") == 17.5
+        assert self.calculator.evaluate("(3 4 + 5 *) 2 /") == 17.5
+        snapshot = self.metrics.snapshot()
+
+        phases = snapshot['phases']
+        assert phases['evaluate']['count'] == 2
+        assert phases['compile']['count'] == 1
+        assert phases['tokenize']['count'] == 1
+        assert phases['validate']['count'] == 1
+        assert phases['parse']['count'] == 4
+        assert phases['apply']['count'] == 6
+        assert phases['evaluate']['buckets'][-1][1] == 2
+        assert snapshot['operators']['+']['calls'] == 2
+        assert snapshot['operators']['/']['calls'] == 2
+        assert snapshot['cache']['hits'] == 1
+        print("\n  ✓ Фазы, операторы и кэш учитываются")
+
+    def test_errors_by_key(self) -> None:
+        """Тестирование счётчиков ошибок по ключам ERROR_MESSAGES"""
+        for expression in ("1 0 /", "2 0 //", "1 +", "1 2", "(1 2 +", "()", "1 abc +", "1.5 2 %", ""):
+            with pytest.raises((ValueError, ZeroDivisionError)):
+                self.calculator.evaluate(expression)
+
+        assert self.metrics.snapshot()['errors'] == {
+            'division_by_zero': 2,
+            'empty_expression': 1,
+            'empty_parentheses': 1,
+            'insufficient_operands': 1,
+            'integer_operands_required': 1,
+            'invalid_expression': 1,
+            'invalid_token': 1,
+            'unmatched_parentheses': 1,
+        }
+        assert error_key(ValueError("что-то другое")) == OPERATION_ERROR
+        print("\n  ✓ Ошибки учитываются по ключам ERROR_MESSAGES")
+
+    def test_policy_errors(self) -> None:
+        """Тестирование метрик вместе с лимитами ресурсов"""
+        calculator = RPNCalculator(policy=ResourcePolicy(max_bits=64))
+        metrics = calculator.enable_instrumentation()
+        with pytest.raises(ValueError):
+            calculator.evaluate("2 100 **")
+        assert calculator.evaluate("2 10 **") == 1024
+
+        assert metrics.snapshot()['errors'] == {'resource_limit_exceeded': 1}
+        assert metrics.snapshot()['operators']['**']['calls'] == 2
+        print("\n  ✓ Лимиты ресурсов работают с включёнными метриками")
+
+    def test_export(self) -> None:
+        """Тестирование экспорта в JSON и Prometheus"""
+        self.calculator.evaluate("3 4 +")
+        with pytest.raises(ZeroDivisionError):
+            self.calculator.evaluate("1 0 /")
+
+        assert json.loads(self.metrics.to_json())['errors'] == {'division_by_zero': 1}
+        text = self.metrics.to_prometheus()
+        assert '# TYPE rpn_phase_seconds histogram' in text
+        assert 'rpn_phase_seconds_count{phase="evaluate"} 2' in text
+        assert 'rpn_phase_seconds_bucket{phase="evaluate",le="+Inf"} 2' in text
+        assert 'rpn_operator_calls_total{operator="+"} 1' in text
+        assert 'rpn_errors_total{error="division_by_zero"} 1' in text
+        assert 'rpn_cache_misses_total 2' in text
+        print("\n  ✓ Снимок экспортируется в JSON и Prometheus")
+
+    def test_disable_and_reset(self) -> None:
+        """Тестирование выключения и сброса метрик"""
+        self.calculator.evaluate("3 4 +")
+        self.metrics.reset()
+        assert self.metrics.snapshot()['phases']['evaluate']['count'] == 0
+
+        self.calculator.disable_instrumentation()
+        assert self.calculator.metrics is None
+        assert 'compile' not in self.calculator.__dict__
+        assert self.calculator.evaluate("3 4 +") == 7
+        assert self.metrics.snapshot()['phases']['evaluate']['count'] == 0
+        print("\n  ✓ Выключенные метрики не собираются")
+
+    def test_main_flag(self, tmp_path: object) -> None:
+        """Тестирование флага --metrics в пакетном режиме"""
+        target = os.path.join(str(tmp_path), 'metrics.prom')
+        completed = subprocess.run([sys.executable, os.path.join(fp, 'main.py'), '--batch', '--metrics', target],
+                                   input="3 4 +\n1 0 /\n", capture_output=True, text=True, timeout=60)
+
+        assert completed.stdout.splitlines()[0] == "7"
+        with open(target, encoding='utf-8') as file:
+            text = file.read()
+        assert 'rpn_errors_total{error="division_by_zero"} 1' in text
+        print("\n  ✓ --metrics записывает снимок после пакетного режима")
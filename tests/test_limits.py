@@ -0,0 +1,74 @@
+"""
+Тесты лимитов ресурсов RPN калькулятора
+"""
+import sys
+import os
+import time
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from calculator import RPNCalculator
+from limits import ResourcePolicy
+
+
+class TestResourcePolicy:
+    """Класс тестов лимитов ресурсов"""
+
+    def test_power_rejected_before_computing(self) -> None:
+        """Тестирование отказа от огромной степени без вычисления"""
+        for cache_size in (1024, 0):
+            calculator = RPNCalculator(cache_size, ResourcePolicy(max_bits=4096))
+            started = time.perf_counter()
+            with pytest.raises(ValueError, match="Превышен лимит ресурсов: результат больше 4096 бит"):
+                calculator.evaluate("2 99999999 **")
+            assert time.perf_counter() - started < 0.1
+            assert calculator.evaluate("2 4000 **") == 2 ** 4000
+        print("\n  ✓ '2 99999999 **' отклоняется мгновенно")
+
+    def test_multiplication_and_literals(self) -> None:
+        """Тестирование оценки размера произведения и литералов"""
+        calculator = RPNCalculator(policy=ResourcePolicy(max_bits=100))
+        big = 2 ** 60
+
+        assert calculator.evaluate(f"{big} 3 *") == big * 3
+        with pytest.raises(ValueError, match="Превышен лимит ресурсов"):
+            calculator.evaluate(f"{big} {big} *")
+        with pytest.raises(ValueError, match="Превышен лимит ресурсов"):
+            calculator.evaluate(f"{2 ** 120} 1 +")
+
+        calculator = RPNCalculator(policy=ResourcePolicy(max_bits=4096))
+        with pytest.raises(ValueError, match="Превышен лимит ресурсов: результат больше 4096 бит"):
+            calculator.evaluate("3 2 1100 ** **")
+        assert calculator.evaluate("1.5 2 *") == 3.0
+
+    def test_tokens_and_stack_depth(self) -> None:
+        """Тестирование лимитов количества токенов и глубины стека"""
+        calculator = RPNCalculator(policy=ResourcePolicy(max_tokens=5, max_stack_depth=2))
+
+        assert calculator.evaluate("1 2 + 3 +") == 6
+        with pytest.raises(ValueError, match="больше 5 токенов"):
+            calculator.evaluate("1 2 + 3 + 4 +")
+        with pytest.raises(ValueError, match="глубина стека больше 2"):
+            calculator.evaluate("1 2 3 + +")
+        print("\n  ✓ Лимиты токенов и глубины стека")
+
+    def test_time_budget(self) -> None:
+        """Тестирование бюджета времени на выражение"""
+        expression = "1" + " 1 +" * 200000
+        calculator = RPNCalculator(policy=ResourcePolicy(time_budget=1e-4))
+        calculator.compile(expression)
+
+        with pytest.raises(ValueError, match="время вычисления превысило бюджет"):
+            calculator.evaluate(expression)
+        assert RPNCalculator(policy=ResourcePolicy(time_budget=10.0)).evaluate("3 4 +") == 7
+
+    def test_invalid_policy(self) -> None:
+        """Тестирование некорректных лимитов"""
+        with pytest.raises(ValueError):
+            ResourcePolicy(max_bits=0)
+        with pytest.raises(ValueError):
+            ResourcePolicy(time_budget=-1.0)
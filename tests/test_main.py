@@ -0,0 +1,99 @@
+"""
+Тесты точки входа: однократное вычисление, коды завершения и время запуска
+"""
+import sys
+import os
+import subprocess
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+from main import EXIT_ERROR, EXIT_OK, main, one_shot_expressions
+
+# Бюджет времени импорта модулей при однократном вычислении, мс
+STARTUP_BUDGET_MS = 100
+
+# Модули других режимов, которые однократное вычисление не импортирует
+HEAVY_MODULES = ('argparse', 'batch', 'peephole', 'asyncio', 'sqlite3', 'concurrent.futures', 'bulk')
+
+
+def run_main(*args: str, stdin: str = "") -> subprocess.CompletedProcess:
+    """Запускает main.py в отдельном процессе"""
+    return subprocess.run([sys.executable, os.path.join(fp, 'main.py'), *args], input=stdin,
+                          capture_output=True, text=True, timeout=60)
+
+
+def import_times(*args: str) -> list[tuple[str, int, bool]]:
+    """Импорты main.py по -X importtime: (модуль, совокупное время в мкс, верхний уровень)"""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', os.path.join(fp, 'main.py'), *args],
+                               capture_output=True, text=True, timeout=60)
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            imports.append((name.strip(), int(cumulative), not name[1:].startswith(' ')))
+    # Импорты запуска интерпретатора заканчиваются модулем site
+    names = [name for name, _, _ in imports]
+    return imports[names.index('site') + 1:] if 'site' in names else imports
+
+
+class TestMain:
+    """Класс тестов точки входа"""
+
+    def test_one_shot_expressions(self) -> None:
+        """Тестирование разбора аргументов однократного вычисления без argparse"""
+        assert one_shot_expressions(['-e', '3 4 +', '--expression', '1 2', '-e5 1 -', '--expression=2 2 *']) \
+            == ['3 4 +', '1 2', '5 1 -', '2 2 *']
+        assert one_shot_expressions(['3', '4', '+']) == ['3 4 +']
+        assert one_shot_expressions([]) is None
+        assert one_shot_expressions(['-e']) is None
+        assert one_shot_expressions(['-e', '3 4 +', '--max-bits', '8']) is None
+        assert one_shot_expressions(['-3', '4', '+']) is None
+        assert one_shot_expressions(['2', '100', '**', '--max-bits', '64']) is None
+        assert one_shot_expressions(['5', '3', '-']) is None
+        print("\n  ✓ Флаги -e и слова выражения разбираются без argparse, прочие флаги - через argparse")
+
+    def test_exit_codes(self, capsys) -> None:
+        """Тестирование вывода и кодов завершения"""
+        assert main(['-e', '3 4 +', '-e', '2 0.5 **']) == EXIT_OK
+        assert capsys.readouterr().out == "7\n1.4142135623730951\n"
+        assert main(['-e', '1 0 /', '-e', '2 3 *']) == EXIT_ERROR
+        captured = capsys.readouterr()
+        assert captured.out == "6\n" and captured.err == "Ошибка: Деление на ноль\n"
+        assert main(['-e', '2 100 **', '--max-bits', '64']) == EXIT_ERROR
+        assert "Превышен лимит ресурсов" in capsys.readouterr().err
+        assert main(['-3', '4', '+']) == EXIT_OK and capsys.readouterr().out == "1\n"
+        assert main(['5', '3', '-']) == EXIT_OK and capsys.readouterr().out == "2\n"
+        assert main(['2', '100', '**', '--max-bits', '64']) == EXIT_ERROR
+        assert "Превышен лимит ресурсов" in capsys.readouterr().err
+        print("\n  ✓ Результаты в stdout, ошибки в stderr и код EXIT_ERROR")
+
+    def test_cli(self) -> None:
+        """Тестирование main.py: однократное вычисление, неверные аргументы, конец ввода"""
+        completed = run_main('3', '4', '+', '2', '*')
+        assert (completed.returncode, completed.stdout, completed.stderr) == (0, "14\n", "")
+        completed = run_main('3', '4', '+', '--workers', '2')
+        assert (completed.returncode, completed.stdout) == (0, "7\n")
+        completed = run_main('2', '100', '**', '--max-bits', '64')
+        assert completed.returncode == 1 and "Превышен лимит ресурсов" in completed.stderr
+        completed = run_main('-e', 'abc')
+        assert (completed.returncode, completed.stdout) == (1, "")
+        assert completed.stderr == "Ошибка: Некорректный токен: abc\n"
+        assert run_main('--bogus').returncode == 2
+        completed = run_main(stdin="3 4 +\n")
+        assert completed.returncode == 0 and "Результат: 7" in completed.stdout
+        print("\n  ✓ Коды завершения 0, 1 и 2; конец ввода завершает интерактивный режим")
+
+    def test_startup_imports(self) -> None:
+        """Тестирование времени импорта при однократном вычислении (-X importtime)"""
+        runs = [import_times('-e', '3 4 +') for _ in range(3)]
+        assert {'calculator', 'engine', 'registry'} <= {name for name, _, _ in runs[0]}
+        assert not {name for name, _, _ in runs[0]} & set(HEAVY_MODULES)
+        total = min(sum(cumulative for _, cumulative, top in imports if top) for imports in runs) / 1000
+        assert total < STARTUP_BUDGET_MS, runs[0]
+        assert 'argparse' in {name for name, _, _ in import_times('--batch', os.devnull)}
+        print(f"\n  ✓ Импорт при однократном вычислении: {total:.1f} мс (бюджет {STARTUP_BUDGET_MS} мс)")
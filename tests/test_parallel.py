@@ -0,0 +1,76 @@
+"""
+Тесты параллельного пакетного вычисления RPN выражений
+"""
+import sys
+import os
+import io
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from batch import run_batch_mode
+from calculator import RPNCalculator
+from parallel import ParallelStats, evaluate_parallel
+
+
+class TestParallelBatch:
+    """Класс тестов параллельного пакетного режима"""
+
+    def test_results_in_order(self) -> None:
+        """Тестирование порядка результатов при вычислении в пуле"""
+        expressions = [f"{i} 2 *" if i % 50 else f"{i} 0 /" for i in range(1000)]
+        stats = ParallelStats()
+
+        results = list(evaluate_parallel(expressions, workers=2, chunk_size=64, max_in_flight=3,
+                                         serial_threshold=100, stats=stats))
+
+        assert results == [(True, i * 2) if i % 50 else (False, "Деление на ноль") for i in range(1000)]
+        assert not stats.serial
+        assert sum(worker.count for worker in stats.workers.values()) == 1000
+        assert sum(worker.chunks for worker in stats.workers.values()) == 16
+        print("\n  ✓ Порядок результатов сохраняется")
+
+    def test_serial_fallback(self) -> None:
+        """Тестирование последовательного режима для малого входа"""
+        stats = ParallelStats()
+
+        results = list(evaluate_parallel(["3 4 +", "abc"], workers=4, stats=stats))
+
+        assert results == [(True, 7), (False, "Некорректный токен: abc")]
+        assert stats.serial
+        assert not stats.workers
+
+        calculator = RPNCalculator()
+        metrics = calculator.enable_instrumentation()
+        calculator.evaluate("3 4 +")
+        results = list(evaluate_parallel(["3 4 +", "1 0 /"], workers=4, calculator=calculator))
+        assert results == [(True, 7), (False, "Деление на ноль")]
+        assert calculator.cache_info()['hits'] == 1 and metrics.operators['+'][0] == 2
+        print("\n  ✓ Малый вход вычисляется без пула процессов калькулятором вызывающего")
+
+    def test_invalid_arguments(self) -> None:
+        """Тестирование некорректных параметров пула"""
+        with pytest.raises(ValueError):
+            list(evaluate_parallel(["1 1 +"], workers=0))
+        with pytest.raises(ValueError):
+            list(evaluate_parallel(["1 1 +"], workers=2, chunk_size=0))
+
+    def test_batch_mode_workers(self, tmp_path, capsys, monkeypatch) -> None:
+        """Тестирование пакетного режима с несколькими процессами"""
+        import parallel
+        monkeypatch.setattr(parallel, 'SERIAL_THRESHOLD', 10)
+        monkeypatch.setattr(parallel, 'CHUNK_SIZE', 8)
+        path = tmp_path / "input.txt"
+        path.write_text(''.join(f"{i} 1 +\n" for i in range(100)), encoding='utf-8')
+        output = io.StringIO()
+
+        stats = run_batch_mode(str(path), output, workers=2)
+
+        assert output.getvalue().splitlines() == [str(i + 1) for i in range(100)]
+        assert not stats.serial
+        assert sum(worker.chunks for worker in stats.workers.values()) == 13
+        assert "процесс" in capsys.readouterr().err
+        print("\n  ✓ Сводка содержит скорость каждого процесса")
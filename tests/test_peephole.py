@@ -0,0 +1,103 @@
+"""
+Тесты peephole-оптимизации скомпилированных RPN программ
+"""
+import sys
+import os
+import time
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+from calculator import OP_APPLY, OP_CALL, OP_PUSH, RPNCalculator
+from limits import ResourcePolicy
+from peephole import POWER_MODULO
+
+EXPRESSIONS = ["3 4 + 2 *", "2 0.5 ** 1 *", "-0.0 1 *", "-0.0 0 +", "0.0 neg 0 +", "-0.0 0 -", "2.5 1 **",
+               "7 1 //", "7.5 1 //", "5 3 ** 7 %", "2 -1 ** 7 %", "0 -1 ** 7 %", "2.0 3 ** 7 %", "10.0 400 ** 7 %",
+               "-8 0.5 ** 3 %", "2 3 ** 0 %", "2 3 ** 2.0 %", "(2 3 +) 4 ** (5 2 +) %", "1 0 / 2 ** 7 %",
+               "(1 2 3 sum) 1 * 0 +", "2 100 ** 3 -", "1 2", "1 +", "abc 1 *", "-8 0.5 ** 1 **"]
+
+
+class TestPeephole:
+    """Класс тестов peephole-оптимизации"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.calculator = RPNCalculator()
+        self.plain = RPNCalculator(peephole=False)
+        # С бюджетом времени константы не сворачиваются: остаются слияние и тождества
+        self.budget = RPNCalculator(policy=ResourcePolicy(time_budget=60.0))
+        self.budget_plain = RPNCalculator(policy=ResourcePolicy(time_budget=60.0), peephole=False)
+
+    def result(self, calculator: RPNCalculator, expression: str) -> tuple[object, ...]:
+        """Результат с типом или тип и текст ошибки"""
+        try:
+            value = calculator.evaluate(expression)
+        except (ValueError, ZeroDivisionError) as err:
+            return type(err), str(err)
+        return type(value), repr(value)
+
+    def test_results_unchanged(self) -> None:
+        """Тестирование совпадения результатов и ошибок с программой без оптимизации"""
+        for expression in EXPRESSIONS:
+            assert self.result(self.calculator, expression) == self.result(self.plain, expression), expression
+            assert self.result(self.budget, expression) == self.result(self.budget_plain, expression), expression
+        print("\n  ✓ Результаты, типы и ошибки не меняются")
+
+    def test_constant_folding(self) -> None:
+        """Тестирование свёртки констант"""
+        assert self.calculator.get_compiled("(1 2 3 sum) 2 * 1 -").code == ((OP_PUSH, 11),)
+        assert self.calculator.get_compiled("2 100 ** 3 -").code == ((OP_PUSH, 2 ** 100 - 3),)
+        code = self.calculator.get_compiled("2 5000 ** 1 +").code
+        assert [opcode for opcode, _ in code] == [OP_PUSH, OP_PUSH, OP_APPLY, OP_PUSH, OP_APPLY]
+        code = self.calculator.get_compiled("1 0 / 2 3 + *").code
+        assert code[3:] == ((OP_PUSH, 5), code[4]) and code[4][0] == OP_APPLY
+        print("\n  ✓ Операции над литералами вычисляются при компиляции, кроме ошибок и больших степеней")
+
+    def test_power_modulo_fused(self) -> None:
+        """Тестирование слияния 'a b ** m %' в pow(a, b, m)"""
+        code = self.budget.get_compiled("(2 3 +) 10000000 ** 1000003 %").code
+        assert code[-1][0] == OP_CALL and code[-1][1][0] == POWER_MODULO
+        assert all(arg[0] != '**' for opcode, arg in code if opcode == OP_APPLY)
+        started = time.perf_counter()
+        assert self.budget.evaluate("(2 3 +) 10000000 ** 1000003 %") == pow(5, 10000000, 1000003)
+        assert self.calculator.evaluate("123456 10000000 ** 1000003 %") == pow(123456, 10000000, 1000003)
+        assert time.perf_counter() - started < 1.0
+        assert self.budget.get_compiled("2 3 ** 0 %").code[-1][1][0] == '%'
+        print("\n  ✓ Степень по модулю вычисляется без полной степени")
+
+    def test_identities(self) -> None:
+        """Тестирование тождеств x 1 *, x 0 +, x 1 **"""
+        code = self.budget.get_compiled("2 3 + 1 * 0 + 1 ** 0 - 1 //").code
+        assert [arg for opcode, arg in code if opcode == OP_PUSH] == [2, 3]
+        code = self.budget.get_compiled("2.5 3 + 0 +").code
+        assert code[-1][1][0] == '+' and code[-2] == (OP_PUSH, 0)
+        code = self.budget.get_compiled("2 0.5 ** 1 *").code
+        assert code[-1][1][0] == '*'
+        print("\n  ✓ Тождества удаляются только для подходящих типов")
+
+    def test_guarded_operators_unchanged(self) -> None:
+        """Тестирование: операторы с проверкой лимитов и метрики не оптимизируются"""
+        calculator = RPNCalculator(policy=ResourcePolicy(max_bits=64, time_budget=60.0))
+        code = calculator.get_compiled("2 3 ** 7 % 1 *").code
+        assert [arg[0] for opcode, arg in code if opcode == OP_APPLY] == ['**', '%', '*']
+        assert self.result(calculator, "2 100 ** 7 %")[1].startswith("Превышен лимит ресурсов")
+        metrics = self.calculator.enable_instrumentation()
+        assert self.calculator.evaluate("2 3 + 1 *") == 5
+        assert metrics.operators['+'][0] == metrics.operators['*'][0] == 1
+        assert RPNCalculator(memo_size=16).evaluate("5 3 ** 7 %") == 6
+        print("\n  ✓ Лимиты и счётчики операторов сохраняются")
+
+    def test_evaluate_many_fused(self) -> None:
+        """Тестирование слияния в evaluate_many"""
+        started = time.perf_counter()
+        results = list(self.plain.evaluate_many(["123456 10000000 ** 1000003 %", "2 3 ** 0 %", "2 -1 ** 7 %",
+                                                 "(2 10000000 ** 7 %) 1 +", "2 3 **  7\t% 1 +"]))
+        assert time.perf_counter() - started < 1.0
+        assert results[0].value == pow(123456, 10000000, 1000003)
+        assert results[1].error == 'division_by_zero' and results[1].index == 4
+        assert results[2].error == 'integer_operands_required'
+        assert [results[3].value, results[4].value] == [pow(2, 10000000, 7) + 1, 2]
+        print("\n  ✓ evaluate_many вычисляет 'a b ** m %' как pow(a, b, m)")
@@ -0,0 +1,117 @@
+"""
+Тесты постоянного кэша результатов RPN калькулятора
+"""
+import sys
+import os
+import io
+import subprocess
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+import persistent
+from batch import evaluate_stream, run_batch_mode
+from calculator import RPNCalculator
+from limits import ResourcePolicy
+from persistent import ResultCache, cache_key, cache_namespace, evaluate_cached
+
+EXPRESSIONS = ["3 4 +", "1 0 /", "", "(1 2 3 sum) 2 *", "abc", "3   4\t+", "2 0.5 **", "1 +", "3 4 +"]
+
+
+class TestResultCache:
+    """Класс тестов постоянного кэша"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.calculator = RPNCalculator()
+        self.evaluated: list[str] = []
+
+    def evaluate(self, misses: list[str]):
+        """Вычисление промахов с учётом вычисленных выражений"""
+        self.evaluated.extend(misses)
+        return evaluate_stream(self.calculator, misses)
+
+    def test_warm_run_evaluates_nothing(self, tmp_path) -> None:
+        """Тестирование повторного запуска: результаты из кэша без вычисления"""
+        path = str(tmp_path / "cache.db")
+        expected = [(ok, str(value)) for ok, value in evaluate_stream(self.calculator, EXPRESSIONS)]
+        with ResultCache(path) as cache:
+            assert list(evaluate_cached(self.calculator, EXPRESSIONS, cache, self.evaluate, chunk_size=4)) == expected
+            assert cache.stats()['writes'] == 7
+        assert len(self.evaluated) == 7
+        self.evaluated.clear()
+        with ResultCache(path) as cache:
+            assert list(evaluate_cached(self.calculator, EXPRESSIONS, cache, self.evaluate)) == expected
+            assert cache.stats() == {'hits': 9, 'misses': 0, 'writes': 0, 'evictions': 0, 'size': 7}
+        assert self.evaluated == []
+        print("\n  ✓ Повторный запуск берёт все результаты из файла кэша")
+
+    def test_key_normalization(self) -> None:
+        """Тестирование ключа: нормализованные токены и пространство имён"""
+        namespace = cache_namespace(self.calculator)
+
+        def key(expression: str) -> bytes:
+            return cache_key(self.calculator._tokenize(expression), namespace)
+
+        assert key("(1 2 +) 3 *") == key(" ( 1  2 +)\t3 * ")
+        assert key("12 3 +") != key("1 23 +")
+        assert cache_namespace(RPNCalculator(policy=ResourcePolicy(max_bits=64))) != namespace
+        assert cache_namespace(RPNCalculator(cache_size=0)) == namespace
+        print("\n  ✓ Ключ не зависит от пробелов, но зависит от политики")
+
+    def test_eviction(self, monkeypatch) -> None:
+        """Тестирование вытеснения по количеству записей и по возрасту"""
+        now = [1000.0]
+        monkeypatch.setattr(persistent.time, 'time', lambda: now[0])
+        cache = ResultCache(':memory:', max_entries=3)
+        for i in range(5):
+            cache.put_many([(bytes([i]), True, str(i))])
+            now[0] += 10
+        now[0] += persistent.TOUCH_INTERVAL
+        assert set(cache.get_many([b'\x00'])) == {b'\x00'}
+        assert cache.evict() == 2
+        assert set(cache.get_many([bytes([i]) for i in range(5)])) == {b'\x00', b'\x03', b'\x04'}
+        cache.close()
+        cache = ResultCache(':memory:', max_age=500.0)
+        cache.put_many([(b'old', True, '1')])
+        now[0] += 300
+        cache.put_many([(b'new', False, 'Деление на ноль')])
+        now[0] += 300
+        assert cache.evict() == 1
+        assert cache.get_many([b'old', b'new']) == {b'new': (False, 'Деление на ноль')}
+        cache.close()
+        with pytest.raises(ValueError):
+            ResultCache(':memory:', max_entries=0)
+        print("\n  ✓ Вытесняются давно не использованные записи")
+
+    def test_time_budget_errors_not_cached(self, monkeypatch) -> None:
+        """Тестирование: ошибки бюджета времени не записываются"""
+        calculator = RPNCalculator(policy=ResourcePolicy(time_budget=1.0))
+        message = "Превышен лимит ресурсов: время вычисления больше 1.0 с"
+        monkeypatch.setattr(calculator, 'evaluate_many', None)
+        cache = ResultCache(':memory:')
+        results = list(evaluate_cached(calculator, ["1 2 +", "2 3 **"], cache,
+                                       lambda misses: [(True, 3), (False, message)]))
+        assert results == [(True, '3'), (False, message)]
+        assert len(cache) == 1
+        cache.close()
+        print("\n  ✓ Недетерминированные ошибки не кэшируются")
+
+    def test_batch_cache(self, tmp_path, capsys) -> None:
+        """Тестирование пакетного режима с кэшем и флага --cache"""
+        source = tmp_path / "input.txt"
+        source.write_text("2 3 **\nabc\n2 3 **\n", encoding='utf-8')
+        with ResultCache(str(tmp_path / "cache.db")) as cache:
+            output = io.StringIO()
+            run_batch_mode(str(source), output, self.calculator, cache=cache)
+        assert output.getvalue() == "8\nОшибка: Некорректный токен: abc\n8\n"
+        assert "промахов 3, записано 2" in capsys.readouterr().err
+        command = [sys.executable, os.path.join(fp, 'main.py'), '--batch', str(source),
+                   '--cache', str(tmp_path / "cache.db"), '--cache-max-entries', '1']
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=60)
+        assert completed.stdout == "8\nОшибка: Некорректный токен: abc\n8\n"
+        assert "попаданий 3, промахов 0, записано 0, вытеснено 1, записей 1" in completed.stderr
+        print("\n  ✓ --cache вычисляет только выражения, которых нет в кэше")
@@ -0,0 +1,104 @@
+"""
+Тесты реестра операторов RPN калькулятора
+"""
+import sys
+import os
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from calculator import OPERATOR_FUNCTIONS, RPNCalculator
+from constants import SUPPORTED_OPERATORS
+from engine import evaluate_fused
+from limits import ResourcePolicy
+from registry import OPERATORS, VARIADIC, describe_operation
+from server import estimate_cost
+
+
+class TestOperatorRegistry:
+    """Класс тестов реестра операторов"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.calculators = [RPNCalculator(), RPNCalculator(cache_size=0), RPNCalculator(memo_size=64)]
+
+    def check(self, expression: str, expected: object) -> None:
+        """Проверяет результат во всех движках"""
+        for calculator in self.calculators:
+            result = calculator.evaluate(expression)
+            assert result == expected and type(result) is type(expected), (expression, result)
+
+    def check_error(self, expression: str, error: type, message: str) -> None:
+        """Проверяет ошибку во всех движках"""
+        for calculator in self.calculators:
+            with pytest.raises(error, match=message):
+                calculator.evaluate(expression)
+
+    def test_registry(self) -> None:
+        """Тестирование состава реестра"""
+        assert OPERATORS.keys() == SUPPORTED_OPERATORS.keys()
+        assert OPERATORS['neg'].arity == 1
+        assert OPERATORS['powmod'].arity == 3
+        assert OPERATORS['powmod'].integers
+        assert OPERATORS['sum'].arity == VARIADIC
+        assert OPERATOR_FUNCTIONS['+'](2, 3) == 5
+        print("\n  ✓ Реестр описывает арность, функции и проверки типов")
+
+    def test_unary_and_ternary(self) -> None:
+        """Тестирование унарных операторов и powmod"""
+        self.check("3 neg", -3)
+        self.check("-2.5 abs", 2.5)
+        self.check("(3 4 +) neg 2 *", -14)
+        self.check("2 100 97 powmod", pow(2, 100, 97))
+        self.check("3 -1 7 powmod", 5)
+        self.check_error("1.5 2 3 powmod", ValueError, "Требуются целочисленные операнды")
+        self.check_error("2 3 0 powmod", ZeroDivisionError, "Деление на ноль")
+        self.check_error("2 3 powmod", ValueError, "Недостаточно операндов для оператора 'powmod'")
+        self.check_error("2 0 7 powmod 0 neg /", ZeroDivisionError, "Деление на ноль")
+        print("\n  ✓ 'neg', 'abs' и 'powmod' работают во всех движках")
+
+    def test_variadic(self) -> None:
+        """Тестирование свёртки операндов группы"""
+        self.check("1 2 3 4 sum", 10)
+        self.check("(1 2 3 max) 2 *", 6)
+        self.check("10 (1 2 3 sum) -", 4)
+        self.check("1 (2 3 4 prod) 5 min", 1)
+        self.check("1 2 3 4 mean", 2.5)
+        self.check("(7 sum)", 7)
+        self.check("1 2.5 sum", 3.5)
+        self.check_error("sum", ValueError, "Недостаточно операндов для оператора 'sum'")
+        self.check_error("2 (sum) +", ValueError, "Незавершенное выражение в скобках: sum")
+        self.check_error("(1 0 /) 2 sum", ZeroDivisionError, "Деление на ноль")
+        print("\n  ✓ 'sum', 'prod', 'min', 'max', 'mean' сворачивают группу")
+
+    def test_sum_matches_chain(self) -> None:
+        """Тестирование совпадения 'sum' с цепочкой '+'"""
+        numbers = ' '.join(str(i) for i in range(10000))
+        for calculator in self.calculators:
+            assert calculator.evaluate(f"{numbers} sum") == calculator.evaluate(numbers + " +" * 9999)
+        print("\n  ✓ 10000 чисел складываются одним оператором")
+
+    def test_policy_and_errors(self) -> None:
+        """Тестирование лимитов и текста ошибок n-арных операторов"""
+        calculator = RPNCalculator(policy=ResourcePolicy(max_bits=64))
+        with pytest.raises(ValueError, match="Превышен лимит ресурсов"):
+            calculator.evaluate("4294967296 4294967296 4294967296 prod")
+        assert calculator.evaluate("65536 65536 65536 prod") == 2 ** 48
+        assert calculator.evaluate("2 99999999 1000 powmod") == pow(2, 99999999, 1000)
+        huge = 2 ** 1100
+        with pytest.raises(ValueError, match=r"Ошибка при выполнении операции mean\(\d+, \d+\)"):
+            evaluate_fused(f"{huge} {huge} mean", OPERATOR_FUNCTIONS, calculator._parse_number)
+        with pytest.raises(ValueError, match=r"Ошибка при выполнении операции mean\(\d+, \d+\)"):
+            RPNCalculator().evaluate(f"{huge} {huge} mean")
+        assert describe_operation('sum', list(range(20))).endswith("... (20 операндов))")
+        print("\n  ✓ 'prod' ограничен max_bits, ошибки описывают операнды")
+
+    def test_estimate_cost(self) -> None:
+        """Тестирование оценки стоимости в сетевом режиме"""
+        assert estimate_cost("2 99999999 1000 powmod") < 1 << 16
+        assert estimate_cost("2 99999999 **") >= 1 << 16
+        assert estimate_cost("(1 2 3 sum) 4 *") < 1 << 16
+        print("\n  ✓ 'powmod' считается дешёвым для сетевого режима")
@@ -0,0 +1,94 @@
+"""
+Тесты сетевого режима RPN калькулятора
+"""
+import sys
+import os
+import asyncio
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+from loadgen import run_load
+from server import MAX_COST, RPNServer, ServerConfig, estimate_cost, parse_address
+
+
+async def exchange(port: int, payload: bytes) -> list[str]:
+    """Отправляет запросы одним пакетом и читает ответы до закрытия соединения"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(payload)
+    writer.write_eof()
+    data = await reader.read()
+    writer.close()
+    return data.decode().splitlines()
+
+
+async def with_server(config: ServerConfig, scenario):
+    """Запускает сервер на свободном порту на время сценария"""
+    server = RPNServer(config=config)
+    listener = await server.start('127.0.0.1', 0)
+    try:
+        return await scenario(server, listener.sockets[0].getsockname()[1])
+    finally:
+        await server.close()
+
+
+class TestServer:
+    """Класс тестов сетевого режима"""
+
+    def test_estimate_cost(self) -> None:
+        """Тестирование оценки стоимости выражения"""
+        offload = ServerConfig().offload_cost
+        assert estimate_cost("3 4 +") < 100
+        assert estimate_cost("2 10 **") < offload
+        assert estimate_cost("7 200 **" + " 7 200 ** *" * 50) >= offload
+        assert estimate_cost("2 99999999 **") >= offload
+        assert estimate_cost("2 99999999999999999999 **") == MAX_COST
+        assert estimate_cost("99999 999 ** 999 **") >= offload
+        assert estimate_cost("3 +") < 100
+        assert parse_address("8765") == (None, 8765)
+        assert parse_address("localhost:8765") == ('localhost', 8765)
+
+    def test_pipelined_replies_in_order(self) -> None:
+        """Тестирование порядка ответов при конвейерных запросах и пуле процессов"""
+        async def scenario(server, port):
+            payload = b"2 3000 ** 2 2999 ** /\n3 4 +\n1 0 /\n\n(3 4 +) 2 *\n"
+            return server, await exchange(port, payload)
+
+        server, lines = asyncio.run(with_server(ServerConfig(workers=1, offload_cost=1000), scenario))
+
+        assert lines == ["2.0", "7", "Ошибка: Деление на ноль", "Ошибка: Пустое выражение", "14"]
+        assert server.stats['offloaded'] == 1
+        assert server.stats['requests'] == 5
+        assert server.stats['errors'] == 2
+        print("\n  ✓ Ответы приходят в порядке запросов")
+
+    def test_connection_limits(self) -> None:
+        """Тестирование лимитов длины строки и количества соединений"""
+        async def scenario(server, port):
+            too_long = await exchange(port, b"1 " * 100 + b"\n3 4 +\n")
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"3 4 +\n")
+            assert await reader.readline() == b"7\n"
+            rejected = await exchange(port, b"3 4 +\n")
+            writer.close()
+            return too_long, rejected
+
+        too_long, rejected = asyncio.run(with_server(ServerConfig(max_connections=1, max_line=64, workers=0),
+                                                     scenario))
+
+        assert too_long == ["Ошибка: Слишком длинная строка"]
+        assert rejected == ["Ошибка: Сервер перегружен"]
+
+    def test_load_generator(self) -> None:
+        """Тестирование генератора нагрузки"""
+        async def scenario(server, port):
+            return await run_load(["3 4 +", "1 0 /"], port=port, connections=4, requests=200, pipeline=8)
+
+        stats = asyncio.run(with_server(ServerConfig(workers=0), scenario))
+
+        assert stats.count == 200
+        assert stats.errors == 100
+        assert 0 < stats.percentile(0.5) <= stats.percentile(0.99)
+        print(f"\n  ✓ {stats.summary()}")
@@ -0,0 +1,131 @@
+"""
+Тесты инкрементальной сессии RPN калькулятора
+"""
+import sys
+import os
+import subprocess
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from calculator import RPNCalculator
+from limits import ResourcePolicy
+from session import Session
+
+
+class TestSession:
+    """Класс тестов сессии"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.session = Session(interval=4, max_checkpoints=3)
+
+    def test_persistent_stack(self) -> None:
+        """Тестирование сохранения стека между строками"""
+        assert self.session.push("3 4") == 4
+        assert self.session.push("+") == 7
+        assert self.session.push("(2 3 *) *") == 42
+        assert self.session.push("(1 2 3 sum)") == 6
+        assert self.session.stack == [42, 6]
+        assert self.session.push("sum") == 48
+        assert self.session.position == 16
+        print("\n  ✓ Стек сохраняется между строками")
+
+    def test_line_is_atomic(self) -> None:
+        """Тестирование отката строки с ошибкой"""
+        self.session.push("10 2")
+        for line, error, message in (("5 0 / +", ZeroDivisionError, "Деление на ноль"),
+                                     ("+ + +", ValueError, "Недостаточно операндов для оператора '\\+'"),
+                                     ("(1 +)", ValueError, "Незавершенное выражение в скобках: 1 +"),
+                                     ("()", ValueError, "Пустые скобки"),
+                                     (")", ValueError, "Несбалансированные скобки"),
+                                     ("1 abc", ValueError, "Некорректный токен: abc")):
+            with pytest.raises(error, match=message):
+                self.session.push(line)
+            assert self.session.stack == [10, 2]
+            assert self.session.position == 2
+        print("\n  ✓ Строка с ошибкой не меняет состояние")
+
+    def test_open_group_across_lines(self) -> None:
+        """Тестирование группы, открытой в одной строке и закрытой в другой"""
+        self.session.push("2 (3")
+        self.session.push("4 +")
+        assert self.session.push(") *") == 14
+        with pytest.raises(ValueError, match="Незавершенное выражение в скобках: 5 6"):
+            self.session.push("(5 6 )")
+        print("\n  ✓ Группы могут занимать несколько строк")
+
+    def test_undo_replays_from_checkpoint(self) -> None:
+        """Тестирование отмены с повтором от ближайшей контрольной точки"""
+        self.session.push("1 2 + 3 * 4 + 5 * 6 +")
+        assert self.session.result == 71
+        replayed = self.session.replayed
+        assert self.session.undo(2) == 65
+        assert self.session.replayed - replayed == 1
+        assert self.session.undo(0) == 65
+        assert self.session.push("7 -") == 58
+        print("\n  ✓ Отмена повторяет только токены после контрольной точки")
+
+    def test_edit(self) -> None:
+        """Тестирование правки токена"""
+        self.session.push("1 2 + 3 * 4 +")
+        assert self.session.edit(4, "10") == 34
+        assert self.session.edit(1, "-") == 26
+        assert self.session.history()[-4:] == ["10", "*", "4", "-"]
+        assert self.session.edit(2, "0") == 30
+        with pytest.raises(ZeroDivisionError):
+            self.session.edit(1, "/")
+        before = list(self.session.stack)
+        assert before == [30]
+        with pytest.raises(ValueError, match="Некорректный токен"):
+            self.session.edit(2, "abc")
+        assert self.session.stack == before
+        print("\n  ✓ Правка пересчитывает следующие токены, ошибка не меняет состояние")
+
+    def test_bounded_checkpoints(self) -> None:
+        """Тестирование ограничения памяти контрольных точек"""
+        for _ in range(100):
+            self.session.push("1 +" if self.session.stack else "1")
+        assert len(self.session._checkpoints) == 3
+        assert len(self.session.history()) <= 12
+        assert self.session.undo_limit <= 12
+        with pytest.raises(ValueError, match="Можно отменить не больше"):
+            self.session.undo(50)
+        assert self.session.result == 100
+        print("\n  ✓ Хранится не больше max_checkpoints точек и истории после самой старой")
+
+    def test_long_line_rollback(self) -> None:
+        """Тестирование отката строки длиннее всех контрольных точек"""
+        self.session.push("5")
+        with pytest.raises(ZeroDivisionError):
+            self.session.push("1 +" * 30 + " 0 /")
+        assert self.session.stack == [5]
+        assert self.session.push("1 +") == 6
+        print("\n  ✓ Длинная строка с ошибкой откатывается целиком")
+
+    def test_policy(self) -> None:
+        """Тестирование лимитов калькулятора в сессии"""
+        session = Session(RPNCalculator(policy=ResourcePolicy(max_bits=64, max_stack_depth=3)))
+        with pytest.raises(ValueError, match="Превышен лимит ресурсов"):
+            session.push("2 100 **")
+        with pytest.raises(ValueError, match="глубина стека больше 3"):
+            session.push("1 2 3 4")
+        assert session.stack == []
+        with pytest.raises(ValueError):
+            Session(interval=0)
+        print("\n  ✓ Лимиты ресурсов соблюдаются")
+
+    def test_session_mode(self) -> None:
+        """Тестирование интерактивной сессии в main.py"""
+        completed = subprocess.run([sys.executable, os.path.join(fp, 'main.py'), '--session'],
+                                   input="3 4\n+\n2 *\nundo\n5 *\nedit 3 10\n1 0 /\nexit\n",
+                                   capture_output=True, text=True, timeout=60)
+        lines = [line for line in completed.stdout.splitlines() if line.startswith('rpn>')]
+
+        assert lines == ["rpn> Стек: 3 4", "rpn> Стек: 7", "rpn> Стек: 14", "rpn> Стек: 7 2",
+                         "rpn> Стек: 7 10", "rpn> Стек: 7 50", "rpn> Ошибка: Деление на ноль",
+                         "rpn> До свидания!"]
+        print("\n  ✓ --session запускает сессию с undo и edit")
@@ -0,0 +1,111 @@
+"""
+Тесты потокового вычисления RPN выражения из файла
+"""
+import sys
+import os
+import subprocess
+import tracemalloc
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from calculator import OPERATOR_FUNCTIONS, RPNCalculator
+from limits import ResourcePolicy
+from streaming import evaluate_buffer
+
+
+class TestStreaming:
+    """Класс тестов потокового вычисления"""
+
+    def setup_method(self) -> None:
+        """Настройка перед каждым тестом"""
+        self.calculator = RPNCalculator()
+
+    def outcome(self, function: object, argument: object) -> tuple[object, ...]:
+        """Возвращает результат или тип и текст ошибки"""
+        try:
+            result = function(argument)  # type: ignore[operator]
+            return ('ok', result, type(result))
+        except (ValueError, ZeroDivisionError) as err:
+            return (type(err).__name__, str(err))
+
+    def test_matches_evaluate(self, tmp_path) -> None:
+        """Тестирование совпадения результатов и ошибок с evaluate()"""
+        path = tmp_path / "expression.rpn"
+        for expression in ("3 4 +", "5 1 2 + 4 * + 3 -", "(1 2 3 sum) 2.5 *", "2 100 97 powmod",
+                           "7 2 //\n", "  \n\t", "1 0 /", "1 +", "1 abc +", "(4 +) 2 *", "() 1",
+                           "1 2 )", "(1 2 +", "1 2", "1 0 / (2 +)", "(1 0 /) (3", "2 (sum) +"):
+            path.write_text(expression)
+            assert self.outcome(self.calculator.evaluate_file, str(path)) == \
+                self.outcome(self.calculator.evaluate, expression), expression
+        print("\n  ✓ Результаты и ошибки совпадают с evaluate()")
+
+    def test_policy(self) -> None:
+        """Тестирование лимитов политики и их приоритета"""
+        for policy, expression in ((ResourcePolicy(max_tokens=3), "1 0 / )"),
+                                   (ResourcePolicy(max_tokens=3), "2 2000000000 ** 1 +"),
+                                   (ResourcePolicy(max_stack_depth=2), "1 0 / 1 2 3 + +"),
+                                   (ResourcePolicy(max_bits=8), "1 0 / 1000 +"),
+                                   (ResourcePolicy(max_bits=8), "1 0 / x 1000 +"),
+                                   (ResourcePolicy(max_bits=8), "(1 0 /) (1000"),
+                                   (ResourcePolicy(max_bits=64), "2 100 ** 1 +")):
+            calculator = RPNCalculator(policy=policy)
+            assert self.outcome(lambda text: evaluate_buffer(text.encode(), calculator._operators, policy),
+                                expression) == self.outcome(calculator.evaluate, expression), expression
+        print("\n  ✓ Лимиты ресурсов проверяются в том же порядке")
+
+    def test_memory_independent_of_size(self, tmp_path) -> None:
+        """Тестирование памяти: пик не растёт с размером файла"""
+        path = tmp_path / "large.rpn"
+        with open(path, 'w') as file:
+            file.write("1 ")
+            for _ in range(20):
+                file.write("(2 3 *) + " * 2000)
+        size = os.path.getsize(path)
+        tracemalloc.start()
+        try:
+            assert self.calculator.evaluate_file(str(path)) == 1 + 6 * 40000
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert peak < size // 10
+        print(f"\n  ✓ Файл {size} байт вычислен с пиком памяти {peak} байт")
+
+    def test_errors_release_file(self, tmp_path) -> None:
+        """Тестирование ошибок файла и повторного открытия после ошибки"""
+        path = tmp_path / "broken.rpn"
+        with pytest.raises(OSError):
+            self.calculator.evaluate_file(str(path))
+        path.write_bytes(b"")
+        with pytest.raises(ValueError, match="Пустое выражение"):
+            self.calculator.evaluate_file(str(path))
+        path.write_bytes(b"(1 2 3 \xd0\xb0 +) *")
+        with pytest.raises(ValueError, match="Незавершенное выражение в скобках: 1 2 3 а"):
+            self.calculator.evaluate_file(str(path))
+        path.write_bytes(b"1 2 + )")
+        with pytest.raises(ValueError, match="Несбалансированные скобки"):
+            evaluate_buffer(memoryview(path.read_bytes()), OPERATOR_FUNCTIONS)
+        # Исключение оператора, сохранённое до ошибки скобок, не должно держать буфер mmap
+        for text, message in ((b"0 -1 ** )", "Несбалансированные скобки"),
+                              (b"0 -1 ** (4 +) +", "Незавершенное выражение в скобках: 4 +")):
+            path.write_bytes(text)
+            with pytest.raises(ValueError, match=message):
+                self.calculator.evaluate_file(str(path))
+        print("\n  ✓ Ошибки файла и выражения обрабатываются, mmap закрывается")
+
+    def test_file_flag(self, tmp_path) -> None:
+        """Тестирование флага --file в main.py"""
+        path = tmp_path / "expression.rpn"
+        path.write_text("(1 2 3 sum) 7 *\n")
+        completed = subprocess.run([sys.executable, os.path.join(fp, 'main.py'), '--file', str(path)],
+                                   capture_output=True, text=True, timeout=60)
+        assert completed.stdout.strip() == "42"
+        path.write_text("1 0 /")
+        completed = subprocess.run([sys.executable, os.path.join(fp, 'main.py'), '--file', str(path)],
+                                   capture_output=True, text=True, timeout=60)
+        assert completed.returncode == 1
+        assert "Деление на ноль" in completed.stderr
+        print("\n  ✓ --file вычисляет выражение из файла")
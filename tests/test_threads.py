@@ -0,0 +1,124 @@
+"""
+Тесты вычислений из нескольких потоков с общими кэшами
+"""
+import sys
+import os
+import threading
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from cache import LRUCache, StripedLRUCache
+from calculator import RPNCalculator
+from limits import ResourcePolicy
+
+THREADS = 8
+
+EXPRESSIONS = [f"{i} {i % 7} / {i % 5} 2 ** +" for i in range(200)] + \
+    ["1 0 /", "abc 1 +", "1 2", "2 200 **", "(1 2 3 sum) 2 *", "7 2 //"]
+
+
+def run_threads(work, count: int = THREADS) -> None:
+    """Запускает work(номер потока) в count потоках и пробрасывает первую ошибку"""
+    errors: list[BaseException] = []
+    barrier = threading.Barrier(count)
+
+    def target(index: int) -> None:
+        try:
+            barrier.wait()
+            work(index)
+        except BaseException as err:
+            errors.append(err)
+
+    interval = sys.getswitchinterval()
+    # Частое переключение потоков в сборке с GIL, чтобы операции кэша чередовались
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    if errors:
+        raise errors[0]
+
+
+def outcome(calculator: RPNCalculator, expression: str) -> tuple[object, ...]:
+    """Результат с типом или тип и текст ошибки"""
+    try:
+        value = calculator.evaluate(expression)
+    except (ValueError, ZeroDivisionError) as err:
+        return type(err), str(err)
+    return type(value), repr(value)
+
+
+class TestThreads:
+    """Класс тестов многопоточных вычислений"""
+
+    def test_cache_under_contention(self) -> None:
+        """Тестирование LRU-кэшей при одновременных чтениях, записях и вытеснениях"""
+        for cache in (LRUCache(16), StripedLRUCache(16, 4)):
+            def work(index: int, cache=cache) -> None:
+                for step in range(3000):
+                    key = (index * 7 + step) % 64
+                    value = cache.get(key)
+                    assert value is None or value == key * key
+                    cache.put(key, key * key)
+                    if step % 500 == 0:
+                        cache.invalidate(key)
+
+            run_threads(work)
+            stats = cache.stats()
+            assert len(cache) <= 16 and stats['size'] == len(cache) and stats['evictions'] > 0
+        print("\n  ✓ Кэши не ломаются и не превышают ёмкость при одновременном доступе")
+
+    def test_striped_cache(self) -> None:
+        """Тестирование сегментированного кэша: ёмкость, статистика, сброс"""
+        cache: StripedLRUCache[str, int] = StripedLRUCache(10, 4)
+        assert [stripe.maxsize for stripe in cache._stripes] == [3, 3, 2, 2]
+        assert len(StripedLRUCache(2, 16)._stripes) == 2
+        for i in range(100):
+            cache.put(str(i), i)
+        assert len(cache) == 10 and cache.stats()['evictions'] == 90
+        key = next(str(i) for i in range(100) if str(i) in cache)
+        assert cache.get(key) == int(key) and cache.get('missing') is None
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 90, 'size': 10, 'maxsize': 10}
+        cache.invalidate(key)
+        assert key not in cache and len(cache) == 9
+        cache.invalidate()
+        assert len(cache) == 0
+        StripedLRUCache(0, 4).put('a', 1)
+        with pytest.raises(ValueError):
+            StripedLRUCache(10, 0)
+        print("\n  ✓ Ёмкость делится между сегментами, статистика суммируется")
+
+    def test_shared_calculator_stress(self) -> None:
+        """Стресс-тест: один калькулятор из многих потоков совпадает с последовательным вычислением"""
+        reference = RPNCalculator(cache_size=0)
+        expected = {expression: outcome(reference, expression) for expression in EXPRESSIONS}
+        records = [(result.value, result.error) for result in reference.evaluate_many(EXPRESSIONS)]
+        calculators = [RPNCalculator(cache_size=32), RPNCalculator(cache_size=32, cache_stripes=4),
+                       RPNCalculator(cache_size=32, memo_size=64),
+                       RPNCalculator(cache_size=32, cache_stripes=4, policy=ResourcePolicy(max_bits=128))]
+        for calculator in calculators:
+            limited = calculator.policy is not None
+
+            def work(index: int, calculator=calculator, limited=limited) -> None:
+                for step in range(3 * len(EXPRESSIONS)):
+                    expression = EXPRESSIONS[(index * 31 + step) % len(EXPRESSIONS)]
+                    result = outcome(calculator, expression)
+                    if not (limited and expression == "2 200 **"):
+                        assert result == expected[expression], expression
+                if not limited:
+                    assert [(result.value, result.error) for result in calculator.evaluate_many(EXPRESSIONS)] \
+                        == records
+                assert calculator.compile_function("x y + 2 *")(index, 1) == 2 * (index + 1)
+
+            run_threads(work)
+            assert calculator.cache_info()['size'] <= 32
+        print("\n  ✓ Результаты и ошибки из 8 потоков совпадают с последовательным вычислением")
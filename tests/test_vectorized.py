@@ -0,0 +1,130 @@
+"""
+Тесты векторизованного вычисления RPN выражений над столбцами
+"""
+import sys
+import os
+
+cd = os.path.dirname(os.path.abspath(__file__))
+pd = os.path.dirname(cd)
+fp = os.path.join(pd, 'src')
+sys.path.insert(0, fp)
+
+import pytest
+from calculator import RPNCalculator
+
+np = pytest.importorskip('numpy')
+
+
+class TestEvaluateColumns:
+    """Класс тестов векторизованного вычисления"""
+
+    def setup_method(self):
+        """Инициализация калькулятора перед каждым тестом"""
+        self.calculator = RPNCalculator()
+
+    def scalar(self, expression: str, **values):
+        """Вычисляет выражение построчно, подставляя значения переменных"""
+        tokens = [repr(values[token]) if token in values else token for token in self.calculator._tokenize(expression)]
+        try:
+            return self.calculator.evaluate(' '.join(tokens))
+        except (ValueError, ZeroDivisionError):
+            return None
+
+    def test_matches_scalar_path(self) -> None:
+        """Тестирование совпадения с построчным вычислением"""
+        x = np.array([1, -7, 0, 5, 2 ** 40, 9])
+        y = np.array([2, 3, 0, -2, 3, 4])
+        z = np.array([0.5, -1.5, 2.0, 3.0, 1.0, 0.0])
+        expressions = ["x y + z *", "x y //", "x y %", "x y /", "x y *", "x y * x *", "x y ** z +", "(x z /) y -"]
+
+        print("\nТесты совпадения со скалярным вычислением:")
+        for expression in expressions:
+            result = self.calculator.evaluate_columns(expression, x=x, y=y, z=z)
+            values = result.data.tolist()
+            for i in range(len(x)):
+                expected = self.scalar(expression, x=int(x[i]), y=int(y[i]), z=float(z[i]))
+                if expected is None:
+                    assert result.mask[i], f"{expression}: строка {i} должна быть замаскирована"
+                else:
+                    assert not result.mask[i]
+                    assert values[i] == pytest.approx(expected)
+                    assert type(values[i]) is type(expected)
+            print(f"  ✓ {expression}")
+
+    def test_registry_operators(self) -> None:
+        """Тестирование унарных, тернарных и сворачивающих операторов"""
+        x = np.array([1, -7, 0, 5, 2 ** 40])
+        y = np.array([2, 3, 0, -2, 3])
+        z = np.array([0.5, -1.5, 2.0, 3.0, 1.0])
+        expressions = ["x neg", "z abs", "x y 7 powmod", "x y 0 powmod", "x y z sum", "(x y prod) z max",
+                       "x y z mean", "1 (x y min) +"]
+
+        for expression in expressions:
+            result = self.calculator.evaluate_columns(expression, x=x, y=y, z=z)
+            values = result.data.tolist()
+            for i in range(len(x)):
+                expected = self.scalar(expression, x=int(x[i]), y=int(y[i]), z=float(z[i]))
+                if expected is None:
+                    assert result.mask[i]
+                else:
+                    assert not result.mask[i]
+                    assert values[i] == expected and type(values[i]) is type(expected)
+        print("\n  ✓ Операторы реестра совпадают с построчным вычислением")
+
+    def test_error_masking(self) -> None:
+        """Тестирование маскирования строк с ошибкой"""
+        result = self.calculator.evaluate_columns("x y /", x=np.array([1, 2, 3]), y=np.array([1, 0, 2]))
+        assert result.mask.tolist() == [False, True, False]
+        assert result.compressed().tolist() == [1.0, 1.5]
+
+        result = self.calculator.evaluate_columns("x y //", x=np.array([7.0, 8.0]), y=np.array([2, 3]))
+        assert result.mask.all()
+
+        result = self.calculator.evaluate_columns("x 2 **", x=np.array([1e200, 3.0]))
+        assert result.mask.tolist() == [True, False]
+        print("\n  ✓ Деление на ноль, нецелые операнды и переполнение маскируются")
+
+    def test_int64_overflow_promotes(self) -> None:
+        """Тестирование точной целочисленной арифметики при переполнении int64"""
+        x = np.array([2 ** 62, 3], dtype=np.int64)
+        result = self.calculator.evaluate_columns("x x * 1 +", x=x)
+        assert result.tolist() == [2 ** 124 + 1, 10]
+        print("\n  ✓ Переполнение int64 пересчитывается над Python int")
+
+    def test_broadcast_and_constants(self) -> None:
+        """Тестирование констант и скаляров вместо столбцов"""
+        result = self.calculator.evaluate_columns("x k * 1.5 +", x=np.arange(3), k=2)
+        assert result.tolist() == [1.5, 3.5, 5.5]
+        assert result.dtype == np.float64
+
+    def test_expression_errors(self) -> None:
+        """Тестирование ошибок, общих для всех строк"""
+        cases = [
+            ("", "Пустое выражение"),
+            ("x +", "Недостаточно операндов"),
+            ("x w +", "Неизвестная переменная: w"),
+            ("x 1a +", "Некорректный токен: 1a"),
+            ("(x y", "Несбалансированные скобки"),
+            ("x y", "Некорректное выражение"),
+        ]
+        for expression, message in cases:
+            with pytest.raises(ValueError, match=message):
+                self.calculator.evaluate_columns(expression, x=np.arange(2), y=np.arange(2))
+        with pytest.raises(TypeError):
+            self.calculator.evaluate_columns("x 1 +", x=np.array(['a', 'b']))
+
+    def test_resource_policy(self) -> None:
+        """Тестирование лимитов политики калькулятора"""
+        from limits import ResourcePolicy
+        calculator = RPNCalculator(policy=ResourcePolicy(max_bits=64, max_tokens=5, max_stack_depth=2))
+
+        result = calculator.evaluate_columns("2 x ** 1 +", x=np.array([3000000, 10]))
+        assert result.mask.tolist() == [True, False]
+        assert result[1] == 1025
+        result = calculator.evaluate_columns("x x *", x=np.array([2 ** 40, 3]))
+        assert result.mask.tolist() == [True, False]
+        with pytest.raises(ValueError, match="больше 5 токенов"):
+            calculator.evaluate_columns("x 1 + 1 + 1 +", x=np.arange(2))
+        with pytest.raises(ValueError, match="глубина стека больше 2"):
+            calculator.evaluate_columns("x x x + +", x=np.arange(2))
+        print("\n  ✓ Лимиты ресурсов соблюдаются и над столбцами")